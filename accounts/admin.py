@@ -1,13 +1,16 @@
 from django.contrib import admin
 from accounts.models import Person, Manager
+from search.admin import IndexedSearchMixin
 
 
 @admin.register(Person)
-class PersonAdmin(admin.ModelAdmin):
+class PersonAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("username",  "contact_email", "contact_phone")
-    search_fields = ('name',)
+    search_fields = ('username', 'contact_email')
+    indexed_search_relations = (("pk", Person),)
 
 
 @admin.register(Manager)
 class ManagerAdmin(admin.ModelAdmin):
-    list_display = ("manager",)
\ No newline at end of file
+    list_display = ("manager", "user")
+    raw_id_fields = ("user",)
\ No newline at end of file
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_managers(apps, schema_editor):
+    """Привязка существующих менеджеров к пользователям с тем же именем"""
+    Manager = apps.get_model("accounts", "Manager")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    users = dict(User.objects.values_list("username", "pk"))
+    linked = set()
+    for manager in Manager.objects.exclude(manager__isnull=True).order_by("pk"):
+        user_id = users.get(manager.manager)
+        if user_id is not None and user_id not in linked:
+            manager.user_id = user_id
+            manager.save(update_fields=["user"])
+            linked.add(user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_manager_options_alter_person_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manager',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='manager', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь админки'),
+        ),
+        migrations.RunPython(link_managers, migrations.RunPython.noop),
+    ]
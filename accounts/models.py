@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 
 
@@ -16,6 +17,14 @@ class Person(models.Model):
 
 class Manager(models.Model):
     manager = models.CharField(max_length=30, verbose_name="Менеджер", null=True, blank=True)
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="manager",
+        verbose_name="Пользователь админки"
+    )
 
     class Meta:
         verbose_name = "Менеджер"
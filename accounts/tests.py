@@ -0,0 +1,22 @@
+from importlib import import_module
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from accounts.models import Manager
+
+
+class ManagerUserMigrationTest(TestCase):
+    """Существующие менеджеры привязываются к пользователям админки по имени"""
+
+    def test_link_by_username(self):
+        user = get_user_model().objects.create_user("maria")
+        first = Manager.objects.create(manager="maria")
+        duplicate = Manager.objects.create(manager="maria")
+        unknown = Manager.objects.create(manager="ivan")
+        migration = import_module("accounts.migrations.0005_manager_user")
+        migration.link_managers(apps, None)
+
+        self.assertEqual(Manager.objects.get(pk=first.pk).user, user)
+        # Пользователь привязывается только к одному менеджеру
+        self.assertIsNone(Manager.objects.get(pk=duplicate.pk).user)
+        self.assertIsNone(Manager.objects.get(pk=unknown.pk).user)
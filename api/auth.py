@@ -0,0 +1,24 @@
+import hmac
+from functools import wraps
+from django.conf import settings
+from django.http import JsonResponse
+
+
+def check_token(request) -> bool:
+    """Проверка заголовка Authorization: Bearer <токен> по списку API_TOKENS"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    return any(hmac.compare_digest(token, allowed) for allowed in settings.API_TOKENS)
+
+
+def token_required(view):
+    """Доступ к асинхронному представлению только с токеном из API_TOKENS"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not check_token(request):
+            response = JsonResponse({"error": "Требуется токен API"}, status=401)
+            response["WWW-Authenticate"] = 'Bearer realm="api"'
+            return response
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,21 @@
+from django import forms
+from contracts.models import Accrual
+
+
+class AccrualForm(forms.ModelForm):
+    """Проверка начисления, присланного через API"""
+
+    class Meta:
+        model = Accrual
+        fields = (
+            "contract", "created_by", "accrual_flags", "accrual_status",
+            "hours_worked", "real_revenue", "comment_manager",
+        )
+
+    def __init__(self, data=None, *args, **kwargs):
+        if data is not None:
+            # Без флага сохраняется пустая строка, а не значение по умолчанию (None)
+            data = {"accrual_flags": "", **data}
+        super().__init__(data, *args, **kwargs)
+        # В модели поле blank=True для админки, но в базе оно обязательное
+        self.fields["created_by"].required = True
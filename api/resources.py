@@ -0,0 +1,152 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable
+from django.db.models import QuerySet
+from accounts.models import Person
+from contracts.models import Accrual, Contract
+from threads.models import Education_Thread
+
+
+@dataclass(frozen=True, slots=True)
+class Field:
+    """Поле ответа: как получить значение и что для этого загрузить из базы"""
+    getter: Callable[[Any], Any]
+    columns: tuple[str, ...] = ()
+    prefetch: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class Resource:
+    """Коллекция API: набор записей, поля ответа и фильтры ?параметр=значение"""
+    name: str
+    queryset: Callable[[], QuerySet]
+    fields: dict[str, Field]
+    filters: dict[str, str] = field(default_factory=dict)
+
+    def get_queryset(self, field_names) -> QuerySet:
+        """Загружаются только колонки и связи выбранных полей (?fields=)"""
+        selected = [self.fields[name] for name in field_names]
+        queryset = self.queryset()
+        columns = [column for item in selected for column in item.columns]
+        prefetch = [lookup for item in selected for lookup in item.prefetch]
+        queryset = queryset.only(queryset.model._meta.pk.name, *columns)
+        if prefetch:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch))
+        return queryset
+
+    def serialize(self, obj, field_names) -> dict:
+        return {name: self.fields[name].getter(obj) for name in field_names}
+
+
+def column(name: str, attname: str = "") -> Field:
+    """Поле, которое берется из одноименной колонки модели"""
+    attname = attname or name
+    return Field(getter=lambda obj: getattr(obj, attname), columns=(attname,))
+
+
+def author_terms(obj) -> list[dict]:
+    return [
+        {
+            "id": author.pk,
+            "person": author.author_id,
+            "reward_type": author.reward_type,
+            "reward_percent": author.reward_percent,
+            "revenue": author.revenue,
+            "currency": author.currency,
+            "threads": [thread.pk for thread in author.thead.all()],
+        }
+        for author in obj.authors.all()
+    ]
+
+
+def presenter_terms(obj) -> list[dict]:
+    return [
+        {
+            "id": presenter.pk,
+            "person": presenter.presenter_id,
+            "hourly_rate": presenter.hourly_rate,
+            "estimate": presenter.estimate,
+            "currency": presenter.currency,
+            "threads": [thread.pk for thread in presenter.thead.all()],
+        }
+        for presenter in obj.presenters.all()
+    ]
+
+
+def formula(obj) -> str:
+    return (obj.calculation_formula or {}).get("formula", "")
+
+
+RESOURCES = {
+    resource.name: resource
+    for resource in (
+        Resource(
+            name="contracts",
+            queryset=lambda: Contract.objects.order_by(),
+            fields={
+                "contract_number": column("contract_number"),
+                "kind": column("kind"),
+                "started_at": column("started_at"),
+                "ended_at": column("ended_at"),
+                "created_at": column("created_at"),
+                "created_by": column("created_by", "created_by_id"),
+                "responsible_manager": column("responsible_manager", "responsible_manager_id"),
+                "comment_manager": column("comment_manager"),
+                "articul": column("articul", "articul_summary"),
+                "authors": Field(getter=author_terms, prefetch=("authors__thead",)),
+                "presenters": Field(getter=presenter_terms, prefetch=("presenters__thead",)),
+            },
+            filters={"kind": "kind"},
+        ),
+        Resource(
+            name="accruals",
+            queryset=lambda: Accrual.objects.order_by(),
+            fields={
+                "id": column("id"),
+                "contract": column("contract", "contract_id"),
+                "created_at": column("created_at"),
+                "created_by": column("created_by", "created_by_id"),
+                "updated_by": column("updated_by", "updated_by_id"),
+                "accrual_status": column("accrual_status"),
+                "accrual_flags": column("accrual_flags"),
+                "payed": column("payed"),
+                "hours_worked": column("hours_worked"),
+                "real_revenue": column("real_revenue"),
+                "amount": column("amount"),
+                "currency": column("currency"),
+                "comment_manager": column("comment_manager"),
+                "idempotency_key": column("idempotency_key"),
+                "formula": Field(getter=formula, columns=("calculation_formula",)),
+            },
+            filters={
+                "contract": "contract",
+                "payed": "payed",
+                "status": "accrual_status",
+                "currency": "currency",
+            },
+        ),
+        Resource(
+            name="threads",
+            queryset=lambda: Education_Thread.objects.with_status().order_by(),
+            fields={
+                "id": column("id"),
+                "name": column("name"),
+                "articul": column("articul"),
+                "type_course": column("type_course"),
+                "started_at": column("started_at"),
+                "ended_at": column("ended_at"),
+                "status": Field(getter=lambda obj: obj.status),
+            },
+            filters={"status": "status", "type_course": "type_course"},
+        ),
+        Resource(
+            name="persons",
+            queryset=lambda: Person.objects.order_by(),
+            fields={
+                "id": column("id"),
+                "username": column("username"),
+                "contact_email": column("contact_email"),
+                "contact_phone": column("contact_phone"),
+            },
+        ),
+    )
+}
@@ -0,0 +1,121 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from accounts.models import Manager, Person
+from contracts.models import Accrual, Author, Contract
+from threads.models import Education_Thread
+
+
+@override_settings(API_TOKENS=["secret"], API_PAGE_SIZE=2)
+class ApiTest(TestCase):
+    """Чтение коллекций по курсору, выбор полей, ETag и создание начислений"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = Manager.objects.create(manager="Мария")
+        thread = Education_Thread.objects.create(
+            name="Python", type_course="regular",
+            started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1),
+        )
+        author = Author.objects.create(
+            author=Person.objects.create(username="author"),
+            revenue=Decimal("1000"),
+            reward_percent=Decimal("10"),
+        )
+        author.thead.add(thread)
+        cls.contract = Contract.objects.create(
+            started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1), created_by=cls.manager,
+        )
+        cls.contract.authors.add(author)
+        for revenue in ("100", "200", "300"):
+            Accrual.objects.create(
+                contract=cls.contract, created_by=cls.manager,
+                accrual_flags="correction", real_revenue=Decimal(revenue),
+            )
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers={"Authorization": "Bearer secret", **headers})
+
+    def test_token_required(self):
+        response = self.client.get(reverse("api:collection", args=["accruals"]))
+        self.assertEqual(response.status_code, 401)
+
+    def test_cursor_pagination(self):
+        url = reverse("api:collection", args=["accruals"]) + "?fields=id,amount"
+        amounts = []
+        while url:
+            data = self.get(url).json()
+            for row in data["results"]:
+                self.assertEqual(set(row), {"id", "amount"})
+                amounts.append(row["amount"])
+            url = data["next"]
+        self.assertEqual(amounts, ["10.00", "20.00", "30.00"])
+
+    def test_unknown_field(self):
+        response = self.get(reverse("api:collection", args=["contracts"]) + "?fields=secret")
+        self.assertEqual(response.status_code, 400)
+
+    def test_contract_terms(self):
+        response = self.get(reverse("api:detail", args=["contracts", self.contract.pk]))
+        data = response.json()
+        self.assertEqual(data["kind"], "author")
+        self.assertEqual(data["authors"][0]["reward_percent"], "10.0")
+        self.assertEqual(len(data["authors"][0]["threads"]), 1)
+
+    def test_boolean_filter(self):
+        Accrual.objects.filter(real_revenue=Decimal("100")).update(payed=True)
+        url = reverse("api:collection", args=["accruals"]) + "?fields=amount&payed="
+        self.assertEqual([row["amount"] for row in self.get(url + "true").json()["results"]], ["10.00"])
+        self.assertEqual([row["amount"] for row in self.get(url + "false").json()["results"]], ["20.00", "30.00"])
+        self.assertEqual(self.get(url + "maybe").status_code, 400)
+
+    def test_conditional_get(self):
+        url = reverse("api:collection", args=["threads"])
+        etag = self.get(url)["ETag"]
+        self.assertEqual(self.get(url, **{"If-None-Match": etag}).status_code, 304)
+
+    def test_create_accrual(self):
+        response = self.client.post(
+            reverse("api:collection", args=["accruals"]),
+            {"contract": self.contract.pk, "created_by": self.manager.pk, "real_revenue": "500"},
+            content_type="application/json",
+            headers={"Authorization": "Bearer secret"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["amount"], "50.00")
+
+    def test_create_accrual_validation(self):
+        response = self.client.post(
+            reverse("api:collection", args=["accruals"]),
+            {"contract": self.contract.pk},
+            content_type="application/json",
+            headers={"Authorization": "Bearer secret"},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("created_by", response.json()["errors"])
+
+    def test_accrual_batch_is_idempotent(self):
+        items = [
+            {"idempotency_key": "lms-1", "contract": self.contract.pk, "created_by": self.manager.pk, "real_revenue": "700"},
+            {"idempotency_key": "lms-2", "contract": self.contract.pk, "created_by": self.manager.pk, "real_revenue": "800"},
+            {"idempotency_key": "lms-3", "contract": 0, "created_by": self.manager.pk},
+        ]
+
+        def submit():
+            return self.client.post(
+                reverse("api:accrual-batch"), {"items": items},
+                content_type="application/json",
+                headers={"Authorization": "Bearer secret"},
+            ).json()
+
+        first = submit()
+        self.assertEqual((first["created"], first["duplicates"], first["errors"]), (2, 0, 1))
+        self.assertEqual(Accrual.objects.get(idempotency_key="lms-2").amount, Decimal("80.00"))
+        replay = submit()
+        self.assertEqual((replay["created"], replay["duplicates"], replay["errors"]), (0, 2, 1))
+        self.assertEqual(
+            [result["id"] for result in replay["results"][:2]],
+            [result["id"] for result in first["results"][:2]],
+        )
+        self.assertEqual(Accrual.objects.filter(idempotency_key__startswith="lms-").count(), 2)
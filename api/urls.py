@@ -0,0 +1,10 @@
+from django.urls import path
+from api import views
+
+app_name = "api"
+
+urlpatterns = [
+    path("accruals/batch/", views.accrual_batch, name="accrual-batch"),
+    path("<slug:resource>/", views.collection, name="collection"),
+    path("<slug:resource>/<str:pk>/", views.detail, name="detail"),
+]
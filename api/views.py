@@ -0,0 +1,206 @@
+import hashlib
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import BooleanField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from api.auth import token_required
+from api.forms import AccrualForm
+from api.resources import RESOURCES, Resource
+from contracts.imports import parse_bool, submit_accruals
+from dataverse.pagination import CURSOR_VAR, decode_cursor, encode_cursor, seek_condition
+from dataverse.routers import replica_view
+
+FIELDS_VAR = "fields"
+LIMIT_VAR = "limit"
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def get_resource(name: str) -> Resource:
+    try:
+        return RESOURCES[name]
+    except KeyError:
+        raise Http404
+
+
+def json_response(request, data, status: int = 200) -> HttpResponse:
+    """JSON-ответ с ETag: повторный GET с If-None-Match получает 304 без тела"""
+    content = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    response = HttpResponse(content, status=status, content_type="application/json")
+    patch_vary_headers(response, ["Authorization"])
+    if request.method != "GET" or status != 200:
+        return response
+    etag = f'"{hashlib.md5(content, usedforsecurity=False).hexdigest()}"'
+    response["ETag"] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def error_response(request, message: str, status: int = 400, **extra) -> HttpResponse:
+    return json_response(request, {"error": message, **extra}, status=status)
+
+
+def parse_fields(request, resource: Resource) -> list[str]:
+    """Список полей из ?fields=a,b; без параметра — все поля ресурса"""
+    raw = request.GET.get(FIELDS_VAR)
+    if not raw:
+        return list(resource.fields)
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in names if name not in resource.fields]
+    if unknown:
+        raise ApiError(f"Неизвестные поля: {', '.join(unknown)}")
+    return names
+
+
+def parse_limit(request) -> int:
+    raw = request.GET.get(LIMIT_VAR)
+    if raw is None:
+        return settings.API_PAGE_SIZE
+    if not raw.isdigit() or int(raw) == 0:
+        raise ApiError("limit должен быть положительным числом")
+    return min(int(raw), settings.API_MAX_PAGE_SIZE)
+
+
+def filter_value(queryset, lookup: str, value: str):
+    """Значение фильтра; логические поля принимают true/false, 1/0, yes/no"""
+    try:
+        field = queryset.model._meta.get_field(lookup)
+    except FieldDoesNotExist:
+        # Аннотация (например, статус потока)
+        return value
+    if isinstance(field, BooleanField):
+        return parse_bool(value)
+    return value
+
+
+def apply_filters(request, resource: Resource, queryset):
+    for param, lookup in resource.filters.items():
+        if param in request.GET:
+            try:
+                queryset = queryset.filter(**{lookup: filter_value(queryset, lookup, request.GET[param])})
+            except (ValueError, ValidationError):
+                raise ApiError(f"Некорректное значение фильтра {param}")
+    return queryset
+
+
+@replica_view
+async def list_objects(request, resource: Resource) -> HttpResponse:
+    """Страница коллекции по курсору ?after= в порядке первичного ключа"""
+    field_names = parse_fields(request, resource)
+    limit = parse_limit(request)
+    queryset = apply_filters(request, resource, resource.get_queryset(field_names))
+    pk = queryset.model._meta.pk
+    queryset = queryset.order_by(pk.attname)
+    cursor = request.GET.get(CURSOR_VAR)
+    if cursor:
+        values = decode_cursor(cursor, [pk])
+        if values is None:
+            raise ApiError("Некорректный курсор")
+        queryset = queryset.filter(seek_condition([(pk, False)], values))
+
+    rows = [obj async for obj in queryset[:limit + 1]]
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params[CURSOR_VAR] = encode_cursor([rows[-1].pk])
+        next_url = f"{request.path}?{params.urlencode()}"
+    return json_response(request, {
+        "results": [resource.serialize(obj, field_names) for obj in rows],
+        "next": next_url,
+    })
+
+
+@replica_view
+async def get_object(request, resource: Resource, pk: str) -> HttpResponse:
+    field_names = parse_fields(request, resource)
+    queryset = resource.get_queryset(field_names)
+    try:
+        obj = await queryset.filter(pk=pk).afirst()
+    except (ValueError, ValidationError):
+        obj = None
+    if obj is None:
+        return error_response(request, "Запись не найдена", status=404)
+    return json_response(request, resource.serialize(obj, field_names))
+
+
+def parse_json_object(request) -> dict:
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        raise ApiError("Тело запроса должно быть JSON-объектом")
+    return payload
+
+
+async def create_accrual(request, resource: Resource) -> HttpResponse:
+    """Создание начисления: расчет формулы выполняется при сохранении модели"""
+    payload = parse_json_object(request)
+    form = AccrualForm(payload)
+    if not await sync_to_async(form.is_valid)():
+        return error_response(request, "Ошибка проверки", errors=form.errors.get_json_data())
+    accrual = await sync_to_async(form.save)()
+    response = json_response(request, resource.serialize(accrual, list(resource.fields)), status=201)
+    response["Location"] = reverse("api:detail", args=[resource.name, accrual.pk])
+    return response
+
+
+@csrf_exempt
+@token_required
+async def collection(request, resource: str) -> HttpResponse:
+    resource = get_resource(resource)
+    allowed = ["GET", "POST"] if resource.name == "accruals" else ["GET"]
+    if request.method not in allowed:
+        return HttpResponseNotAllowed(allowed)
+    try:
+        if request.method == "POST":
+            return await create_accrual(request, resource)
+        return await list_objects(request, resource)
+    except ApiError as e:
+        return error_response(request, e.message, status=e.status)
+
+
+@csrf_exempt
+@token_required
+async def detail(request, resource: str, pk: str) -> HttpResponse:
+    resource = get_resource(resource)
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    try:
+        return await get_object(request, resource, pk)
+    except ApiError as e:
+        return error_response(request, e.message, status=e.status)
+
+
+@csrf_exempt
+@token_required
+async def accrual_batch(request) -> HttpResponse:
+    """Пакетная отправка начислений: {"items": [{..., "idempotency_key": "..."}]}"""
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    try:
+        items = parse_json_object(request).get("items")
+        if not isinstance(items, list) or not items:
+            raise ApiError("Ожидается непустой список items")
+        if len(items) > settings.API_MAX_BATCH_SIZE:
+            raise ApiError(f"Не больше {settings.API_MAX_BATCH_SIZE} начислений в пачке")
+    except ApiError as e:
+        return error_response(request, e.message, status=e.status)
+    results = await sync_to_async(submit_accruals)(items)
+    return json_response(request, {
+        "created": sum(result["status"] == "created" for result in results),
+        "duplicates": sum(result["status"] == "duplicate" for result in results),
+        "errors": sum(result["status"] == "error" for result in results),
+        "results": results,
+    })
@@ -0,0 +1,170 @@
+"""Пропускная способность JSON API под uvicorn: асинхронные представления против синхронных.
+
+Режимы на тех же данных и запросах:
+- asgi: асинхронные представления api.views под ASGI;
+- wsgi-async: те же асинхронные представления под WSGI, Django выполняет
+  каждое через async_to_sync (цена адаптера);
+- wsgi-sync: обычные синхронные представления чтения из benchmarks/sync_api.py
+  (тот же разбор параметров и сериализация) под WSGI.
+
+Нужен установленный uvicorn. Нагрузку дают --clients одновременных клиентов
+с keep-alive соединениями в течение --duration секунд, например:
+    python benchmarks/api_throughput.py --clients 200 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+from common import create_dataset, test_database
+
+from django.db import connection
+
+TOKEN = "benchmark"
+MODES = {
+    "asgi": ["dataverse.asgi:application"],
+    "wsgi-async": ["dataverse.wsgi:application", "--interface", "wsgi"],
+    "wsgi-sync": ["sync_api:application", "--interface", "wsgi", "--app-dir", "benchmarks"],
+}
+
+
+def database_url() -> str:
+    """Адрес тестовой базы для процесса сервера"""
+    settings_dict = connection.settings_dict
+    if connection.vendor == "sqlite":
+        return f"sqlite:///{settings_dict['NAME']}"
+    credentials = quote(settings_dict["USER"] or "")
+    if settings_dict["PASSWORD"]:
+        credentials += ":" + quote(settings_dict["PASSWORD"])
+    host = settings_dict["HOST"] or "localhost"
+    port = settings_dict["PORT"] or 5432
+    return f"postgres://{credentials}@{host}:{port}/{settings_dict['NAME']}"
+
+
+async def request(reader, writer, path: str) -> int:
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        f"Authorization: Bearer {TOKEN}\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def client(port: int, paths: list, deadline: float, latencies: list, errors: list):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        index = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = await request(reader, writer, paths[index % len(paths)])
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors.append(status)
+            index += 1
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        writer.close()
+
+
+async def load(port: int, paths: list, clients: int, duration: float):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        client(port, paths, deadline, latencies, errors) for _ in range(clients)
+    ))
+    return latencies, errors
+
+
+def wait_for_server(port: int, timeout: float = 30) -> None:
+    async def probe():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await request(reader, writer, "/api/threads/?limit=1")
+        writer.close()
+
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            asyncio.run(probe())
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def run_mode(mode: str, args, paths: list) -> None:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url(),
+        "API_TOKENS": TOKEN,
+        "ALLOWED_HOSTS": "127.0.0.1",
+        "DEBUG": "False",
+    }
+    command = [
+        sys.executable, "-m", "uvicorn", *MODES[mode],
+        "--port", str(args.port), "--workers", str(args.workers),
+        "--log-level", "warning", "--no-access-log",
+    ]
+    server = subprocess.Popen(command, env=env, cwd=Path(__file__).resolve().parent.parent)
+    try:
+        wait_for_server(args.port)
+        latencies, errors = asyncio.run(load(args.port, paths, args.clients, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+    if not latencies:
+        print(f"{mode}: нет успешных ответов, ошибки: {errors[:5]}")
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{mode}: {len(latencies) / args.duration:,.0f} запросов/с, "
+        f"p50 {quantiles[49] * 1000:.1f} мс, p95 {quantiles[94] * 1000:.1f} мс, "
+        f"ошибок {len(errors)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--accruals", type=int, default=10000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=[*MODES, "all"], default="all")
+    args = parser.parse_args()
+
+    if connection.vendor == "sqlite":
+        # Серверу нужна общая файловая база, а не база в памяти
+        connection.settings_dict["TEST"]["NAME"] = str(Path(tempfile.mkdtemp()) / "benchmark.sqlite3")
+
+    with test_database():
+        create_dataset(args.accruals)
+        connection.close()
+        paths = [
+            "/api/accruals/?limit=50",
+            "/api/accruals/?limit=50&fields=id,contract,amount,currency",
+            "/api/contracts/?limit=20",
+            "/api/threads/",
+        ]
+        print(f"База: {connection.vendor}, клиентов: {args.clients}, воркеров: {args.workers}")
+        for mode in (MODES if args.mode == "all" else [args.mode]):
+            run_mode(mode, args, paths)
+
+
+if __name__ == "__main__":
+    main()
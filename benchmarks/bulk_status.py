@@ -0,0 +1,43 @@
+"""Отметка оплаты: массовое действие (один UPDATE) против сохранения по одному.
+
+Пример:
+    python benchmarks/bulk_status.py --accruals 10000
+"""
+import argparse
+
+from common import create_dataset, test_database, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accruals", type=int, default=10000)
+    parser.add_argument("--one-by-one", type=int, default=500, help="Сколько начислений сохранить по одному")
+    args = parser.parse_args()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from accounts.models import Manager
+    from contracts.models import Accrual
+    from contracts.services import mark_accruals_paid
+
+    with test_database():
+        create_dataset(args.accruals)
+        manager = Manager.objects.first()
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+
+        with timer(f"Accrual.save() по одному, {args.one_by_one} шт.", args.one_by_one):
+            for accrual in Accrual.objects.select_related("contract").order_by("-pk")[:args.one_by_one]:
+                accrual.payed = True
+                accrual.updated_by = manager
+                accrual.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            with timer("mark_accruals_paid", args.accruals):
+                updated = mark_accruals_paid(Accrual.objects.all(), manager, user)
+        updates = sum(query["sql"].startswith('UPDATE "contracts_accrual"') for query in queries.captured_queries)
+        print(f"  отмечено: {updated}, UPDATE начислений: {updates}, всего запросов: {len(queries.captured_queries)}")
+
+
+if __name__ == "__main__":
+    main()
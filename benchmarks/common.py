@@ -0,0 +1,91 @@
+"""Общая подготовка окружения для бенчмарков.
+
+Бенчмарки запускаются из корня проекта, например:
+    python benchmarks/export_accruals.py --rows 100000
+и работают на отдельной тестовой базе, которая удаляется после замера.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dataverse.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+
+@contextmanager
+def test_database():
+    """Создание и удаление отдельной базы для замеров"""
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def timer(label: str, rows: int = 0):
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    rate = f", {rows / elapsed:,.0f} строк/с" if rows and elapsed else ""
+    print(f"{label}: {elapsed:.3f} с{rate}")
+
+
+def create_dataset(accruals: int, contracts: int = 100, batch_size: int = 5000):
+    """Контракты трех типов и заданное количество начислений к ним"""
+    from accounts.models import Person, Manager
+    from threads.models import Education_Thread
+    from contracts.models import Contract, Author, Presenter, Accrual
+    from contracts.services import recalculate_accruals
+
+    manager = Manager.objects.create(manager="benchmark")
+    thread = Education_Thread.objects.create(
+        name="Benchmark", type_course="regular",
+        started_at=date(2025, 1, 1), ended_at=date(2025, 12, 31),
+    )
+    created = []
+    for number in range(contracts):
+        contract = Contract.objects.create(
+            started_at=date(2025, 1, 1), ended_at=date(2025, 12, 31), created_by=manager,
+        )
+        if number % 3 != 1:
+            author = Author.objects.create(
+                author=Person.objects.create(username=f"author{number}"),
+                revenue=Decimal("100000"), reward_percent=Decimal("10"),
+            )
+            author.thead.add(thread)
+            contract.authors.add(author)
+        if number % 3 != 0:
+            presenter = Presenter.objects.create(
+                presenter=Person.objects.create(username=f"presenter{number}"),
+                estimate=Decimal("40"), hourly_rate=Decimal("1500"),
+            )
+            presenter.thead.add(thread)
+            contract.presenters.add(presenter)
+        created.append(contract)
+
+    Accrual.objects.bulk_create(
+        (
+            Accrual(
+                contract=created[index % contracts],
+                created_by=manager,
+                accrual_flags="",
+                real_revenue=Decimal("50000"),
+                hours_worked=Decimal("12"),
+            )
+            for index in range(accruals)
+        ),
+        batch_size=batch_size,
+    )
+    recalculate_accruals(Accrual.objects.all(), batch_size=batch_size)
@@ -0,0 +1,79 @@
+"""Пропускная способность параллельного сохранения начислений из нескольких потоков.
+
+Для сравнения запустите с разными DATABASE_URL (SQLite/PostgreSQL)
+и для SQLite — с флагом --plain-sqlite (без WAL и busy_timeout).
+"""
+import argparse
+import tempfile
+import threading
+from decimal import Decimal
+from pathlib import Path
+
+from common import create_dataset, test_database, timer
+
+from django.db import OperationalError, connection, connections
+
+
+def worker(contract_ids, manager_id, saves: int, errors: list):
+    from contracts.models import Accrual, Contract
+
+    try:
+        contracts = list(
+            Contract.objects.filter(pk__in=contract_ids).prefetch_related(*Contract.TERMS_PREFETCH)
+        )
+        for index in range(saves):
+            accrual = Accrual(
+                contract=contracts[index % len(contracts)],
+                created_by_id=manager_id,
+                accrual_flags="",
+                real_revenue=Decimal("50000"),
+                hours_worked=Decimal("12"),
+            )
+            try:
+                accrual.save()
+            except OperationalError as e:
+                errors.append(str(e))
+    finally:
+        connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--saves", type=int, default=200, help="Сохранений на поток")
+    parser.add_argument("--plain-sqlite", action="store_true", help="SQLite без WAL и busy_timeout")
+    args = parser.parse_args()
+
+    settings_dict = connection.settings_dict
+    if connection.vendor == "sqlite":
+        # Потокам нужна общая файловая база, а не база в памяти
+        settings_dict["TEST"]["NAME"] = str(Path(tempfile.mkdtemp()) / "benchmark.sqlite3")
+        if args.plain_sqlite:
+            settings_dict["OPTIONS"] = {}
+    print(f"База: {connection.vendor}, опции: {settings_dict.get('OPTIONS')}")
+
+    from accounts.models import Manager
+    from contracts.models import Contract
+
+    with test_database():
+        create_dataset(0)
+        contract_ids = list(Contract.objects.values_list("pk", flat=True))
+        manager_id = Manager.objects.values_list("pk", flat=True).first()
+        connection.close()
+
+        errors = []
+        threads = [
+            threading.Thread(target=worker, args=(contract_ids, manager_id, args.saves, errors))
+            for _ in range(args.threads)
+        ]
+        total = args.threads * args.saves
+        with timer(f"Сохранение из {args.threads} потоков", total):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        print(f"Ошибок блокировки: {len(errors)} из {total}")
+
+
+if __name__ == "__main__":
+    main()
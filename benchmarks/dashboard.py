@@ -0,0 +1,81 @@
+"""Финансовая сводка в админке: время ответа с холодным и прогретым кэшем.
+
+Начисления распределяются по --months месяцам: прошлые оплачены и проверены,
+последние два месяца ждут оплаты, текущий — проверки. Сводка выплат
+собирается заново, затем замеряются виджеты и полный ответ страницы, например:
+    python benchmarks/dashboard.py --accruals 500000 --contracts 5000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+from common import create_dataset, test_database, timer
+
+from django.utils import timezone
+
+
+def measure(label: str, func, repeat: int):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1000)
+    print(f"{label}: медиана {statistics.median(durations):.1f} мс, максимум {max(durations):.1f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accruals", type=int, default=200000)
+    parser.add_argument("--contracts", type=int, default=2000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+    from contracts.dashboard import dashboard_data
+    from contracts.models import Accrual
+    from contracts.services import refresh_payout_summary
+
+    setup_test_environment()
+    with test_database():
+        create_dataset(args.accruals, contracts=args.contracts)
+        step = args.accruals // args.months + 1
+        for index in range(args.months):
+            year, month = divmod(timezone.localdate().month - 1 - index, 12)
+            created_at = timezone.make_aware(datetime(timezone.localdate().year + year, month + 1, 15))
+            Accrual.objects.filter(pk__gt=index * step, pk__lte=(index + 1) * step).update(
+                created_at=created_at, payed=index >= 2, accrual_status="pending" if index == 0 else "verified",
+            )
+        with timer("Пересборка сводки выплат", args.accruals):
+            rows = refresh_payout_summary()
+        print(f"  строк сводки: {rows}")
+
+        def cold():
+            cache.clear()
+            dashboard_data()
+
+        measure("Виджеты, холодный кэш", cold, args.repeat)
+        measure("Виджеты, из кэша", dashboard_data, args.repeat)
+
+        client = Client()
+        client.force_login(get_user_model().objects.create_superuser("admin", "admin@example.com", "password"))
+        url = reverse("admin:contracts_accrual_dashboard")
+
+        def page():
+            assert client.get(url).status_code == 200
+
+        def cold_page():
+            cache.clear()
+            page()
+
+        measure("Страница, холодный кэш", cold_page, args.repeat)
+        measure("Страница, из кэша", page, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
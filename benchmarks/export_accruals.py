@@ -0,0 +1,38 @@
+"""Скорость и пиковая память потоковой CSV-выгрузки начислений."""
+import argparse
+import resource
+import tracemalloc
+
+from common import create_dataset, test_database, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    from contracts.exports import iter_csv
+    from contracts.models import Accrual
+
+    with test_database():
+        with timer("Подготовка данных", args.rows):
+            create_dataset(args.rows)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        written = 0
+        with timer("CSV-выгрузка", args.rows):
+            for line in iter_csv(Accrual.objects.all(), chunk_size=args.chunk_size):
+                written += len(line)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        print(f"Объем выгрузки: {written / 1024 / 1024:.1f} МБ")
+        print(f"Пик памяти Python во время выгрузки: {peak / 1024 / 1024:.1f} МБ")
+        print(f"Пиковый RSS процесса: {rss_before / 1024:.0f} МБ -> {rss_after / 1024:.0f} МБ")
+
+
+if __name__ == "__main__":
+    main()
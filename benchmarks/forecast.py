@@ -0,0 +1,31 @@
+"""Прогноз выплат на 12 месяцев по всем контрактам: NumPy против Decimal."""
+import argparse
+from datetime import date
+
+from common import create_dataset, test_database, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contracts", type=int, default=5000)
+    parser.add_argument("--accruals", type=int, default=50000)
+    parser.add_argument("--months", type=int, default=12)
+    args = parser.parse_args()
+
+    from contracts.forecasting import GROUPINGS, forecast, numpy
+
+    with test_database():
+        create_dataset(args.accruals, contracts=args.contracts)
+        modes = [False] if numpy is None else [True, False]
+        if numpy is None:
+            print("NumPy не установлен, замер только на Decimal")
+        for use_numpy in modes:
+            for group_by in GROUPINGS:
+                label = f"{'numpy' if use_numpy else 'decimal'}, по {group_by}"
+                with timer(label):
+                    rows = forecast(group_by, start=date(2025, 1, 1), months=args.months, use_numpy=use_numpy)
+                print(f"  строк прогноза: {len(rows)}")
+
+
+if __name__ == "__main__":
+    main()
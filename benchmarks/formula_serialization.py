@@ -0,0 +1,51 @@
+"""Сериализация raw_data начислений: jsons.dump против dump_raw_data."""
+import argparse
+from decimal import Decimal
+
+from common import timer
+
+
+def make_raw_data(index: int) -> dict:
+    return {
+        "authors": [
+            {"name": f"author{index}", "reward_percent": Decimal("12.5")},
+            {"name": f"coauthor{index}", "reward_percent": Decimal("7.5")},
+        ],
+        "presenters": [{"name": f"presenter{index}", "hourly_rate": Decimal("1500.0")}],
+        "currency": "rub",
+        "total_revenue": Decimal(f"{index}.25"),
+        "hours_worked": Decimal("12.5"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from contracts.encoders import dump_raw_data, load_raw_data
+
+    raw_data = [make_raw_data(index) for index in range(args.rows)]
+    expected = None
+
+    try:
+        import jsons
+    except ImportError:
+        print("jsons не установлен, сравнение со старой реализацией пропущено")
+    else:
+        with timer("jsons.dump", args.rows):
+            expected = [jsons.dump(item) for item in raw_data]
+
+    with timer("dump_raw_data", args.rows):
+        dumped = [dump_raw_data(item) for item in raw_data]
+
+    with timer("load_raw_data", args.rows):
+        loaded = [load_raw_data(item) for item in dumped]
+
+    assert loaded == raw_data, "raw_data не восстанавливается без потерь"
+    if expected is not None:
+        assert dumped == expected, "Результат отличается от jsons.dump"
+
+
+if __name__ == "__main__":
+    main()
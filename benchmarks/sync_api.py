@@ -0,0 +1,110 @@
+"""Синхронный вариант чтения JSON API для сравнения в api_throughput.py.
+
+Те же ресурсы, разбор параметров и сериализация, что в api.views, но
+представления обычные синхронные Django-функции без async_to_sync.
+Запускается под WSGI: uvicorn --interface wsgi --app-dir benchmarks sync_api:application
+"""
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dataverse.settings")
+
+application = get_wsgi_application()
+
+from functools import wraps  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+from django.core.exceptions import ValidationError  # noqa: E402
+from django.http import HttpResponseNotAllowed, JsonResponse  # noqa: E402
+from django.urls import path  # noqa: E402
+
+from api.auth import check_token  # noqa: E402
+from api.views import (  # noqa: E402
+    ApiError,
+    apply_filters,
+    error_response,
+    get_resource,
+    json_response,
+    parse_fields,
+    parse_limit,
+)
+from dataverse.pagination import CURSOR_VAR, decode_cursor, encode_cursor, seek_condition  # noqa: E402
+from dataverse.routers import replica_view  # noqa: E402
+
+
+def token_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not check_token(request):
+            return JsonResponse({"error": "Требуется токен API"}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@replica_view
+def list_objects(request, resource):
+    field_names = parse_fields(request, resource)
+    limit = parse_limit(request)
+    queryset = apply_filters(request, resource, resource.get_queryset(field_names))
+    pk = queryset.model._meta.pk
+    queryset = queryset.order_by(pk.attname)
+    cursor = request.GET.get(CURSOR_VAR)
+    if cursor:
+        values = decode_cursor(cursor, [pk])
+        if values is None:
+            raise ApiError("Некорректный курсор")
+        queryset = queryset.filter(seek_condition([(pk, False)], values))
+
+    rows = list(queryset[:limit + 1])
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params[CURSOR_VAR] = encode_cursor([rows[-1].pk])
+        next_url = f"{request.path}?{params.urlencode()}"
+    return json_response(request, {
+        "results": [resource.serialize(obj, field_names) for obj in rows],
+        "next": next_url,
+    })
+
+
+@replica_view
+def get_object(request, resource, pk):
+    field_names = parse_fields(request, resource)
+    try:
+        obj = resource.get_queryset(field_names).filter(pk=pk).first()
+    except (ValueError, ValidationError):
+        obj = None
+    if obj is None:
+        return error_response(request, "Запись не найдена", status=404)
+    return json_response(request, resource.serialize(obj, field_names))
+
+
+@token_required
+def collection(request, resource):
+    resource = get_resource(resource)
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    try:
+        return list_objects(request, resource)
+    except ApiError as e:
+        return error_response(request, e.message, status=e.status)
+
+
+@token_required
+def detail(request, resource, pk):
+    resource = get_resource(resource)
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    try:
+        return get_object(request, resource, pk)
+    except ApiError as e:
+        return error_response(request, e.message, status=e.status)
+
+
+urlpatterns = [
+    path("api/<slug:resource>/", collection),
+    path("api/<slug:resource>/<str:pk>/", detail),
+]
+settings.ROOT_URLCONF = __name__
@@ -1,65 +1,189 @@
-from django.contrib import admin
-from contracts.models import Contract, Author, Presenter, Accrual
+from datetime import datetime
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Case, CharField, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Concat
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from contracts.dashboard import dashboard_data
+from contracts.exports import iter_csv
+from contracts.forecasting import GROUPINGS, forecast
+from contracts.models import Contract, Author, Presenter, Accrual, ExchangeRate
+from contracts.services import mark_accruals_paid, verify_accruals
+from accounts.models import Manager, Person
+from dataverse.autocomplete import LABEL_ANNOTATION, GroupConcat
+from dataverse.pagination import KeysetPaginationMixin
+from dataverse.routers import replica_alias
+from search.admin import IndexedSearchMixin
+from threads.models import Education_Thread
+
+# Наибольший номер контракта (integer) — больше искать бессмысленно, а PostgreSQL откажет
+CONTRACT_NUMBER_MAX = 2147483647
 
 
 @admin.register(Contract)
-class ContractAdmin(admin.ModelAdmin):
+class ContractAdmin(KeysetPaginationMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
-        "display_contract_number", "get_articul",  "created_at", "get_authors_info",
-        "get_presenters_info", "started_at", "ended_at",
+        "display_contract_number", "kind", "articul_summary",  "created_at", "authors_summary",
+        "presenters_summary", "started_at", "ended_at",
         "created_by", "comment_manager", "responsible_manager",
         )
+    list_filter = ("kind",)
+    keyset_ordering = ("-contract_number",)
     autocomplete_fields = ("authors", "presenters",)
     filter_horizontal = ("authors", "presenters",)
     search_fields = ('contract_number',)
+    indexed_search_relations = (
+        ("authors__author", Person),
+        ("presenters__presenter", Person),
+        ("authors__thead", Education_Thread),
+        ("presenters__thead", Education_Thread),
+    )
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return queryset.select_related("created_by", "responsible_manager")
+
+    def get_extra_search_condition(self, term):
+        # isdecimal, а не isdigit: «²» — цифра, но не число для int()
+        if term.isdecimal() and len(term) <= len(str(CONTRACT_NUMBER_MAX)) and int(term) <= CONTRACT_NUMBER_MAX:
+            return Q(contract_number=int(term))
+        return Q()
+
+    def get_urls(self):
+        urls = [
+            path(
+                "forecast/",
+                self.admin_site.admin_view(self.forecast_view),
+                name="contracts_contract_forecast",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def forecast_view(self, request):
+        """Прогноз выплат по контрактам в сравнении с фактом"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        group_by = request.GET.get("by")
+        if group_by not in GROUPINGS:
+            group_by = "month"
+        try:
+            start = datetime.strptime(request.GET.get("start", ""), "%Y-%m").date()
+        except ValueError:
+            start = timezone.localdate().replace(day=1)
+        try:
+            months = min(max(int(request.GET.get("months", 12)), 1), 36)
+        except ValueError:
+            months = 12
+
+        rows = forecast(group_by=group_by, start=start, months=months)
+        labels = forecast_labels(group_by, {row.key for row in rows})
+        totals = {}
+        for row in rows:
+            projected, actual = totals.get(row.currency, (0, 0))
+            # По преподавателям факт не сравнивается с прогнозом
+            actual = None if row.actual is None else actual + row.actual
+            totals[row.currency] = (projected + row.projected, actual)
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": "Прогноз выплат",
+            "rows": [(labels.get(row.key, row.key), row) for row in rows],
+            "totals": [
+                (currency, projected, actual, None if actual is None else actual - projected)
+                for currency, (projected, actual) in sorted(totals.items())
+            ],
+            "groupings": [
+                ("month", "по месяцам"), ("contract", "по контрактам"),
+                ("person", "по преподавателям"), ("thread", "по потокам"),
+            ],
+            "group_by": group_by,
+            "start": start,
+            "months": months,
+        }
+        return TemplateResponse(request, "admin/contracts/contract/forecast.html", context)
 
     def display_contract_number(self, obj):
         return f"Контракт №{obj.contract_number}"
     display_contract_number.short_description = "Номер контракта"
 
-    def get_authors_info(self, obj):
-        return obj.get_authors_info()
-    get_authors_info.short_description = "Автор (процент)"
 
-    def get_presenters_info(self, obj):
-        return obj.get_presenters_info()
-    get_presenters_info.short_description = "Ведущий (ставка)"
+def forecast_labels(group_by: str, keys) -> dict:
+    """Подписи ключей прогноза: одним запросом на группировку"""
+    keys = [key for key in keys if key is not None]
+    if group_by == "person":
+        return {pk: str(person) for pk, person in Person.objects.in_bulk(keys).items()}
+    if group_by == "thread":
+        return {pk: thread.articul or thread.name for pk, thread in Education_Thread.objects.in_bulk(keys).items()}
+    if group_by == "contract":
+        return {key: f"Контракт №{key}" for key in keys}
+    return {}
+
 
-    def get_articul(self, obj):
-        return obj.get_articul()
-    get_articul.short_description = "Арктикул"
+def with_participant_labels(queryset, person_field: str):
+    """Подпись автора/ведущего как в __str__ (преподаватель и артикулы потоков) в том же запросе"""
+    model = queryset.model
+    owner = model._meta.model_name
+    articuls = (
+        model.thead.through.objects.filter(**{owner: OuterRef("pk")})
+        .values(owner)
+        .annotate(articuls=GroupConcat("education_thread__articul"))
+        .values("articuls")
+    )
+    username = F(f"{person_field}__username")
+    return queryset.annotate(articuls=Subquery(articuls)).annotate(**{LABEL_ANNOTATION: Case(
+        When(articuls__isnull=True, then=username),
+        default=Concat(username, Value(" (Артикул: "), "articuls", Value(")")),
+        output_field=CharField(),
+    )})
 
 
 @admin.register(Author)
-class AuthorAdmin(admin.ModelAdmin):
+class AuthorAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         "author", "get_thead", "reward_type",
         "revenue", "reward_percent", "currency",
     )
-    search_fields = ('author__name',)
+    search_fields = ('author__username', 'thead__articul')
+    indexed_search_relations = (("author", Person), ("thead", Education_Thread))
     autocomplete_fields = ["author", "thead",]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("author").prefetch_related("thead")
+
+    def annotate_autocomplete_labels(self, queryset):
+        return with_participant_labels(queryset, "author")
+
     def get_thead(self, obj):
         return ", ".join([str(art.articul) for art in obj.thead.all()])
     get_thead.short_description = "Артикул"
 
 
 @admin.register(Presenter)
-class PresenterAdmin(admin.ModelAdmin):
+class PresenterAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         "presenter", "get_thead", "estimate",
         "hourly_rate", "currency",
     )
-    search_fields = ('presenter__name',)
+    search_fields = ('presenter__username', 'thead__articul')
+    indexed_search_relations = (("presenter", Person), ("thead", Education_Thread))
     autocomplete_fields = ["presenter", "thead",]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("presenter").prefetch_related("thead")
+
+    def annotate_autocomplete_labels(self, queryset):
+        return with_participant_labels(queryset, "presenter")
+
     def get_thead(self, obj):
         return ", ".join([str(art.articul) for art in obj.thead.all()])
     get_thead.short_description = "Артикул"
 
 
 @admin.register(Accrual)
-class AccrualAdmin(admin.ModelAdmin):
+class AccrualAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = (
         "display_accrual_number",
         "created_at",
@@ -71,6 +195,9 @@ class AccrualAdmin(admin.ModelAdmin):
         "accrual_status",
         "comment_manager",
     )
+    list_filter = ("payed", "accrual_status", "accrual_flags", "contract__kind", "created_at")
+    keyset_ordering = ("-created_at", "-id")
+    actions = ("export_csv", "mark_verified", "mark_paid")
     autocomplete_fields = ("contract",)
     readonly_fields = (
         "calculation_formula",
@@ -84,4 +211,75 @@ class AccrualAdmin(admin.ModelAdmin):
 
     def formatted_formula_display(self, obj):
         return obj.formatted_formula
-    formatted_formula_display.short_description = "Расчет"
\ No newline at end of file
+    formatted_formula_display.short_description = "Расчет"
+
+    def get_urls(self):
+        urls = [
+            path(
+                "dashboard/",
+                self.admin_site.admin_view(self.dashboard_view),
+                name="contracts_accrual_dashboard",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def dashboard_view(self, request):
+        """Финансовая сводка: неоплаченные суммы, проверка, выплаты по месяцам"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": "Финансовая сводка",
+            **dashboard_data(),
+        }
+        return TemplateResponse(request, "admin/contracts/accrual/dashboard.html", context)
+
+    def save_model(self, request, obj, form, change):
+        """Изменение только статуса или оплаты сохраняется без пересчета формулы"""
+        if change and form.changed_data and set(form.changed_data) <= set(Accrual.STATUS_FIELDS):
+            obj.save(update_fields=form.changed_data)
+        else:
+            super().save_model(request, obj, form, change)
+
+    @admin.action(description="Отметить выбранные начисления проверенными", permissions=["change"])
+    def mark_verified(self, request, queryset):
+        updated = verify_accruals(queryset, self.get_updated_by(request), request.user)
+        self.message_user(request, f"Отмечено проверенными: {updated}")
+
+    @admin.action(description="Отметить выбранные начисления оплаченными", permissions=["change"])
+    def mark_paid(self, request, queryset):
+        updated = mark_accruals_paid(queryset, self.get_updated_by(request), request.user)
+        self.message_user(request, f"Отмечено оплаченными: {updated}")
+
+    def get_updated_by(self, request):
+        """Менеджер пользователя админки; без привязки изменивший не меняется"""
+        manager = manager_for_user(request.user)
+        if manager is None:
+            self.message_user(
+                request,
+                f"Пользователь {request.user.get_username()} не привязан к менеджеру: "
+                "поле «изменивший» у начислений не обновлено",
+                messages.WARNING,
+            )
+        return manager
+
+    @admin.action(description="Выгрузить выбранные начисления в CSV")
+    def export_csv(self, request, queryset):
+        filename = f"accruals_{timezone.localdate():%Y-%m-%d}.csv"
+        rows = iter_csv(queryset.using(replica_alias()))
+        response = StreamingHttpResponse(rows, content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+def manager_for_user(user):
+    """Менеджер, привязанный к пользователю админки, или None"""
+    return Manager.objects.filter(user=user).first()
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ("date", "currency", "rate")
+    list_filter = ("currency",)
+    date_hierarchy = "date"
@@ -5,3 +5,7 @@ class ContractsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contracts'
     verbose_name = "Контракты"
+
+
+    def ready(self):
+        from contracts import signals  # noqa: F401
@@ -0,0 +1,215 @@
+"""Расчет начислений без обращения к базе данных.
+
+Условия контракта и фактические показатели передаются неизменяемыми
+значениями, поэтому расчет можно выполнять пачками (пересчет, загрузка,
+прогнозы) и проверять без ORM.
+"""
+import logging
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+# Валюта итога для контрактов с участниками в разных валютах; курсы — к ней
+BASE_CURRENCY = "rub"
+
+# Курс валюты к BASE_CURRENCY на дату начисления (None — курса нет)
+RateLookup = Callable[[str], Optional[Decimal]]
+
+
+@dataclass(frozen=True, slots=True)
+class AuthorTerms:
+    """Условия авторского контракта: процент от оборота/прибыли"""
+    name: str
+    reward_percent: Decimal
+    currency: str = "rub"
+
+
+@dataclass(frozen=True, slots=True)
+class PresenterTerms:
+    """Условия контракта ведущего: почасовая ставка"""
+    name: str
+    hourly_rate: Decimal
+    currency: str = "rub"
+
+
+@dataclass(frozen=True, slots=True)
+class Actuals:
+    """Фактические показатели начисления"""
+    revenue: Optional[Decimal] = None
+    hours: Optional[Decimal] = None
+
+
+def contract_kind(authors: Sequence[AuthorTerms], presenters: Sequence[PresenterTerms]) -> Optional[str]:
+    """Тип контракта по составу участников"""
+    if authors and presenters:
+        return "combined"
+    if authors:
+        return "author"
+    if presenters:
+        return "presenter"
+    return None
+
+
+def build_raw_data(
+    kind: Optional[str],
+    authors: Sequence[AuthorTerms],
+    presenters: Sequence[PresenterTerms],
+    actuals: Actuals,
+    rate: Optional[RateLookup] = None,
+) -> dict[str, Any]:
+    """Исходные данные расчета в формате, который сохраняется в calculation_formula.
+
+    Каждая строка автора/ведущего хранит свою валюту. Если валюты строк
+    различаются, итог считается в BASE_CURRENCY, а курсы на дату начисления
+    сохраняются в raw_data["rates"], чтобы расчет можно было повторить.
+    """
+    raw_data = {}
+    if kind == "author":
+        if authors:
+            raw_data = {
+                "authors": [author_data(author) for author in authors],
+                "total_revenue": actuals.revenue if actuals.revenue else None,
+                "currency": authors[0].currency,
+            }
+    elif kind == "presenter":
+        if presenters:
+            raw_data = {
+                "presenters": [presenter_data(presenter) for presenter in presenters],
+                "hours_worked": actuals.hours if actuals.hours else None,
+                "currency": presenters[0].currency,
+            }
+    elif kind == "combined":
+        raw_data = {
+            "authors": [],
+            "presenters": [],
+            "currency": "rub",
+        }
+        if authors:
+            raw_data["authors"] = [author_data(author) for author in authors]
+            raw_data["total_revenue"] = actuals.revenue if actuals.revenue else 0
+        if presenters:
+            raw_data["presenters"] = [presenter_data(presenter) for presenter in presenters]
+            raw_data["hours_worked"] = actuals.hours if actuals.hours else 0
+
+    currencies = {
+        line["currency"]
+        for line in (*raw_data.get("authors", ()), *raw_data.get("presenters", ()))
+    }
+    if len(currencies) == 1:
+        raw_data["currency"] = currencies.pop()
+    elif len(currencies) > 1:
+        raw_data["currency"] = BASE_CURRENCY
+        raw_data["rates"] = {
+            currency: rate(currency) if rate else None
+            for currency in sorted(currencies - {BASE_CURRENCY})
+        }
+    return raw_data
+
+
+def author_data(author: AuthorTerms) -> dict[str, Any]:
+    return {"name": author.name, "reward_percent": author.reward_percent, "currency": author.currency}
+
+
+def presenter_data(presenter: PresenterTerms) -> dict[str, Any]:
+    return {"name": presenter.name, "hourly_rate": presenter.hourly_rate, "currency": presenter.currency}
+
+
+def line_rate(raw_data: dict, line: dict) -> Optional[Decimal]:
+    """Курс пересчета строки в валюту итога; None — строка уже в ней"""
+    currency = line.get("currency", raw_data.get("currency"))
+    if currency == raw_data.get("currency"):
+        return None
+    rate = (raw_data.get("rates") or {}).get(currency)
+    if rate is None:
+        raise KeyError(f"нет курса {currency} на дату начисления")
+    return Decimal(str(rate))
+
+
+def line_total(raw_data: dict, line: dict, amount: Decimal) -> Decimal:
+    rate = line_rate(raw_data, line)
+    return amount if rate is None else amount * rate
+
+
+def actual_value(raw_data: dict, key: str) -> Optional[Decimal]:
+    """Фактический показатель из raw_data; None — показатель не указан"""
+    value = raw_data.get(key)
+    return None if value is None else Decimal(str(value))
+
+
+def calculate(raw_data: Any) -> Optional[Decimal]:
+    """Вычисляет сумму начисления на основе данных по контрактам."""
+    if not raw_data:
+        return None
+    total = Decimal(0)
+    try:
+        revenue = actual_value(raw_data, "total_revenue")
+        hours = actual_value(raw_data, "hours_worked")
+        # Без выручки для авторов или часов для ведущих суммы нет — это не ошибка
+        if (raw_data.get("authors") and revenue is None) or (raw_data.get("presenters") and hours is None):
+            return None
+
+        if "authors" in raw_data and revenue is not None and revenue > 0:
+            for author in raw_data["authors"]:
+                percent = Decimal(str(author["reward_percent"]))
+                total += line_total(raw_data, author, (percent * revenue) / 100)
+
+        if "presenters" in raw_data and hours is not None and hours > 0:
+            for presenter in raw_data["presenters"]:
+                rate = Decimal(str(presenter["hourly_rate"]))
+                total += line_total(raw_data, presenter, hours * rate)
+
+        return total.quantize(CENTS)
+    except (KeyError, TypeError, InvalidOperation) as e:
+        logger.error(f"Ошибка расчета: {e}")
+        return None
+
+
+def formula_text(result: Decimal, raw_data: dict) -> str:
+    """Генерация формулы по авторскому/ведущему контракта"""
+    formula_lines = []
+
+    if "authors" in raw_data and raw_data.get("total_revenue", 0) > 0:
+        formula_lines.append("По авторскому: ")
+        for author in raw_data["authors"]:
+            amount = (Decimal(author['reward_percent']) * Decimal(raw_data['total_revenue'])) / 100
+            line = (
+                f"\n- {author['name']}: {author['reward_percent']}% * "
+                f"{raw_data['total_revenue']} {author.get('currency', raw_data['currency'])} = "
+                f"{amount:.2f}{conversion_text(raw_data, author, amount)}"
+            )
+            formula_lines.append(line)
+
+    if "presenters" in raw_data and raw_data.get("hours_worked", 0) > 0:
+        formula_lines.append("\nПо ведущему: " if formula_lines else "По ведущему: ")
+        for presenter in raw_data["presenters"]:
+            amount = Decimal(raw_data['hours_worked']) * Decimal(presenter['hourly_rate'])
+            line = (
+                f"\n- {presenter['name']}: {raw_data['hours_worked']} ч. × "
+                f"{presenter['hourly_rate']} {presenter.get('currency', raw_data['currency'])}/ч. = "
+                f"{amount:.2f}{conversion_text(raw_data, presenter, amount)}"
+            )
+            formula_lines.append(line)
+
+    formula_lines.append(f"\nИтого: {result} {raw_data.get('currency', 'RUB')}")
+    return "".join(formula_lines)
+
+
+def conversion_text(raw_data: dict, line: dict, amount: Decimal) -> str:
+    rate = line_rate(raw_data, line)
+    if rate is None:
+        return ""
+    return f" (× {rate} = {amount * rate:.2f} {raw_data['currency']})"
+
+
+def evaluate(
+    authors: Sequence[AuthorTerms],
+    presenters: Sequence[PresenterTerms],
+    actuals: Actuals,
+    rate: Optional[RateLookup] = None,
+) -> tuple[dict[str, Any], Optional[Decimal]]:
+    """Исходные данные и сумма начисления по условиям контракта"""
+    raw_data = build_raw_data(contract_kind(authors, presenters), authors, presenters, actuals, rate)
+    return raw_data, calculate(raw_data)
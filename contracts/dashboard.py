@@ -0,0 +1,139 @@
+"""Финансовая сводка для админки.
+
+Каждый виджет — один агрегирующий запрос: суммы по начислениям читаются
+из сводки выплат (PayoutSummary), а не из таблицы начислений. Результаты
+кэшируются в общем кэше Django и читаются одним get_many. Ключи
+версионируются: сохранение начислений и контрактов и обновление сводки
+сбрасывают кэш всех процессов.
+"""
+from datetime import date
+from itertools import groupby, islice
+from typing import Callable
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, QuerySet, Sum
+from django.utils import timezone
+from contracts.fx import initial_version
+from contracts.models import PayoutSummary
+from dataverse.routers import replica_alias
+from threads.models import Education_Thread
+
+VERSION_KEY = "dashboard:version"
+TOP_PERSONS = 10
+MONTHS = 12
+
+
+def dashboard_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_dashboard() -> None:
+    """Сброс закэшированных виджетов (после изменения начислений или контрактов)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, initial_version(), timeout=None)
+
+
+def contract_rows() -> QuerySet:
+    """Итоговые строки сводки по контрактам, с реплики, если она настроена"""
+    return PayoutSummary.objects.using(replica_alias()).filter(person__isnull=True)
+
+
+def unpaid_by_currency() -> list[dict]:
+    """Неоплаченные начисления по валютам"""
+    return list(
+        contract_rows()
+        .filter(payed=False)
+        .values("currency")
+        .annotate(total=Sum("total"), count=Sum("count"))
+        .order_by("currency")
+    )
+
+
+def pending_verification() -> dict:
+    """Начисления, ожидающие проверки: всего и из них неоплаченные"""
+    return contract_rows().filter(accrual_status="pending").aggregate(
+        accruals=Sum("count", default=0),
+        unpaid=Sum("count", filter=Q(payed=False), default=0),
+    )
+
+
+def first_month() -> date:
+    """Начало окна виджетов по месяцам: MONTHS месяцев, включая текущий"""
+    today = timezone.localdate()
+    year, month = divmod(today.year * 12 + today.month - MONTHS, 12)
+    return date(year, month + 1, 1)
+
+
+def payouts_by_month() -> list[dict]:
+    """Начислено и оплачено за последние MONTHS месяцев"""
+    return list(
+        contract_rows()
+        .filter(month__gte=first_month())
+        .values("month", "currency")
+        .annotate(paid=Sum("total", filter=Q(payed=True), default=0), total=Sum("total"))
+        .order_by("-month", "currency")
+    )
+
+
+def top_persons() -> list[dict]:
+    """Преподаватели с наибольшей суммой начислений за последние MONTHS месяцев.
+
+    Суммы в разных валютах не сравниваются: рейтинг строится внутри каждой
+    валюты, по TOP_PERSONS преподавателей на валюту.
+    """
+    rows = (
+        PayoutSummary.objects.using(replica_alias())
+        .filter(month__gte=first_month(), person__isnull=False)
+        .values("person", "person__username", "currency")
+        .annotate(total=Sum("total"), count=Sum("count"))
+        .order_by("currency", "-total", "person")
+    )
+    return [
+        row
+        for _, currency_rows in groupby(rows.iterator(), key=lambda row: row["currency"])
+        for row in islice(currency_rows, TOP_PERSONS)
+    ]
+
+
+def active_threads() -> list[dict]:
+    """Идущие сейчас потоки по типам курсов"""
+    return list(
+        Education_Thread.objects.using(replica_alias())
+        .active()
+        .values("type_course")
+        .annotate(count=Count("pk"))
+        .order_by("type_course")
+    )
+
+
+WIDGETS: dict[str, Callable[[], object]] = {
+    "unpaid": unpaid_by_currency,
+    "pending": pending_verification,
+    "months": payouts_by_month,
+    "persons": top_persons,
+    "threads": active_threads,
+}
+
+
+def dashboard_data() -> dict:
+    """Данные всех виджетов: из кэша или по одному запросу на виджет"""
+    # Дата в ключе: потоки и окно месяцев зависят от текущего дня
+    today = timezone.localdate().isoformat()
+    version = dashboard_version()
+    keys = {name: f"dashboard:{version}:{today}:{name}" for name in WIDGETS}
+    cached = cache.get_many(keys.values())
+    data, missing = {}, {}
+    for name, key in keys.items():
+        if key in cached:
+            data[name] = cached[key]
+        else:
+            data[name] = missing[key] = WIDGETS[name]()
+    if missing:
+        cache.set_many(missing, settings.DASHBOARD_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,49 @@
+from decimal import Decimal
+from typing import Any
+
+# Денежные и количественные поля raw_data, которые хранятся строками
+DECIMAL_KEYS = frozenset({"total_revenue", "hours_worked", "reward_percent", "hourly_rate"})
+# Словари {валюта: Decimal} в raw_data
+DECIMAL_MAPS = frozenset({"rates"})
+
+
+def encode_value(value: Any) -> Any:
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def dump_raw_data(raw_data: dict) -> dict:
+    """Сериализация raw_data: Decimal -> str, остальное без изменений.
+
+    Структура известна заранее (списки авторов/ведущих из плоских словарей,
+    словарь курсов), поэтому обход без рефлексии, порядок ключей сохраняется.
+    """
+    return {
+        key: (
+            [{name: encode_value(item) for name, item in participant.items()} for participant in value]
+            if isinstance(value, list)
+            else {name: encode_value(item) for name, item in value.items()}
+            if isinstance(value, dict)
+            else encode_value(value)
+        )
+        for key, value in raw_data.items()
+    }
+
+
+def decode_value(key: str, value: Any) -> Any:
+    if key in DECIMAL_KEYS and value is not None:
+        return Decimal(str(value))
+    if key in DECIMAL_MAPS and isinstance(value, dict):
+        return {name: None if item is None else Decimal(str(item)) for name, item in value.items()}
+    return value
+
+
+def load_raw_data(data: dict) -> dict:
+    """Обратное преобразование сохраненного raw_data: строки -> Decimal"""
+    return {
+        key: (
+            [{name: decode_value(name, item) for name, item in participant.items()} for participant in value]
+            if isinstance(value, list)
+            else decode_value(key, value)
+        )
+        for key, value in data.items()
+    }
@@ -0,0 +1,110 @@
+import csv
+from datetime import date
+from typing import Iterable, Iterator, Optional
+from django.db.models import QuerySet
+
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = (
+    ("id", "Начисление"),
+    ("created_at", "Дата создания"),
+    ("contract__contract_number", "Контракт"),
+    ("contract__articul_summary", "Артикулы"),
+    ("contract__authors_summary", "Авторы"),
+    ("contract__presenters_summary", "Ведущие"),
+    ("payed", "Оплата"),
+    ("accrual_status", "Статус"),
+    ("accrual_flags", "Флаг"),
+    ("created_by__manager", "Кто завел"),
+    ("amount", "Сумма"),
+    ("currency", "Валюта"),
+    ("calculation_formula", "Формула расчета"),
+)
+EXPORT_HEADER = [title for _, title in EXPORT_COLUMNS]
+
+# Выгрузка сводки выплат: строка без преподавателя — итог по контракту
+SUMMARY_COLUMNS = (
+    ("month", "Месяц"),
+    ("contract_id", "Контракт"),
+    ("person__username", "Преподаватель"),
+    ("accrual_status", "Статус"),
+    ("payed", "Оплата"),
+    ("count", "Начислений"),
+    ("total", "Сумма"),
+    ("currency", "Валюта"),
+)
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def filter_accruals(
+    accruals: QuerySet,
+    payed: Optional[bool] = None,
+    statuses: Iterable[str] = (),
+    flags: Iterable[str] = (),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> QuerySet:
+    """Отбор начислений для выгрузки"""
+    if payed is not None:
+        accruals = accruals.filter(payed=payed)
+    if statuses:
+        accruals = accruals.filter(accrual_status__in=statuses)
+    if flags:
+        accruals = accruals.filter(accrual_flags__in=flags)
+    if date_from:
+        accruals = accruals.filter(created_at__date__gte=date_from)
+    if date_to:
+        accruals = accruals.filter(created_at__date__lte=date_to)
+    return accruals
+
+
+def iter_export_rows(accruals: QuerySet, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list]:
+    """Строки выгрузки; начисления читаются из базы порциями"""
+    rows = accruals.order_by("pk").values_list(*(field for field, _ in EXPORT_COLUMNS))
+    for *values, calculation_formula in rows.iterator(chunk_size=chunk_size):
+        calculation_formula = calculation_formula or {}
+        formula = calculation_formula.get("formula", calculation_formula.get("error", ""))
+        yield [*values, formula]
+
+
+def iter_csv(accruals: QuerySet, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Потоковая CSV-выгрузка начислений с постоянным расходом памяти"""
+    writer = csv.writer(Echo())
+    # BOM для корректного открытия кириллицы в Excel
+    yield "\ufeff" + writer.writerow(EXPORT_HEADER)
+    for row in iter_export_rows(accruals, chunk_size=chunk_size):
+        yield writer.writerow(row)
+
+
+def filter_summary(
+    summary: QuerySet,
+    payed: Optional[bool] = None,
+    statuses: Iterable[str] = (),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> QuerySet:
+    """Отбор строк сводки выплат; даты округляются до месяцев"""
+    if payed is not None:
+        summary = summary.filter(payed=payed)
+    if statuses:
+        summary = summary.filter(accrual_status__in=statuses)
+    if date_from:
+        summary = summary.filter(month__gte=date_from.replace(day=1))
+    if date_to:
+        summary = summary.filter(month__lte=date_to)
+    return summary
+
+
+def iter_summary_csv(summary: QuerySet) -> Iterator[str]:
+    """CSV-выгрузка сводки выплат по месяцам, контрактам и преподавателям"""
+    writer = csv.writer(Echo())
+    yield "\ufeff" + writer.writerow([title for _, title in SUMMARY_COLUMNS])
+    rows = summary.order_by("month", "contract_id", "person_id", "accrual_status", "payed", "currency")
+    for row in rows.values_list(*(field for field, _ in SUMMARY_COLUMNS)).iterator():
+        yield writer.writerow(row)
@@ -0,0 +1,244 @@
+"""Прогноз выплат по условиям контрактов и сравнение с фактическими начислениями.
+
+Ожидаемое обязательство строки контракта:
+    автор   — Author.revenue × Author.reward_percent / 100,
+    ведущий — Presenter.estimate × Presenter.hourly_rate,
+в валюте строки. Сумма равномерно распределяется по дням окна контракта
+(started_at..ended_at) и складывается по месяцам горизонта прогноза.
+
+Условия загружаются несколькими агрегирующими запросами, распределение
+по месяцам считается в памяти: через NumPy, если он установлен, иначе на
+Decimal. Факт берется из сумм начислений по месяцам создания: по контракту,
+по потоку (каждое начисление один раз на каждый поток контракта) и по месяцу.
+Начисление не привязано к участнику контракта, поэтому при группировке по
+преподавателям факт не сравнивается с прогнозом (actual = None).
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Optional
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, IntegerField, QuerySet, Sum, Value, When
+from django.utils import timezone
+from contracts.calculation import CENTS
+from contracts.models import Accrual, Author, Contract, Presenter
+from contracts.reports import contract_threads
+from dataverse.routers import replica_alias
+
+try:
+    import numpy
+except ImportError:  # NumPy необязателен
+    numpy = None
+
+GROUPINGS = ("contract", "person", "thread", "month")
+# Группировки, для которых факт сопоставим с прогнозом
+ACTUAL_GROUPINGS = ("contract", "thread", "month")
+AMOUNT = DecimalField(max_digits=30, decimal_places=6)
+
+
+@dataclass(frozen=True, slots=True)
+class LiabilityLine:
+    """Ожидаемая выплата одному участнику по одному контракту"""
+    contract: int
+    participant: int
+    person: int
+    role: str
+    currency: str
+    amount: Decimal
+    started_at: date
+    ended_at: date
+
+
+@dataclass(slots=True)
+class ForecastRow:
+    """Прогноз и факт по ключу группировки, месяцу и валюте"""
+    key: Any
+    month: date
+    currency: str
+    projected: Decimal
+    actual: Optional[Decimal]
+
+    @property
+    def variance(self) -> Optional[Decimal]:
+        if self.actual is None:
+            return None
+        return self.actual - self.projected
+
+
+def month_starts(start: date, months: int) -> list[date]:
+    """Первые числа месяцев горизонта, плюс первое число следующего за ним"""
+    year, month = start.year, start.month
+    result = []
+    for _ in range(months + 1):
+        result.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return result
+
+
+def liability_lines(first: date, last: date, contracts: Optional[QuerySet] = None) -> list[LiabilityLine]:
+    """Строки обязательств контрактов, окно которых пересекается с [first, last]"""
+    using = replica_alias()
+    if contracts is None:
+        contracts = Contract.objects.using(using)
+    contracts = contracts.filter(started_at__lte=last, ended_at__gte=first)
+    roles = (
+        ("author", Contract.authors.through, "author",
+         F("author__revenue") * F("author__reward_percent") / 100),
+        ("presenter", Contract.presenters.through, "presenter",
+         F("presenter__estimate") * F("presenter__hourly_rate")),
+    )
+    lines = []
+    for role, through, field, amount in roles:
+        rows = (
+            through.objects.using(using)
+            .filter(contract__in=contracts.values("pk"))
+            .annotate(amount=ExpressionWrapper(amount, output_field=AMOUNT))
+            .values_list(
+                "contract_id", f"{field}_id", f"{field}__{field}_id", f"{field}__currency", "amount",
+                "contract__started_at", "contract__ended_at",
+            )
+        )
+        lines.extend(
+            LiabilityLine(contract, participant, person, role, currency, Decimal(amount or 0), started_at, ended_at)
+            for contract, participant, person, currency, amount, started_at, ended_at in rows
+        )
+    return lines
+
+
+def participant_threads(lines: list[LiabilityLine]) -> dict[tuple[str, int], list[int]]:
+    """Потоки авторов и ведущих из строк: один запрос на роль"""
+    using = replica_alias()
+    threads = defaultdict(list)
+    for role, model in (("author", Author), ("presenter", Presenter)):
+        ids = {line.participant for line in lines if line.role == role}
+        if not ids:
+            continue
+        through = model.thead.through
+        rows = through.objects.using(using).filter(**{f"{role}_id__in": ids}).values_list(
+            f"{role}_id", "education_thread_id"
+        )
+        for participant, thread in rows:
+            threads[(role, participant)].append(thread)
+    return threads
+
+
+def grouped_lines(lines: list[LiabilityLine], group_by: str) -> list[tuple[Any, LiabilityLine]]:
+    if group_by == "contract":
+        return [(line.contract, line) for line in lines]
+    if group_by == "person":
+        return [(line.person, line) for line in lines]
+    if group_by == "month":
+        return [(None, line) for line in lines]
+    threads = participant_threads(lines)
+    return [
+        (thread, line)
+        for line in lines
+        for thread in threads.get((line.role, line.participant), ())
+    ]
+
+
+def spread_python(pairs, codes: list[int], groups: int, bounds: list[date]) -> list[list[Decimal]]:
+    totals = [[Decimal(0)] * (len(bounds) - 1) for _ in range(groups)]
+    for code, (_, line) in zip(codes, pairs):
+        ended_at = max(line.started_at, line.ended_at)
+        window = (ended_at - line.started_at).days + 1
+        for index, (month_first, next_first) in enumerate(zip(bounds, bounds[1:])):
+            days = (min(ended_at, next_first - timedelta(days=1)) - max(line.started_at, month_first)).days + 1
+            if days > 0:
+                totals[code][index] += line.amount * days / window
+    return totals
+
+
+def spread_numpy(pairs, codes: list[int], groups: int, bounds: list[date]) -> list[list[Decimal]]:
+    """Векторизованное распределение: матрица строки × месяцы дней пересечения"""
+    starts = numpy.array([line.started_at.toordinal() for _, line in pairs])
+    ends = numpy.maximum(numpy.array([line.ended_at.toordinal() for _, line in pairs]), starts)
+    amounts = numpy.array([float(line.amount) for _, line in pairs])
+    firsts = numpy.array([bound.toordinal() for bound in bounds[:-1]])
+    lasts = numpy.array([bound.toordinal() - 1 for bound in bounds[1:]])
+    days = numpy.minimum(ends[:, None], lasts[None, :]) - numpy.maximum(starts[:, None], firsts[None, :]) + 1
+    shares = numpy.clip(days, 0, None) * (amounts / (ends - starts + 1))[:, None]
+    totals = numpy.zeros((groups, len(firsts)))
+    numpy.add.at(totals, numpy.array(codes), shares)
+    return [[Decimal(repr(value)) for value in row] for row in totals.tolist()]
+
+
+def projected_totals(
+    group_by: str,
+    bounds: list[date],
+    contracts: Optional[QuerySet] = None,
+    use_numpy: Optional[bool] = None,
+) -> dict[tuple[Any, date, str], Decimal]:
+    """Прогноз по (ключ, месяц, валюта)"""
+    lines = liability_lines(bounds[0], bounds[-1] - timedelta(days=1), contracts)
+    pairs = grouped_lines(lines, group_by)
+    if not pairs:
+        return {}
+    groups: dict[tuple[Any, str], int] = {}
+    codes = [groups.setdefault((key, line.currency), len(groups)) for key, line in pairs]
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    spread = spread_numpy if use_numpy else spread_python
+    totals = spread(pairs, codes, len(groups), bounds)
+    return {
+        (key, month, currency): totals[code][index].quantize(CENTS)
+        for (key, currency), code in groups.items()
+        for index, month in enumerate(bounds[:-1])
+        if totals[code][index]
+    }
+
+
+def actual_totals(
+    group_by: str,
+    bounds: list[date],
+    accruals: Optional[QuerySet] = None,
+) -> dict[tuple[Any, date, str], Decimal]:
+    """Фактические начисления по (ключ, месяц создания, валюта)"""
+    if accruals is None:
+        accruals = Accrual.objects.using(replica_alias())
+    # Границы месяцев в текущей зоне: фильтр и разбиение по месяцам — простые
+    # сравнения created_at, без функций над датой в каждой строке
+    edges = [timezone.make_aware(datetime.combine(bound, time.min)) for bound in bounds]
+    month = Case(
+        *(When(created_at__lt=edge, then=Value(index)) for index, edge in enumerate(edges[1:])),
+        output_field=IntegerField(),
+    )
+    accruals = accruals.filter(
+        amount__isnull=False, created_at__gte=edges[0], created_at__lt=edges[-1]
+    ).annotate(month=month)
+    # Суммы по контрактам считаются в базе, по ключу группировки — в памяти:
+    # соединение с авторами и ведущими размножило бы строки начислений
+    threads = contract_threads(accruals) if group_by == "thread" else {}
+    totals = defaultdict(Decimal)
+    rows = accruals.values("contract", "month", "currency").annotate(total=Sum("amount")).order_by()
+    for row in rows:
+        if group_by == "contract":
+            keys = (row["contract"],)
+        elif group_by == "thread":
+            keys = threads.get(row["contract"], ())
+        else:
+            keys = (None,)
+        for key in keys:
+            totals[(key, bounds[row["month"]], row["currency"])] += row["total"]
+    return totals
+
+
+def forecast(
+    group_by: str = "contract",
+    start: Optional[date] = None,
+    months: int = 12,
+    contracts: Optional[QuerySet] = None,
+    accruals: Optional[QuerySet] = None,
+    use_numpy: Optional[bool] = None,
+) -> list[ForecastRow]:
+    """Прогноз выплат на months месяцев начиная с месяца start и факт за те же месяцы"""
+    if group_by not in GROUPINGS:
+        raise ValueError(f"Неизвестная группировка: {group_by}")
+    bounds = month_starts(start or timezone.localdate(), months)
+    projected = projected_totals(group_by, bounds, contracts, use_numpy)
+    zero = Decimal("0.00")
+    if group_by not in ACTUAL_GROUPINGS:
+        return [ForecastRow(*item, amount, None) for item, amount in sorted(projected.items())]
+    actual = actual_totals(group_by, bounds, accruals)
+    items = sorted(projected.keys() | actual.keys(), key=lambda item: (item[0] is None, item))
+    return [ForecastRow(*item, projected.get(item, zero), actual.get(item, zero)) for item in items]
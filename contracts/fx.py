@@ -0,0 +1,85 @@
+"""Курсы валют для пересчета начислений.
+
+Курс берется на дату начисления (последний известный на эту дату).
+Поиск кэшируется в памяти процесса (LRU) и в общем кэше Django, поэтому
+пересчет и отчеты по миллионам начислений делают один запрос к базе
+на пару (валюта, дата), а не на строку. Ключи версионируются: загрузка
+или изменение курсов сбрасывает кэш всех процессов.
+"""
+import time
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
+from contracts.calculation import BASE_CURRENCY
+
+VERSION_KEY = "fx:version"
+# В общем кэше отсутствие курса хранится отдельным значением, а не None
+NO_RATE = "-"
+
+
+def initial_version() -> int:
+    # После очистки общего кэша версия не должна совпасть с той, что
+    # осталась в LRU процессов, поэтому начинается со времени, а не с 1
+    return time.time_ns()
+
+
+def rates_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_rates() -> None:
+    """Сброс закэшированных курсов (после загрузки или изменения таблицы курсов)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, initial_version(), timeout=None)
+
+
+@lru_cache(maxsize=4096)
+def cached_rate(version: int, currency: str, on_date: date) -> Optional[Decimal]:
+    key = f"fx:{version}:{currency}:{on_date.isoformat()}"
+    value = cache.get(key)
+    if value is None:
+        value = load_rate(currency, on_date)
+        cache.set(key, NO_RATE if value is None else str(value), settings.FX_CACHE_TIMEOUT)
+        return value
+    return None if value == NO_RATE else Decimal(value)
+
+
+def load_rate(currency: str, on_date: date) -> Optional[Decimal]:
+    from contracts.models import ExchangeRate
+
+    return (
+        ExchangeRate.objects.filter(currency=currency, date__lte=on_date)
+        .order_by("-date")
+        .values_list("rate", flat=True)
+        .first()
+    )
+
+
+class RateTable:
+    """Курсы к BASE_CURRENCY для пачки расчетов: версия кэша читается один раз"""
+
+    def __init__(self):
+        self.version = rates_version()
+
+    def rate(self, currency: str, on_date: date) -> Optional[Decimal]:
+        if currency == BASE_CURRENCY:
+            return Decimal(1)
+        return cached_rate(self.version, currency, on_date)
+
+    def convert(self, amount: Decimal, currency: str, on_date: date, target: str = BASE_CURRENCY) -> Optional[Decimal]:
+        """Пересчет суммы в target через курсы к BASE_CURRENCY; None — курса нет"""
+        if currency == target:
+            return amount
+        rate, target_rate = self.rate(currency, on_date), self.rate(target, on_date)
+        if rate is None or target_rate is None:
+            return None
+        return amount * rate / target_rate
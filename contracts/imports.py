@@ -0,0 +1,221 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator, Optional
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from accounts.models import Manager
+from contracts.fx import RateTable
+from contracts.models import Accrual
+from contracts.services import DEFAULT_BATCH_SIZE, load_contracts, payout_slices, refresh_payout_slices
+
+# Поля, которые проверяются full_clean; связи проверяются по загруженным картам
+CLEAN_EXCLUDE = ["contract", "created_by", "updated_by", *Accrual.CALCULATED_FIELDS]
+TRUE_VALUES = ("1", "true", "yes", "да")
+FALSE_VALUES = ("", "0", "false", "no", "нет")
+
+
+def read_rows(path: str, file_format: Optional[str] = None) -> Iterator[tuple[int, dict]]:
+    """Построчное чтение CSV/JSONL: (номер строки, данные)"""
+    file_format = file_format or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+    with open(path, encoding="utf-8-sig", newline="") as source:
+        if file_format == "csv":
+            # Первая строка — заголовок
+            for line_number, row in enumerate(csv.DictReader(source), start=2):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(source, start=1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_number, {"__error__": f"Некорректный JSON: {e}"}
+                        continue
+                    if not isinstance(row, dict):
+                        row = {"__error__": "Строка должна быть JSON-объектом"}
+                    yield line_number, row
+
+
+def parse_decimal(value) -> Optional[Decimal]:
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        return Decimal(str(value).strip().replace(",", "."))
+    except InvalidOperation:
+        raise ValidationError(f"Некорректное число: {value}")
+
+
+def parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value or "").strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValidationError(f"Некорректное логическое значение: {value}")
+
+
+def parse_id(value, name: str) -> int:
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValidationError(f"Некорректный {name}: {value}")
+
+
+def build_accrual(
+    row: dict,
+    contracts: dict,
+    manager_ids: set,
+    default_created_by: Optional[int],
+    rates: Optional[RateTable] = None,
+) -> Accrual:
+    """Проверка строки и расчет формулы без запросов к базе"""
+    if "__error__" in row:
+        raise ValidationError(row["__error__"])
+
+    contract_id = parse_id(row.get("contract"), "номер контракта")
+    if contract_id not in contracts:
+        raise ValidationError(f"Контракт №{contract_id} не найден")
+
+    created_by = row.get("created_by") or default_created_by
+    if created_by is None:
+        raise ValidationError("Не указан менеджер (created_by)")
+    created_by = parse_id(created_by, "id менеджера")
+    if created_by not in manager_ids:
+        raise ValidationError(f"Менеджер {created_by} не найден")
+
+    accrual = Accrual(
+        contract=contracts[contract_id],
+        created_by_id=created_by,
+        accrual_flags=row.get("accrual_flags") or "",
+        accrual_status=row.get("accrual_status") or "pending",
+        payed=parse_bool(row.get("payed")),
+        comment_manager=row.get("comment_manager") or None,
+        hours_worked=parse_decimal(row.get("hours_worked")),
+        real_revenue=parse_decimal(row.get("real_revenue")),
+        idempotency_key=row.get("idempotency_key") or None,
+    )
+    accrual.full_clean(exclude=CLEAN_EXCLUDE, validate_unique=False, validate_constraints=False)
+    accrual.update_calculation_formula(rates)
+    return accrual
+
+
+def import_accruals(
+    rows: Iterable[tuple[int, dict]],
+    default_created_by: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> Iterator[dict]:
+    """Загрузка начислений пачками; по каждой пачке возвращается отчет.
+
+    Некорректные строки пропускаются и попадают в отчет, корректные
+    вставляются через bulk_create в отдельной транзакции на пачку.
+    """
+    manager_ids = set(Manager.objects.values_list("pk", flat=True))
+    rates = RateTable()
+    contracts = {}
+    batch = []
+    batch_number = 0
+
+    def flush() -> dict:
+        nonlocal batch_number
+        batch_number += 1
+        raw_contract_ids = set()
+        for _, row in batch:
+            try:
+                raw_contract_ids.add(int(str(row.get("contract")).strip()))
+            except ValueError:
+                pass
+        load_contracts(raw_contract_ids, contracts)
+
+        accruals, errors = [], []
+        for line_number, row in batch:
+            try:
+                accruals.append(build_accrual(row, contracts, manager_ids, default_created_by, rates))
+            except ValidationError as e:
+                errors.append((line_number, "; ".join(e.messages)))
+
+        created = 0
+        if accruals and not dry_run:
+            try:
+                with transaction.atomic():
+                    created = len(Accrual.objects.bulk_create(accruals))
+                    refresh_payout_slices(payout_slices(accruals))
+            except DatabaseError as e:
+                errors.append((batch[0][0], f"Пачка не загружена: {e}"))
+        report = {
+            "batch": batch_number,
+            "rows": len(batch),
+            "valid": len(accruals),
+            "created": created,
+            "errors": errors,
+        }
+        batch.clear()
+        return report
+
+    for line in rows:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield flush()
+    if batch:
+        yield flush()
+
+
+def submit_accruals(items: list[dict], default_created_by: Optional[int] = None) -> list[dict]:
+    """Пакетная отправка начислений внешними системами с ключами идемпотентности.
+
+    Начисления с уже сохраненным ключом не пересчитываются и не вставляются,
+    поэтому повтор пачки стоит один SELECT. Остальные считаются по контрактам,
+    загруженным один раз на пачку, и вставляются одним bulk_create.
+    Возвращает результат по каждому элементу в исходном порядке.
+    """
+    results = [{"idempotency_key": None, "status": "error", "id": None} for _ in items]
+    pending = {}
+    for index, item in enumerate(items):
+        key = item.get("idempotency_key") if isinstance(item, dict) else None
+        results[index]["idempotency_key"] = key
+        if not isinstance(key, str) or not key.strip():
+            results[index]["errors"] = ["Не указан ключ идемпотентности (idempotency_key)"]
+        elif key in pending:
+            results[index]["errors"] = [f"Ключ {key} повторяется в пачке"]
+        else:
+            pending[key] = index
+
+    existing = dict(
+        Accrual.objects.filter(idempotency_key__in=pending).values_list("idempotency_key", "pk")
+    )
+    for key, pk in existing.items():
+        results[pending.pop(key)].update(status="duplicate", id=pk)
+
+    contract_ids, manager_ids = set(), set()
+    for index in pending.values():
+        item = items[index]
+        for ids, value in (
+            (contract_ids, item.get("contract")),
+            (manager_ids, item.get("created_by") or default_created_by),
+        ):
+            try:
+                ids.add(int(str(value).strip()))
+            except ValueError:
+                pass
+    contracts = load_contracts(contract_ids, {})
+    manager_ids = set(Manager.objects.filter(pk__in=manager_ids).values_list("pk", flat=True))
+
+    accruals, rates = [], RateTable()
+    for key, index in pending.items():
+        try:
+            accruals.append(build_accrual(items[index], contracts, manager_ids, default_created_by, rates))
+        except ValidationError as e:
+            results[index]["errors"] = e.messages
+    if accruals:
+        with transaction.atomic():
+            # Параллельный повтор той же пачки не падает на уникальном индексе
+            Accrual.objects.bulk_create(accruals, ignore_conflicts=True)
+            refresh_payout_slices(payout_slices(accruals))
+        created = Accrual.objects.filter(
+            idempotency_key__in=[accrual.idempotency_key for accrual in accruals]
+        ).values_list("idempotency_key", "pk")
+        for key, pk in created:
+            results[pending[key]].update(status="created", id=pk)
+    return results
@@ -0,0 +1,78 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from contracts.exports import DEFAULT_CHUNK_SIZE, filter_accruals, filter_summary, iter_csv, iter_summary_csv
+from contracts.models import Accrual, PayoutSummary
+from dataverse.routers import replica_alias
+
+
+def parse_bool(value: str) -> bool:
+    if value.lower() in ("1", "true", "yes", "да"):
+        return True
+    if value.lower() in ("0", "false", "no", "нет"):
+        return False
+    raise ValueError(value)
+
+
+class Command(BaseCommand):
+    help = "Потоковая CSV-выгрузка начислений для выплат"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--payed", type=parse_bool, help="Факт оплаты (true/false)")
+        parser.add_argument(
+            "--status",
+            action="append",
+            default=[],
+            help="Статус начисления: pending/verified (можно указать несколько раз)"
+        )
+        parser.add_argument(
+            "--flag",
+            action="append",
+            default=[],
+            help="Флаг начисления: collapsed/correction/non_financial (можно указать несколько раз)"
+        )
+        parser.add_argument("--date-from", type=date.fromisoformat, help="Дата создания с (YYYY-MM-DD)")
+        parser.add_argument("--date-to", type=date.fromisoformat, help="Дата создания по (YYYY-MM-DD)")
+        parser.add_argument("--output", "-o", help="Файл выгрузки (по умолчанию stdout)")
+        parser.add_argument(
+            "--summary",
+            action="store_true",
+            help="Выгрузить суммы по месяцам, контрактам и преподавателям из сводки выплат"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Сколько строк читать из базы за один раз"
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size должен быть больше нуля")
+
+        if options["summary"]:
+            if options["flag"]:
+                raise CommandError("Сводка выплат не разбита по флагам: --flag нельзя использовать с --summary")
+            summary = filter_summary(
+                PayoutSummary.objects.using(replica_alias()),
+                payed=options["payed"],
+                statuses=options["status"],
+                date_from=options["date_from"],
+                date_to=options["date_to"],
+            )
+            lines = iter_summary_csv(summary)
+        else:
+            accruals = filter_accruals(
+                Accrual.objects.using(replica_alias()),
+                payed=options["payed"],
+                statuses=options["status"],
+                flags=options["flag"],
+                date_from=options["date_from"],
+                date_to=options["date_to"],
+            )
+            lines = iter_csv(accruals, chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,55 @@
+import csv
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from contracts.forecasting import GROUPINGS, forecast, numpy
+
+
+def parse_month(value: str):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+class Command(BaseCommand):
+    help = "Прогноз выплат по условиям контрактов в сравнении с фактическими начислениями"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--by", choices=GROUPINGS, default="month", help="Группировка прогноза")
+        parser.add_argument("--start", type=parse_month, help="Первый месяц прогноза YYYY-MM (по умолчанию текущий)")
+        parser.add_argument("--months", type=int, default=12, help="Горизонт прогноза в месяцах")
+        parser.add_argument(
+            "--numpy",
+            action="store_true",
+            default=None,
+            help="Распределять по месяцам через NumPy (по умолчанию, если он установлен)"
+        )
+        parser.add_argument("--no-numpy", dest="numpy", action="store_false", help="Считать без NumPy")
+        parser.add_argument("--csv", action="store_true", help="Вывод в CSV")
+
+    def handle(self, *args, **options):
+        if options["months"] <= 0:
+            raise CommandError("--months должен быть больше нуля")
+        if options["numpy"] and numpy is None:
+            raise CommandError("NumPy не установлен")
+
+        rows = forecast(
+            group_by=options["by"],
+            start=options["start"],
+            months=options["months"],
+            use_numpy=options["numpy"],
+        )
+        if options["csv"]:
+            writer = csv.writer(self.stdout)
+            writer.writerow([options["by"], "month", "currency", "projected", "actual", "variance"])
+            for row in rows:
+                writer.writerow([row.key, f"{row.month:%Y-%m}", row.currency, row.projected, row.actual, row.variance])
+            return
+
+        key_title = "" if options["by"] == "month" else options["by"]
+        self.stdout.write(f"{key_title:>10} {'Месяц':>8} {'Вал.':>5} {'Прогноз':>16} {'Факт':>16} {'Отклонение':>16}")
+        for row in rows:
+            key = "" if row.key is None else row.key
+            actual = "—" if row.actual is None else row.actual
+            variance = "—" if row.variance is None else row.variance
+            self.stdout.write(
+                f"{key:>10} {row.month.strftime('%Y-%m'):>8} {row.currency:>5} "
+                f"{row.projected:>16} {actual:>16} {variance:>16}"
+            )
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from contracts.imports import import_accruals, read_rows
+from contracts.services import DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Загрузка начислений из CSV/JSONL пачками через bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу CSV или JSONL")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Формат файла (по умолчанию определяется по расширению)"
+        )
+        parser.add_argument(
+            "--created-by",
+            type=int,
+            help="id менеджера для строк без колонки created_by"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Количество строк в одной транзакции"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только проверить и рассчитать строки, ничего не записывая"
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size должен быть больше нуля")
+
+        try:
+            rows = read_rows(options["path"], options["format"])
+            reports = import_accruals(
+                rows,
+                default_created_by=options["created_by"],
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+            total_rows = total_created = total_errors = 0
+            for report in reports:
+                total_rows += report["rows"]
+                total_created += report["created"]
+                total_errors += len(report["errors"])
+                self.stdout.write(
+                    f"Пачка {report['batch']}: строк {report['rows']}, "
+                    f"корректных {report['valid']}, загружено {report['created']}, "
+                    f"ошибок {len(report['errors'])}"
+                )
+                for line_number, message in report["errors"]:
+                    self.stderr.write(f"  строка {line_number}: {message}")
+        except OSError as e:
+            raise CommandError(f"Не удалось прочитать файл: {e}")
+
+        prefix = "Проверка завершена" if options["dry_run"] else "Загрузка завершена"
+        style = self.style.WARNING if total_errors else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{prefix}: строк {total_rows}, загружено {total_created}, ошибок {total_errors}"
+        ))
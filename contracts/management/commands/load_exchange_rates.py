@@ -0,0 +1,63 @@
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from contracts.fx import invalidate_rates
+from contracts.models import ExchangeRate
+
+CURRENCIES = {value for value, _ in ExchangeRate._meta.get_field("currency").choices}
+
+
+def read_rates(path: str, file_format: str) -> list[ExchangeRate]:
+    with open(path, encoding="utf-8-sig", newline="") as source:
+        if file_format == "csv":
+            # Строка 1 — заголовок, номера совпадают со строками файла
+            rows, start, label = csv.DictReader(source), 2, "Строка"
+        else:
+            try:
+                rows = json.load(source)
+            except ValueError as e:
+                raise CommandError(f"Некорректный JSON: {e}")
+            if not isinstance(rows, list):
+                raise CommandError("JSON должен содержать список курсов")
+            start, label = 1, "Элемент"
+        rates = []
+        for number, row in enumerate(rows, start=start):
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError("ожидается объект с полями date, currency, rate")
+                currency = str(row["currency"]).strip().lower()
+                if currency not in CURRENCIES:
+                    raise ValueError(f"неизвестная валюта {currency}")
+                rates.append(ExchangeRate(
+                    date=date.fromisoformat(str(row["date"]).strip()),
+                    currency=currency,
+                    rate=Decimal(str(row["rate"]).strip().replace(",", ".")),
+                ))
+            except (KeyError, ValueError, InvalidOperation) as e:
+                raise CommandError(f"{label} {number}: {e!r}")
+    return rates
+
+
+class Command(BaseCommand):
+    help = "Загрузка курсов валют к рублю из CSV или JSON (date, currency, rate)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл с курсами")
+        parser.add_argument("--format", choices=("csv", "json"), help="Формат файла (по умолчанию по расширению)")
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or ("json" if options["path"].endswith(".json") else "csv")
+        rates = read_rates(options["path"], file_format)
+        with transaction.atomic():
+            # Курс на уже загруженную дату обновляется
+            ExchangeRate.objects.bulk_create(
+                rates,
+                update_conflicts=True,
+                unique_fields=["currency", "date"],
+                update_fields=["rate"],
+            )
+        invalidate_rates()
+        self.stdout.write(self.style.SUCCESS(f"Загружено курсов: {len(rates)}"))
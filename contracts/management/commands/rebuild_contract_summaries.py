@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from contracts.models import Contract
+from contracts.services import DEFAULT_BATCH_SIZE, refresh_contract_summaries
+
+
+class Command(BaseCommand):
+    help = "Пересчет сохраненных артикулов и участников контрактов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--contract",
+            type=int,
+            action="append",
+            help="Номер контракта (по умолчанию — все контракты)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Размер пачки для bulk_update"
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size должен быть больше нуля")
+
+        contracts = Contract.objects.all()
+        if options["contract"]:
+            contracts = contracts.filter(pk__in=options["contract"])
+        updated = refresh_contract_summaries(contracts, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Обновлено контрактов: {updated}"))
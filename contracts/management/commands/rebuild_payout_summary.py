@@ -0,0 +1,29 @@
+from datetime import date, datetime
+from django.core.management.base import BaseCommand
+from contracts.services import refresh_payout_summary
+
+
+def parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+class Command(BaseCommand):
+    help = "Полная или частичная пересборка сводки выплат по месяцам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--contract",
+            type=int,
+            action="append",
+            help="Номер контракта (по умолчанию — все контракты)"
+        )
+        parser.add_argument(
+            "--month",
+            type=parse_month,
+            action="append",
+            help="Месяц YYYY-MM (по умолчанию — все месяцы)"
+        )
+
+    def handle(self, *args, **options):
+        rows = refresh_payout_summary(options["contract"], options["month"])
+        self.stdout.write(self.style.SUCCESS(f"Записано строк сводки: {rows}"))
@@ -0,0 +1,57 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from contracts.models import Accrual
+from contracts.services import DEFAULT_BATCH_SIZE, recalculate_accruals
+
+
+class Command(BaseCommand):
+    help = "Пакетный пересчет формул начислений (например, после изменения ставок)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Пересчитать начисления, созданные начиная с даты (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "--contract",
+            type=int,
+            action="append",
+            help="Номер контракта (можно указать несколько раз)"
+        )
+        parser.add_argument(
+            "--thread",
+            type=int,
+            action="append",
+            help="id образовательного потока (можно указать несколько раз)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Размер пачки для bulk_update"
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size должен быть больше нуля")
+
+        accruals = Accrual.objects.all()
+        if options["since"]:
+            accruals = accruals.filter(created_at__date__gte=options["since"])
+        if options["contract"]:
+            accruals = accruals.filter(contract__in=options["contract"])
+        if options["thread"]:
+            accruals = accruals.filter(
+                Q(contract__authors__thead__in=options["thread"])
+                | Q(contract__presenters__thead__in=options["thread"])
+            ).distinct()
+
+        started = time.monotonic()
+        updated = recalculate_accruals(accruals, batch_size=options["batch_size"])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Пересчитано начислений: {updated} за {elapsed:.2f} с"
+        ))
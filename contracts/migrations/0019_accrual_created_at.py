@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0018_remove_accrual_contract_type'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='author',
+            options={'verbose_name': 'Авторский', 'verbose_name_plural': 'Авторские'},
+        ),
+        migrations.AlterModelOptions(
+            name='contract',
+            options={'ordering': ['-contract_number'], 'verbose_name': 'Контракт', 'verbose_name_plural': 'Контракты'},
+        ),
+        migrations.AlterModelOptions(
+            name='presenter',
+            options={'verbose_name': 'Ведущий', 'verbose_name_plural': 'Ведущие'},
+        ),
+        migrations.AddField(
+            model_name='accrual',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True, verbose_name='Дата создание'),
+        ),
+    ]
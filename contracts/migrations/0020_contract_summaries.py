@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+def fill_summaries(apps, schema_editor):
+    """Заполнение артикулов и участников для существующих контрактов"""
+    Contract = apps.get_model("contracts", "Contract")
+    contracts = Contract.objects.prefetch_related(
+        "authors__author", "authors__thead",
+        "presenters__presenter", "presenters__thead",
+    )
+    for contract in contracts:
+        articuls = set()
+        for participant in [*contract.authors.all(), *contract.presenters.all()]:
+            articuls.update(thead.articul for thead in participant.thead.all())
+        contract.articul_summary = ", ".join(sorted(articuls))
+        contract.authors_summary = ", ".join(
+            f"{author.author.username} ({author.reward_percent}%)"
+            for author in contract.authors.all()
+        )
+        contract.presenters_summary = ", ".join(
+            f"{presenter.presenter.username} ({presenter.hourly_rate}/час)"
+            for presenter in contract.presenters.all()
+        )
+        contract.save(update_fields=["articul_summary", "authors_summary", "presenters_summary"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0019_accrual_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='articul_summary',
+            field=models.TextField(blank=True, editable=False, verbose_name='Артикулы'),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='authors_summary',
+            field=models.TextField(blank=True, editable=False, verbose_name='Автор (процент)'),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='presenters_summary',
+            field=models.TextField(blank=True, editable=False, verbose_name='Ведущий (ставка)'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:58
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+
+def parse_total(calculation_formula):
+    """Итоговая сумма и валюта из строки «Итого: ...» сохраненной формулы"""
+    if not calculation_formula or "formula" not in calculation_formula:
+        return None, ""
+    currency = calculation_formula.get("raw_data", {}).get("currency", "")
+    last_line = calculation_formula["formula"].rsplit("\n", 1)[-1]
+    if not last_line.startswith("Итого:"):
+        return None, currency
+    try:
+        return Decimal(last_line.split()[1]), currency
+    except (IndexError, InvalidOperation):
+        return None, currency
+
+
+def backfill_amounts(apps, schema_editor):
+    Accrual = apps.get_model("contracts", "Accrual")
+    batch = []
+    for accrual in Accrual.objects.only("calculation_formula").iterator(chunk_size=2000):
+        accrual.amount, accrual.currency = parse_total(accrual.calculation_formula)
+        batch.append(accrual)
+        if len(batch) >= 2000:
+            Accrual.objects.bulk_update(batch, ["amount", "currency"])
+            batch = []
+    if batch:
+        Accrual.objects.bulk_update(batch, ["amount", "currency"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0020_contract_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accrual',
+            name='amount',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=18, null=True, verbose_name='Сумма начисления'),
+        ),
+        migrations.AddField(
+            model_name='accrual',
+            name='currency',
+            field=models.CharField(blank=True, choices=[('rub', 'RUB'), ('usd', 'USD')], db_index=True, editable=False, verbose_name='Валюта начисления'),
+        ),
+        migrations.RunPython(backfill_amounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_manager_options_alter_person_options_and_more'),
+        ('contracts', '0021_accrual_amount_currency'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accrual',
+            index=models.Index(fields=['accrual_status', 'payed'], name='accrual_status_payed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accrual',
+            index=models.Index(fields=['contract', 'created_at'], name='accrual_contract_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accrual',
+            index=models.Index(fields=['created_at'], name='accrual_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accrual',
+            index=models.Index(condition=models.Q(('payed', False)), fields=['created_at'], name='accrual_unpaid_created_idx'),
+        ),
+    ]
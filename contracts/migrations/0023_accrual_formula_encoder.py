@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0022_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='accrual',
+            name='calculation_formula',
+            field=models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Автоматически подставляется при сохранении', verbose_name='Формула расчета'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+def fill_kind(apps, schema_editor):
+    """Тип для существующих контрактов по составу участников"""
+    Contract = apps.get_model("contracts", "Contract")
+    with_authors = Contract.objects.filter(authors__isnull=False).values("pk")
+    with_presenters = Contract.objects.filter(presenters__isnull=False).values("pk")
+    Contract.objects.filter(pk__in=with_authors).filter(pk__in=with_presenters).update(kind="combined")
+    Contract.objects.filter(pk__in=with_authors).exclude(pk__in=with_presenters).update(kind="author")
+    Contract.objects.filter(pk__in=with_presenters).exclude(pk__in=with_authors).update(kind="presenter")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0023_accrual_formula_encoder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('author', 'Авторский'), ('presenter', 'Ведущий'), ('combined', 'Смешаный')], db_index=True, editable=False, max_length=20, verbose_name='Тип контракта'),
+        ),
+        migrations.RunPython(fill_kind, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_manager_options_alter_person_options_and_more'),
+        ('contracts', '0024_contract_kind'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accrual',
+            index=models.Index(fields=['created_at', 'id'], name='accrual_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0025_accrual_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accrual',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, help_text='Ключ внешней системы: повторная отправка того же начисления не создает дубль', max_length=100, null=True, unique=True, verbose_name='Ключ идемпотентности'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_manager_options_alter_person_options_and_more'),
+        ('contracts', '0027_exchange_rate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(null=True, verbose_name='Месяц')),
+                ('currency', models.CharField(choices=[('rub', 'RUB'), ('usd', 'USD')], verbose_name='Валюта')),
+                ('accrual_status', models.CharField(choices=[('pending', 'Ожидание'), ('verified', 'Проверено')], verbose_name='Статус')),
+                ('payed', models.BooleanField(verbose_name='Оплата')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=20, verbose_name='Сумма')),
+                ('count', models.PositiveIntegerField(verbose_name='Начислений')),
+                ('contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payout_summaries', to='contracts.contract', verbose_name='Контракт')),
+                ('person', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.person', verbose_name='Преподаватель')),
+            ],
+            options={
+                'verbose_name': 'Сводка выплат',
+                'verbose_name_plural': 'Сводка выплат',
+                'indexes': [models.Index(fields=['month', 'person'], name='payout_month_person_idx'), models.Index(fields=['contract', 'month'], name='payout_contract_month_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_manager_options_alter_person_options_and_more'),
+        ('contracts', '0028_payout_summary'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payoutsummary',
+            name='payout_month_person_idx',
+        ),
+        migrations.AlterField(
+            model_name='payoutsummary',
+            name='person',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.person', verbose_name='Преподаватель'),
+        ),
+        migrations.AddIndex(
+            model_name='payoutsummary',
+            index=models.Index(condition=models.Q(('person__isnull', True)), fields=['month'], name='payout_contract_rows_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payoutsummary',
+            index=models.Index(condition=models.Q(('person__isnull', False)), fields=['month', 'person'], name='payout_person_rows_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payoutsummary',
+            index=models.Index(condition=models.Q(('payed', False), ('person__isnull', True)), fields=['currency'], name='payout_unpaid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payoutsummary',
+            index=models.Index(condition=models.Q(('accrual_status', 'pending'), ('person__isnull', True)), fields=['payed'], name='payout_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:05
+
+from collections import defaultdict
+from django.db import migrations
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+
+def fill_payout_summary(apps, schema_editor):
+    """Сводка выплат по существующим начислениям (как refresh_payout_summary)"""
+    Accrual = apps.get_model("contracts", "Accrual")
+    Contract = apps.get_model("contracts", "Contract")
+    PayoutSummary = apps.get_model("contracts", "PayoutSummary")
+    groups = (
+        Accrual.objects.filter(amount__isnull=False)
+        .annotate(month=TruncMonth("created_at", output_field=DateField()))
+        .values("month", "contract_id", "currency", "accrual_status", "payed")
+        .annotate(total=Sum("amount"), count=Count("pk"))
+        .order_by()
+    )
+    persons = defaultdict(set)
+    for path in ("authors__author", "presenters__presenter"):
+        for contract_id, person_id in Contract.objects.filter(**{f"{path}__isnull": False}).values_list("pk", path):
+            persons[contract_id].add(person_id)
+    PayoutSummary.objects.all().delete()
+    PayoutSummary.objects.bulk_create(
+        (
+            PayoutSummary(person_id=person_id, **group)
+            for group in groups
+            for person_id in (None, *persons.get(group["contract_id"], ()))
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0029_payout_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_payout_summary, migrations.RunPython.noop),
+    ]
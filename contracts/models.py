@@ -1,9 +1,22 @@
-import jsons
 import logging
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from accounts.models import Person, Manager
+from contracts.calculation import (
+    Actuals,
+    AuthorTerms,
+    PresenterTerms,
+    build_raw_data,
+    calculate,
+    contract_kind,
+    formula_text,
+)
+from contracts.encoders import dump_raw_data, load_raw_data
+from contracts.fx import RateTable
 from threads.models import Education_Thread
 
 from typing import Any, Optional
@@ -14,6 +27,16 @@ logger = logging.getLogger(__name__)
 
 class Contract(models.Model):
     """Модель заключения контракта с авторами или ведущеми/соведущими"""
+    # Связи, необходимые для расчета начислений по контракту
+    TERMS_PREFETCH = ("authors__author", "presenters__presenter")
+    # Связи для пересчета сохраненных артикулов и участников
+    SUMMARY_PREFETCH = (
+        "authors__author", "authors__thead",
+        "presenters__presenter", "presenters__thead",
+    )
+    # Поля, которые вычисляются по участникам и пишутся только сигналами
+    SUMMARY_FIELDS = ["kind", "articul_summary", "authors_summary", "presenters_summary"]
+
     contract_number = models.AutoField(
         primary_key=True,
         verbose_name="Номер контракта"
@@ -49,6 +72,32 @@ class Contract(models.Model):
         null=True
     )
     comment_manager = models.TextField(verbose_name="Комментарий менеджера", blank=True)
+    kind = models.CharField(
+        verbose_name="Тип контракта",
+        max_length=20,
+        choices=[
+            ("author", "Авторский"),
+            ("presenter", "Ведущий"),
+            ("combined", "Смешаный")],
+        blank=True,
+        editable=False,
+        db_index=True
+    )
+    articul_summary = models.TextField(
+        verbose_name="Артикулы",
+        blank=True,
+        editable=False
+    )
+    authors_summary = models.TextField(
+        verbose_name="Автор (процент)",
+        blank=True,
+        editable=False
+    )
+    presenters_summary = models.TextField(
+        verbose_name="Ведущий (ставка)",
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = "Контракт"
@@ -56,30 +105,55 @@ class Contract(models.Model):
         ordering = ["-contract_number"]
 
     def __str__(self) -> str:
-        articuls = self.get_articul()
-        return f"Контракт №{self.contract_number} по артикулу: {articuls}"
+        return f"Контракт №{self.contract_number} по артикулу: {self.articul_summary}"
+
+    def save(self, *args, **kwargs) -> None:
+        """Сохранение без перезаписи типа, артикулов и участников.
+
+        Их пересчитывают сигналы при изменении участников, в том числе через
+        другие объекты, поэтому значения в памяти могут быть устаревшими.
+        При полном сохранении существующего контракта они перечитываются из базы.
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = [field for field in update_fields if field not in self.SUMMARY_FIELDS]
+        elif not self._state.adding and self.pk is not None:
+            saved = (
+                type(self)._base_manager.using(kwargs.get("using") or self._state.db)
+                .filter(pk=self.pk).values(*self.SUMMARY_FIELDS).first()
+            )
+            if saved:
+                self.__dict__.update(saved)
+        super().save(*args, **kwargs)
+
+    def build_summaries(self) -> None:
+        """Пересчет сохраненных типа, артикулов и участников контракта"""
+        self.kind = contract_kind(self.authors.all(), self.presenters.all()) or ""
+        self.articul_summary = self.get_articul()
+        self.authors_summary = self.get_authors_info()
+        self.presenters_summary = self.get_presenters_info()
 
     def get_articul(self) -> str:
         """Получение актикулов из авторского/ведущего контактов"""
         author_articuls = set()
-        for author in self.authors.prefetch_related('thead').all():
-            author_articuls.update(author.thead.values_list('articul', flat=True))
+        for author in self.authors.all():
+            author_articuls.update(thead.articul for thead in author.thead.all())
 
         presenter_articuls = set()
-        for presenter in self.presenters.prefetch_related('thead').all():
-            presenter_articuls.update(presenter.thead.values_list('articul', flat=True))
+        for presenter in self.presenters.all():
+            presenter_articuls.update(thead.articul for thead in presenter.thead.all())
 
-        all_articuls = list(author_articuls | presenter_articuls)
+        all_articuls = sorted(author_articuls | presenter_articuls)
         return ', '.join(all_articuls)
 
     def get_authors_info(self) -> str:
         """Получение данные по авторскому контракту"""
-        authors = self.authors.prefetch_related('author').all()
+        authors = self.authors.all()
         return ", ".join(f"{author.author.username} ({author.reward_percent}%)" for author in authors)
 
     def get_presenters_info(self) -> str:
         """Получение данные по ведущему контракту"""
-        presenters = self.presenters.prefetch_related('presenter').all()
+        presenters = self.presenters.all()
         return ", ".join(f"{presenter.presenter.username} ({presenter.hourly_rate}/час)" for presenter in presenters)
 
 
@@ -127,7 +201,7 @@ class Author(models.Model):
         verbose_name_plural = "Авторские"
 
     def __str__(self) -> str:
-        articuls = ", ".join(self.thead.values_list('articul', flat=True))
+        articuls = ", ".join(thead.articul for thead in self.thead.all())
         if articuls:
             return f"{self.author} (Артикул: {articuls})"
         return f"{self.author}"
@@ -168,7 +242,7 @@ class Presenter(models.Model):
         verbose_name_plural = "Ведущие"
 
     def __str__(self) -> str:
-        articuls = ", ".join(self.thead.values_list('articul', flat=True))
+        articuls = ", ".join(thead.articul for thead in self.thead.all())
         if articuls:
             return f"{self.presenter} (Артикул: {articuls})"
         return f"{self.presenter}"
@@ -243,17 +317,71 @@ class Accrual(models.Model):
     calculation_formula = models.JSONField(
         verbose_name="Формула расчета",
         default=dict,
+        # Decimal вне raw_data сохраняется строкой без потери точности
+        encoder=DjangoJSONEncoder,
         help_text="Автоматически подставляется при сохранении",
         blank=True
     )
+    amount = models.DecimalField(
+        verbose_name="Сумма начисления",
+        max_digits=18,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+    )
+    currency = models.CharField(
+        verbose_name="Валюта начисления",
+        choices=[
+            ("rub", "RUB"),
+            ("usd", "USD")],
+        blank=True,
+        editable=False,
+        db_index=True
+    )
+
+    idempotency_key = models.CharField(
+        verbose_name="Ключ идемпотентности",
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Ключ внешней системы: повторная отправка того же начисления не создает дубль"
+    )
+
+    # Поля, которые заполняет update_calculation_formula
+    CALCULATED_FIELDS = ["calculation_formula", "amount", "currency"]
+    # Поля статуса: не влияют на сумму, их изменение не пересчитывает формулу
+    STATUS_FIELDS = ["accrual_status", "payed", "updated_by"]
 
     class Meta:
         verbose_name = "Начисление"
         verbose_name_plural = "Начисления"
+        indexes = [
+            models.Index(fields=["accrual_status", "payed"], name="accrual_status_payed_idx"),
+            models.Index(fields=["contract", "created_at"], name="accrual_contract_created_idx"),
+            models.Index(fields=["created_at"], name="accrual_created_idx"),
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(payed=False),
+                name="accrual_unpaid_created_idx"
+            ),
+            # Keyset-пагинация списка в админке: ORDER BY created_at DESC, id DESC
+            models.Index(fields=["created_at", "id"], name="accrual_created_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Начисление {self.contract}"
 
+    @property
+    def rate_date(self):
+        """Дата курса валют для пересчета: дата создания начисления"""
+        if self.created_at is None:
+            return timezone.localdate()
+        return timezone.localdate(self.created_at)
+
     @property
     def formatted_formula(self) -> str:
         """Отображение формулы расчета"""
@@ -264,136 +392,167 @@ class Accrual(models.Model):
         return format_html("{}", mark_safe(html_formula))
 
     def save(self, *args, **kwargs) -> None:
-        self.set_contract_type()
-        self.update_calculation_formula()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or not set(update_fields) <= set(self.STATUS_FIELDS):
+            self.prefetch_contract_terms()
+            self.update_calculation_formula()
         super().save(*args, **kwargs)
 
-    def set_contract_type(self) -> None:
-        """Определение типа контракта"""
-        has_authors = self.contract.authors.exists()
-        has_presenters = self.contract.presenters.exists()
-        if has_authors and has_presenters:
-            self.contract_type = "combined"
-        elif has_authors:
-            self.contract_type = "author"
-        elif has_presenters:
-            self.contract_type = "presenter"
-
-    def update_calculation_formula(self) -> None:
+    def prefetch_contract_terms(self) -> None:
+        """Загрузка авторов/ведущих контракта одним набором запросов"""
+        prefetched = getattr(self.contract, "_prefetched_objects_cache", {})
+        if "authors" not in prefetched or "presenters" not in prefetched:
+            prefetch_related_objects([self.contract], *Contract.TERMS_PREFETCH)
+
+    def get_contract_terms(self) -> tuple[tuple[AuthorTerms, ...], tuple[PresenterTerms, ...]]:
+        """Условия авторов/ведущих контракта (из кэша prefetch, если он загружен)"""
+        authors = tuple(
+            AuthorTerms(str(author.author), author.reward_percent, author.currency)
+            for author in self.contract.authors.all()
+        )
+        presenters = tuple(
+            PresenterTerms(str(presenter.presenter), presenter.hourly_rate, presenter.currency)
+            for presenter in self.contract.presenters.all()
+        )
+        return authors, presenters
+
+    @property
+    def contract_type(self) -> Optional[str]:
+        """Тип контракта хранится в самом контракте"""
+        return self.contract.kind or None
+
+    def update_calculation_formula(self, rates: Optional[RateTable] = None) -> None:
         """Сериализация данных и сохранение в calculation_formula"""
-        raw_data = self.get_raw_data()
+        raw_data = self.get_raw_data(rates)
         result = self.calculation(raw_data)
 
         if raw_data and result is not None:
             self.calculation_formula = {
                 "formula": self.generate_formula_text(result, raw_data),
-                "raw_data": jsons.dump(raw_data)
+                "raw_data": dump_raw_data(raw_data)
             }
+            self.amount = result
+            self.currency = raw_data.get("currency", "rub")
         else:
             self.calculation_formula = {"error": "Недостаточно данных для расчета"}
+            self.amount = None
+            self.currency = ""
+
+    def audit_calculation(self) -> bool:
+        """Проверка сохраненной суммы пересчетом из сохраненного raw_data"""
+        stored = self.calculation_formula.get("raw_data") if self.calculation_formula else None
+        if not stored:
+            return self.amount is None
+        return calculate(load_raw_data(stored)) == self.amount
 
-    def get_raw_data(self) -> dict[str, Any]:
+    def get_raw_data(self, rates: Optional[RateTable] = None) -> dict[str, Any]:
         """Получение данных из авторского/ведущего контракта"""
-        raw_data = {}
-        try:
-            if self.contract_type == "author":
-                authors = self.contract.authors.select_related('author').all()
-                if authors.exists():
-                    raw_data = {
-                        "authors": [],
-                        "total_revenue": self.real_revenue if self.real_revenue else "0",
-                        "currency": authors[0].currency if authors else "rub"
-                    }
-                    for author in authors:
-                        raw_data["authors"].append({
-                            "name": str(author.author),
-                            "reward_percent": author.reward_percent,
-                        })
-
-            elif self.contract_type == "presenter":
-                presenters = self.contract.presenters.select_related('presenter').all()
-                if presenters.exists():
-                    raw_data = {
-                        "presenters": [],
-                        "hours_worked": self.hours_worked if self.hours_worked else None,
-                        "currency": presenters[0].currency
-                    }
-                    for presenter in presenters:
-                        raw_data["presenters"].append({
-                            "name": str(presenter.presenter),
-                            "hourly_rate": presenter.hourly_rate,
-                        })
-            elif self.contract_type == "combined":
-                raw_data = {
-                    "authors": [],
-                    "presenters": [],
-                    "currency": "rub"
-                }
-                authors = self.contract.authors.all()
-                if authors.exists():
-                    raw_data["authors"] = [{
-                        "name": str(author.author),
-                        "reward_percent": author.reward_percent,
-                    } for author in authors]
-                    raw_data["total_revenue"] = self.real_revenue if self.real_revenue else 0
-
-                presenters = self.contract.presenters.all()
-                if presenters.exists():
-                    raw_data["presenters"] = [{
-                        "name": str(presenter.presenter),
-                        "hourly_rate": presenter.hourly_rate,
-                    } for presenter in presenters]
-                    raw_data["hours_worked"] = self.hours_worked if self.hours_worked else 0
-        except Exception as e:
-            logger.error(f"Ошибка при получении данных: {e}")
-        return raw_data
+        authors, presenters = self.get_contract_terms()
+        actuals = Actuals(revenue=self.real_revenue, hours=self.hours_worked)
+        rates = rates or RateTable()
+        rate_date = self.rate_date
+        return build_raw_data(
+            self.contract_type, authors, presenters, actuals,
+            rate=lambda currency: rates.rate(currency, rate_date),
+        )
 
     def calculation(self, raw_data: Any) -> Optional[Decimal]:
         """Вычисляет сумму начисления на основе данных по контрактам."""
-        if not raw_data:
-            return None
-        total = Decimal(0)
-        try:
-            if "authors" in raw_data and raw_data.get("total_revenue", 0) > 0:
-                for author in raw_data["authors"]:
-                    percent = Decimal(str(author["reward_percent"]))
-                    revenue = Decimal(str(raw_data["total_revenue"]))
-                    total += (percent * revenue) / 100
-
-            if "presenters" in raw_data and raw_data.get("hours_worked", 0) > 0:
-                hours = Decimal(str(raw_data["hours_worked"]))
-                for presenter in raw_data["presenters"]:
-                    rate = Decimal(str(presenter["hourly_rate"]))
-                    total += hours * rate
-
-            return total.quantize(Decimal('0.01'))
-        except (KeyError, TypeError) as e:
-            logger.error(f"Ошибка расчета: {e}")
-            return None
+        return calculate(raw_data)
 
     def generate_formula_text(self, result: Decimal, raw_data: dict) -> str:
         """Генерация формулы по авторскому/ведущему контракта"""
-        formula_lines = []
-
-        if "authors" in raw_data and raw_data.get("total_revenue", 0) > 0:
-            formula_lines.append("По авторскому: ")
-            for author in raw_data["authors"]:
-                line = (
-                    f"\n- {author['name']}: {author['reward_percent']}% * "
-                    f"{raw_data['total_revenue']} {raw_data['currency']} = "
-                    f"{(Decimal(author['reward_percent']) * Decimal(raw_data['total_revenue'])) / 100:.2f}"
-                )
-                formula_lines.append(line)
-
-        if "presenters" in raw_data and raw_data.get("hours_worked", 0) > 0:
-            formula_lines.append("По ведущему: ") if not formula_lines else formula_lines.append("\nПо ведущему: ")
-            for presenter in raw_data["presenters"]:
-                line = (
-                    f"\n- {presenter['name']}: {raw_data['hours_worked']} ч. × "
-                    f"{presenter['hourly_rate']} {raw_data['currency']}/ч. = "
-                    f"{Decimal(raw_data['hours_worked']) * Decimal(presenter['hourly_rate']):.2f}"
-                )
-                formula_lines.append(line)
-
-        formula_lines.append(f"\nИтого: {result} {raw_data.get('currency', 'RUB')}")
-        return "".join(formula_lines)
\ No newline at end of file
+        return formula_text(result, raw_data)
+
+
+class ExchangeRate(models.Model):
+    """Курс валюты к рублю на дату"""
+    date = models.DateField(verbose_name="Дата курса")
+    currency = models.CharField(
+        verbose_name="Валюта",
+        choices=[
+            ("usd", "USD")],
+    )
+    rate = models.DecimalField(
+        verbose_name="Курс, руб. за единицу",
+        max_digits=18,
+        decimal_places=6
+    )
+
+    class Meta:
+        verbose_name = "Курс валюты"
+        verbose_name_plural = "Курсы валют"
+        ordering = ["-date", "currency"]
+        constraints = [
+            models.UniqueConstraint(fields=["currency", "date"], name="exchange_rate_currency_date_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_currency_display()} {self.date}: {self.rate}"
+
+
+class PayoutSummary(models.Model):
+    """Суммы и количество начислений за месяц.
+
+    Строки с преподавателем — доля каждого участника контракта (начисление
+    относится целиком к каждому участнику, как в отчетах), строка без
+    преподавателя — итог по контракту. Таблица обновляется сигналами
+    и массовыми операциями, полностью пересобирается rebuild_payout_summary.
+    """
+    month = models.DateField(verbose_name="Месяц", null=True)
+    person = models.ForeignKey(
+        Person,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="+",
+        verbose_name="Преподаватель",
+        # Индекс по person_id планировщик выбирает для person IS NULL вместо
+        # частичных индексов ниже; строки преподавателей читаются по месяцам
+        db_index=False
+    )
+    contract = models.ForeignKey(
+        Contract,
+        on_delete=models.CASCADE,
+        related_name="payout_summaries",
+        verbose_name="Контракт"
+    )
+    currency = models.CharField(
+        verbose_name="Валюта",
+        choices=[
+            ("rub", "RUB"),
+            ("usd", "USD")],
+    )
+    accrual_status = models.CharField(
+        verbose_name="Статус",
+        choices=[
+            ("pending", "Ожидание"),
+            ("verified", "Проверено")],
+    )
+    payed = models.BooleanField(verbose_name="Оплата")
+    total = models.DecimalField(verbose_name="Сумма", max_digits=20, decimal_places=2)
+    count = models.PositiveIntegerField(verbose_name="Начислений")
+
+    class Meta:
+        verbose_name = "Сводка выплат"
+        verbose_name_plural = "Сводка выплат"
+        indexes = [
+            # Итоги по контрактам и строки преподавателей за месяцы читаются отдельно
+            models.Index(fields=["month"], condition=models.Q(person__isnull=True), name="payout_contract_rows_idx"),
+            models.Index(fields=["month", "person"], condition=models.Q(person__isnull=False), name="payout_person_rows_idx"),
+            models.Index(fields=["contract", "month"], name="payout_contract_month_idx"),
+            # Виджеты финансовой сводки: неоплаченные и непроверенные итоги по контрактам —
+            # небольшая часть истории, частичные индексы не растут вместе с ней
+            models.Index(
+                fields=["currency"],
+                condition=models.Q(payed=False, person__isnull=True),
+                name="payout_unpaid_idx"
+            ),
+            models.Index(
+                fields=["payed"],
+                condition=models.Q(accrual_status="pending", person__isnull=True),
+                name="payout_pending_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Контракт №{self.contract_id}, {self.month}: {self.total} {self.currency}"
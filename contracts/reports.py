@@ -0,0 +1,146 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models import Count, F, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from contracts.calculation import BASE_CURRENCY, CENTS
+from contracts.fx import RateTable
+from contracts.models import Accrual, Contract, PayoutSummary
+from dataverse.routers import replica_alias
+
+TOTALS = {"total": Sum("amount"), "count": Count("pk")}
+SUMMARY_TOTALS = {"total": Sum("total"), "count": Sum("count")}
+
+
+def base_accruals(accruals: QuerySet = None) -> QuerySet:
+    """Начисления с рассчитанной суммой; фильтры можно передать готовым queryset.
+
+    По умолчанию отчеты читают с реплики, если она настроена.
+    """
+    if accruals is None:
+        accruals = Accrual.objects.using(replica_alias())
+    return accruals.filter(amount__isnull=False)
+
+
+def base_summary(summary: QuerySet = None) -> QuerySet:
+    """Строки сводки выплат; по умолчанию читаются с реплики, если она настроена"""
+    if summary is None:
+        summary = PayoutSummary.objects.using(replica_alias())
+    return summary
+
+
+def contract_summary(summary: QuerySet = None) -> QuerySet:
+    """Итоговые строки сводки по контрактам (без разбивки по преподавателям)"""
+    return base_summary(summary).filter(person__isnull=True)
+
+
+def totals_by_contract(summary: QuerySet = None) -> QuerySet:
+    """Суммы начислений по контрактам"""
+    return (
+        contract_summary(summary)
+        .values("contract", "currency")
+        .annotate(**SUMMARY_TOTALS)
+        .order_by("contract", "currency")
+    )
+
+
+def totals_by_manager(summary: QuerySet = None) -> QuerySet:
+    """Суммы начислений по ответственным менеджерам контрактов"""
+    return (
+        contract_summary(summary)
+        .values("currency", manager=F("contract__responsible_manager"))
+        .annotate(**SUMMARY_TOTALS)
+        .order_by("manager", "currency")
+    )
+
+
+def totals_by_month(summary: QuerySet = None) -> QuerySet:
+    """Суммы начислений по месяцам создания"""
+    return (
+        contract_summary(summary)
+        .values("month", "currency")
+        .annotate(**SUMMARY_TOTALS)
+        .order_by("month", "currency")
+    )
+
+
+def totals_by_person(summary: QuerySet = None) -> QuerySet:
+    """Суммы начислений по преподавателям (в роли автора или ведущего).
+
+    Начисление относится целиком к каждому участнику контракта, поэтому
+    суммы по разным преподавателям одного контракта не складываются.
+    """
+    return (
+        base_summary(summary)
+        .filter(person__isnull=False)
+        .values("person", "currency")
+        .annotate(**SUMMARY_TOTALS)
+        .order_by("person", "currency")
+    )
+
+
+def contract_threads(accruals: QuerySet) -> dict[int, set[int]]:
+    """Потоки контрактов начислений через авторов и ведущих"""
+    contracts = accruals.values("contract")
+    threads = defaultdict(set)
+    for through, path in (
+        (Contract.authors.through, "author__thead"),
+        (Contract.presenters.through, "presenter__thead"),
+    ):
+        rows = (
+            through.objects.using(accruals.db)
+            .filter(contract__in=contracts, **{f"{path}__isnull": False})
+            .values_list("contract_id", path)
+        )
+        for contract_id, thread_id in rows:
+            threads[contract_id].add(thread_id)
+    return threads
+
+
+def totals_by_thread(accruals: QuerySet = None) -> list[dict]:
+    """Суммы начислений по образовательным потокам (через авторов и ведущих).
+
+    Начисление относится к каждому потоку своего контракта ровно один раз,
+    даже если поток есть у нескольких участников. Суммы считаются в базе
+    по контрактам и раскладываются по потокам в памяти: строк столько,
+    сколько пар (контракт, валюта), а не начислений.
+    """
+    accruals = base_accruals(accruals)
+    threads = contract_threads(accruals)
+    totals = defaultdict(lambda: {"total": Decimal(0), "count": 0})
+    for row in accruals.values("contract", "currency").annotate(**TOTALS).order_by():
+        for thread_id in threads.get(row["contract"], ()):
+            item = totals[(thread_id, row["currency"])]
+            item["total"] += row["total"]
+            item["count"] += row["count"]
+    return [
+        {"thread": thread_id, "currency": currency, **item}
+        for (thread_id, currency), item in sorted(totals.items())
+    ]
+
+
+def total_in_currency(accruals: QuerySet = None, currency: str = BASE_CURRENCY) -> dict:
+    """Общая сумма начислений в одной валюте по курсам на даты начислений.
+
+    База группирует суммы по (валюта, день), поэтому курс ищется один раз
+    на группу, а не на каждое начисление. Начисления без даты создания
+    пересчитываются по текущему курсу. Группы без курса попадают в missing_rates.
+    """
+    rates = RateTable()
+    today = timezone.localdate()
+    total, count, missing = Decimal(0), 0, []
+    groups = (
+        base_accruals(accruals)
+        .annotate(day=TruncDate("created_at"))
+        .values("currency", "day")
+        .annotate(**TOTALS)
+        .order_by()
+    )
+    for group in groups:
+        converted = rates.convert(group["total"], group["currency"], group["day"] or today, currency)
+        if converted is None:
+            missing.append((group["currency"], group["day"]))
+            continue
+        total += converted
+        count += group["count"]
+    return {"currency": currency, "total": total.quantize(CENTS), "count": count, "missing_rates": missing}
@@ -0,0 +1,290 @@
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+from django.contrib.admin.models import CHANGE, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, DateField, Q, QuerySet, Sum, prefetch_related_objects
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from contracts.dashboard import invalidate_dashboard
+from contracts.fx import RateTable
+from accounts.models import Manager
+from contracts.models import Contract, Accrual, PayoutSummary
+from dataverse.autocomplete import invalidate_autocomplete
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def load_contracts(contract_ids, cache: dict[int, Contract]) -> dict[int, Contract]:
+    """Догрузка контрактов с авторами/ведущими в общий кэш"""
+    missing = set(contract_ids) - cache.keys()
+    if missing:
+        cache.update(
+            Contract.objects.prefetch_related(*Contract.TERMS_PREFETCH).in_bulk(missing)
+        )
+    return cache
+
+
+def recalculate_accruals(accruals: QuerySet, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Пересчет формул начислений пачками без вызова Accrual.save()
+
+    Контракты с авторами, ведущими и преподавателями загружаются один раз
+    на пачку, формулы считаются в памяти, результат пишется через bulk_update.
+    """
+    pks = list(accruals.order_by("pk").values_list("pk", flat=True))
+    contracts: dict[int, Contract] = {}
+    rates = RateTable()
+    slices = set()
+    updated = 0
+    for start in range(0, len(pks), batch_size):
+        batch = list(
+            Accrual.objects.filter(pk__in=pks[start:start + batch_size]).defer("calculation_formula")
+        )
+        load_contracts((accrual.contract_id for accrual in batch), contracts)
+        for accrual in batch:
+            accrual.contract = contracts[accrual.contract_id]
+            accrual.update_calculation_formula(rates)
+        with transaction.atomic():
+            Accrual.objects.bulk_update(batch, Accrual.CALCULATED_FIELDS)
+        slices.update(payout_slices(batch))
+        updated += len(batch)
+        logger.info(f"Пересчитано начислений: {updated}/{len(pks)}")
+    refresh_payout_slices(slices)
+    return updated
+
+
+def contracts_for_threads(thread_ids) -> QuerySet:
+    """Контракты, в которых участвуют указанные образовательные потоки"""
+    return Contract.objects.filter(
+        Q(authors__thead__in=thread_ids) | Q(presenters__thead__in=thread_ids)
+    ).distinct()
+
+
+def contracts_for_persons(person_ids) -> QuerySet:
+    """Контракты, в которых участвуют указанные преподаватели"""
+    return Contract.objects.filter(
+        Q(authors__author__in=person_ids) | Q(presenters__presenter__in=person_ids)
+    ).distinct()
+
+
+def refresh_contract_summaries(contracts: QuerySet = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Пересчет сохраненных артикулов и участников контрактов пачками"""
+    if contracts is None:
+        contracts = Contract.objects.all()
+    pks = list(contracts.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(pks), batch_size):
+        batch = list(
+            Contract.objects.filter(pk__in=pks[start:start + batch_size])
+            .prefetch_related(*Contract.SUMMARY_PREFETCH)
+        )
+        for contract in batch:
+            contract.build_summaries()
+        Contract.objects.bulk_update(batch, Contract.SUMMARY_FIELDS)
+    if pks:
+        invalidate_autocomplete()
+    return len(pks)
+
+
+def save_contract_summaries(contract: Contract) -> None:
+    """Пересчет типа, артикулов и участников в самом объекте контракта и в базе.
+
+    Объект, у которого меняли авторов/ведущих, используется дальше (расчет
+    начислений, сохранение), поэтому значения обновляются и в нем.
+    """
+    prefetch_related_objects([contract], *Contract.SUMMARY_PREFETCH)
+    contract.build_summaries()
+    # Предзагруженные участники не должны остаться в объекте вызывающего кода
+    contract.refresh_from_db(fields=["authors", "presenters"])
+    Contract.objects.filter(pk=contract.pk).update(
+        **{field: getattr(contract, field) for field in Contract.SUMMARY_FIELDS}
+    )
+    invalidate_autocomplete()
+
+
+def month_start(value: Optional[datetime]) -> Optional[date]:
+    """Месяц сводки выплат для даты создания начисления (в текущей зоне)"""
+    if value is None:
+        return None
+    return timezone.localdate(value).replace(day=1)
+
+
+def months_condition(months: Iterable[Optional[date]]) -> Q:
+    """Начисления, созданные в указанных месяцах; None — начисления без даты"""
+    condition = Q(pk__in=[])
+    for month in months:
+        if month is None:
+            condition |= Q(created_at__isnull=True)
+            continue
+        following = (month + timedelta(days=32)).replace(day=1)
+        condition |= Q(
+            created_at__gte=timezone.make_aware(datetime.combine(month, time.min)),
+            created_at__lt=timezone.make_aware(datetime.combine(following, time.min)),
+        )
+    return condition
+
+
+def contract_persons(contract_ids: Iterable[int]) -> dict[int, set[int]]:
+    """Преподаватели контрактов в роли автора или ведущего"""
+    persons = defaultdict(set)
+    for through, path in (
+        (Contract.authors.through, "author__author"),
+        (Contract.presenters.through, "presenter__presenter"),
+    ):
+        rows = through.objects.filter(contract_id__in=contract_ids).values_list("contract_id", path)
+        for contract_id, person_id in rows:
+            persons[contract_id].add(person_id)
+    return persons
+
+
+def refresh_payout_summary(
+    contract_ids: Optional[Iterable[int]] = None,
+    months: Optional[Iterable[Optional[date]]] = None,
+) -> int:
+    """Пересборка сводки выплат по контрактам и/или месяцам (по умолчанию — целиком).
+
+    Строки выбранного среза удаляются и собираются заново одним агрегирующим
+    запросом по начислениям среза. Возвращает число записанных строк.
+    """
+    summary = PayoutSummary.objects.all()
+    accruals = Accrual.objects.filter(amount__isnull=False)
+    if contract_ids is not None:
+        contract_ids = set(contract_ids)
+        if not contract_ids:
+            return 0
+        summary = summary.filter(contract__in=contract_ids)
+        accruals = accruals.filter(contract__in=contract_ids)
+    if months is not None:
+        months = set(months)
+        if not months:
+            return 0
+        month_rows = Q(month__in=[month for month in months if month is not None])
+        if None in months:
+            month_rows |= Q(month__isnull=True)
+        summary = summary.filter(month_rows)
+        accruals = accruals.filter(months_condition(months))
+
+    with transaction.atomic():
+        groups = list(
+            accruals.annotate(month=TruncMonth("created_at", output_field=DateField()))
+            .values("month", "contract_id", "currency", "accrual_status", "payed")
+            .annotate(total=Sum("amount"), count=Count("pk"))
+            .order_by()
+        )
+        persons = contract_persons({group["contract_id"] for group in groups})
+        rows = [
+            PayoutSummary(person_id=person_id, **group)
+            for group in groups
+            for person_id in (None, *persons.get(group["contract_id"], ()))
+        ]
+        summary.delete()
+        PayoutSummary.objects.bulk_create(rows, batch_size=DEFAULT_BATCH_SIZE)
+    invalidate_dashboard()
+    return len(rows)
+
+
+def payout_slices(accruals: Iterable[Accrual]) -> set[tuple[int, Optional[date]]]:
+    """Срезы сводки (контракт, месяц), которые затрагивают начисления"""
+    return {(accrual.contract_id, month_start(accrual.created_at)) for accrual in accruals}
+
+
+def refresh_payout_slices(slices: Iterable[tuple[int, Optional[date]]]) -> None:
+    """Обновление сводки по затронутым срезам: один пересчет на месяц"""
+    contracts_by_month = defaultdict(set)
+    for contract_id, month in slices:
+        contracts_by_month[month].add(contract_id)
+    for month, contract_ids in contracts_by_month.items():
+        refresh_payout_summary(contract_ids, [month])
+
+
+# Срезы сводки, ожидающие пересчета после фиксации транзакции. Соединения
+# с базой у каждого потока свои, поэтому и набор срезов тоже
+pending_payout = threading.local()
+
+
+def schedule_payout_refresh(slices: Iterable[tuple[int, Optional[date]]]) -> None:
+    """Пересчет срезов сводки после фиксации транзакции, один раз на срез.
+
+    Срезы копятся в наборе потока; первый выполненный on_commit пересчитывает
+    все накопленные, остальные находят набор пустым. Вне транзакции пересчет
+    выполняется сразу.
+    """
+    if not hasattr(pending_payout, "slices"):
+        pending_payout.slices = set()
+    pending_payout.slices.update(slices)
+    transaction.on_commit(flush_payout_slices)
+
+
+def flush_payout_slices() -> None:
+    slices = getattr(pending_payout, "slices", None)
+    pending_payout.slices = set()
+    if slices:
+        refresh_payout_slices(slices)
+
+
+def update_accrual_status(
+    accruals: QuerySet,
+    changes: dict,
+    updated_by: Optional[Manager] = None,
+    user=None,
+) -> int:
+    """Массовая смена статуса или оплаты начислений одним UPDATE.
+
+    Поля статуса не влияют на сумму, поэтому Accrual.save() и пересчет формул
+    не вызываются. Начисления, уже находящиеся в нужном состоянии, не трогаются.
+    updated_by пишется тем же UPDATE; если передан пользователь админки,
+    в журнал админки одним bulk_create добавляются записи об изменении.
+    Сводка выплат обновляется по затронутым срезам. Возвращает число
+    измененных начислений.
+    """
+    unknown = set(changes) - {"accrual_status", "payed"}
+    if unknown:
+        raise ValueError(f"Массово меняются только поля статуса, не {', '.join(sorted(unknown))}")
+    values = dict(changes)
+    if updated_by is not None:
+        values["updated_by"] = updated_by
+
+    target = accruals.exclude(**changes).order_by()
+    with transaction.atomic():
+        rows = list(target.values_list("pk", "contract_id", "created_at"))
+        if not rows:
+            return 0
+        updated = target.update(**values)
+        if user is not None:
+            log_status_change(user, [pk for pk, _, _ in rows], changes)
+        refresh_payout_slices({(contract_id, month_start(created_at)) for _, contract_id, created_at in rows})
+    return updated
+
+
+def log_status_change(user, pks: list[int], changes: dict) -> None:
+    """Записи журнала админки об изменении начислений, как при сохранении формы"""
+    content_type = ContentType.objects.get_for_model(Accrual)
+    fields = [str(Accrual._meta.get_field(name).verbose_name) for name in changes]
+    message = json.dumps([{"changed": {"fields": fields}}])
+    LogEntry.objects.bulk_create(
+        (
+            LogEntry(
+                user_id=user.pk,
+                content_type=content_type,
+                object_id=str(pk),
+                object_repr=f"Начисление #{pk}",
+                action_flag=CHANGE,
+                change_message=message,
+            )
+            for pk in pks
+        ),
+        batch_size=DEFAULT_BATCH_SIZE,
+    )
+
+
+def verify_accruals(accruals: QuerySet, updated_by: Optional[Manager] = None, user=None) -> int:
+    return update_accrual_status(accruals, {"accrual_status": "verified"}, updated_by, user)
+
+
+def mark_accruals_paid(accruals: QuerySet, updated_by: Optional[Manager] = None, user=None) -> int:
+    return update_accrual_status(accruals, {"payed": True}, updated_by, user)
@@ -0,0 +1,207 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from accounts.models import Person
+from threads.models import Education_Thread
+from threads.signals import articul_changed
+from contracts.dashboard import invalidate_dashboard
+from contracts.fx import invalidate_rates
+from contracts.models import Contract, Author, Presenter, Accrual, ExchangeRate
+from dataverse.autocomplete import invalidate_autocomplete
+from contracts.services import (
+    contracts_for_persons,
+    contracts_for_threads,
+    month_start,
+    payout_slices,
+    refresh_contract_summaries,
+    refresh_payout_summary,
+    save_contract_summaries,
+    schedule_payout_refresh,
+)
+
+# Перед очисткой связей/удалением запоминаем затронутые контракты:
+# после операции связей в базе уже нет
+PENDING_CONTRACTS_ATTR = "_summary_contract_ids"
+# Срез сводки выплат начисления до изменения (контракт или дата могли поменяться)
+PENDING_PAYOUT_ATTR = "_payout_slice"
+
+
+def remember_contracts(instance, contracts) -> None:
+    setattr(instance, PENDING_CONTRACTS_ATTR, list(contracts.values_list("pk", flat=True)))
+
+
+def refresh_remembered(instance) -> None:
+    contract_ids = getattr(instance, PENDING_CONTRACTS_ATTR, None)
+    if contract_ids:
+        refresh_contract_summaries(Contract.objects.filter(pk__in=contract_ids))
+
+
+def participant_contracts(model, pks):
+    """Контракты авторов или ведущих с указанными id"""
+    if model is Author:
+        return Contract.objects.filter(authors__in=pks).distinct()
+    return Contract.objects.filter(presenters__in=pks).distinct()
+
+
+@receiver(m2m_changed, sender=Contract.authors.through)
+@receiver(m2m_changed, sender=Contract.presenters.through)
+def contract_participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Изменение состава авторов/ведущих контракта"""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            save_contract_summaries(instance)
+    elif action == "pre_clear":
+        remember_contracts(instance, instance.contracts.all())
+    elif action == "post_clear":
+        refresh_remembered(instance)
+    elif action in ("post_add", "post_remove"):
+        # Изменение со стороны Author/Presenter: pk_set содержит номера контрактов
+        refresh_contract_summaries(Contract.objects.filter(pk__in=pk_set))
+
+
+@receiver(m2m_changed, sender=Author.thead.through)
+@receiver(m2m_changed, sender=Presenter.thead.through)
+def participant_threads_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Изменение потоков у авторского/ведущего контракта"""
+    if not reverse:
+        contracts = instance.contracts.all()
+    elif pk_set:
+        # Изменение со стороны потока: pk_set содержит авторов или ведущих
+        contracts = participant_contracts(model, pk_set)
+    else:
+        contracts = contracts_for_threads([instance.pk])
+
+    if action == "pre_clear":
+        remember_contracts(instance, contracts)
+    elif action == "post_clear":
+        refresh_remembered(instance)
+    elif action in ("post_add", "post_remove"):
+        refresh_contract_summaries(contracts)
+
+
+@receiver(articul_changed, sender=Education_Thread)
+def thread_articul_changed(sender, instance, **kwargs):
+    """Обновляем только контракты, в которых участвует поток"""
+    refresh_contract_summaries(contracts_for_threads([instance.pk]))
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Presenter)
+def participant_saved(sender, instance, created, raw, **kwargs):
+    """Изменение процента/ставки участника"""
+    if not created and not raw:
+        refresh_contract_summaries(instance.contracts.all())
+
+
+@receiver(post_save, sender=Person)
+def person_saved(sender, instance, created, raw, **kwargs):
+    """Изменение имени преподавателя"""
+    if not created and not raw:
+        refresh_contract_summaries(contracts_for_persons([instance.pk]))
+
+
+@receiver(pre_delete, sender=Education_Thread)
+def thread_deleting(sender, instance, **kwargs):
+    remember_contracts(instance, contracts_for_threads([instance.pk]))
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Presenter)
+def participant_deleting(sender, instance, **kwargs):
+    remember_contracts(instance, instance.contracts.all())
+
+
+@receiver(pre_delete, sender=Person)
+def person_deleting(sender, instance, **kwargs):
+    remember_contracts(instance, contracts_for_persons([instance.pk]))
+
+
+@receiver(post_delete, sender=Education_Thread)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Presenter)
+@receiver(post_delete, sender=Person)
+def related_deleted(sender, instance, **kwargs):
+    refresh_remembered(instance)
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_save, sender=Education_Thread)
+@receiver(post_save, sender=Contract)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Presenter)
+@receiver(post_delete, sender=Person)
+@receiver(post_delete, sender=Education_Thread)
+@receiver(post_delete, sender=Contract)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Presenter)
+@receiver(m2m_changed, sender=Author.thead.through)
+@receiver(m2m_changed, sender=Presenter.thead.through)
+def label_source_changed(sender, **kwargs):
+    """Подписи автодополнения зависят от этих моделей"""
+    invalidate_autocomplete()
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def exchange_rate_changed(sender, **kwargs):
+    invalidate_rates()
+
+
+@receiver(post_save, sender=Accrual)
+@receiver(post_save, sender=Contract)
+@receiver(post_save, sender=Education_Thread)
+@receiver(post_delete, sender=Accrual)
+@receiver(post_delete, sender=Contract)
+@receiver(post_delete, sender=Education_Thread)
+def dashboard_source_changed(sender, **kwargs):
+    """Виджеты финансовой сводки зависят от этих моделей"""
+    invalidate_dashboard()
+
+
+@receiver(pre_save, sender=Accrual)
+def accrual_saving(sender, instance, raw, **kwargs):
+    if instance._state.adding or instance.pk is None:
+        return
+    previous = Accrual.objects.filter(pk=instance.pk).values_list("contract_id", "created_at").first()
+    if previous:
+        setattr(instance, PENDING_PAYOUT_ATTR, (previous[0], month_start(previous[1])))
+
+
+@receiver(post_save, sender=Accrual)
+@receiver(post_delete, sender=Accrual)
+def accrual_changed(sender, instance, **kwargs):
+    """Пересчет срезов сводки выплат (текущего и прежнего, если он отличается)
+    после фиксации транзакции, один раз на все изменения в ней"""
+    slices = payout_slices([instance])
+    previous = getattr(instance, PENDING_PAYOUT_ATTR, None)
+    if previous:
+        slices.add(previous)
+        delattr(instance, PENDING_PAYOUT_ATTR)
+    schedule_payout_refresh(slices)
+
+
+@receiver(m2m_changed, sender=Contract.authors.through)
+@receiver(m2m_changed, sender=Contract.presenters.through)
+def contract_persons_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Состав участников контракта меняет строки сводки выплат по преподавателям"""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        refresh_payout_summary([instance.pk])
+    elif action == "post_clear":
+        refresh_payout_summary(getattr(instance, PENDING_CONTRACTS_ATTR, None) or [])
+    else:
+        refresh_payout_summary(pk_set)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Presenter)
+def participant_person_saved(sender, instance, created, raw, **kwargs):
+    """Преподаватель автора/ведущего мог смениться"""
+    if not created and not raw:
+        refresh_payout_summary(instance.contracts.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Presenter)
+def participant_person_deleted(sender, instance, **kwargs):
+    refresh_payout_summary(getattr(instance, PENDING_CONTRACTS_ATTR, None) or [])
@@ -0,0 +1,904 @@
+import csv
+from datetime import date, datetime, timezone
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from importlib import import_module
+from decimal import Decimal
+from unittest import mock, skipIf
+from django.apps import apps
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import Person, Manager
+from threads.models import Education_Thread
+from contracts.admin import AccrualAdmin
+from contracts.dashboard import dashboard_data, dashboard_version, invalidate_dashboard
+from contracts.calculation import Actuals, AuthorTerms, PresenterTerms, calculate, evaluate, formula_text
+from contracts.encoders import dump_raw_data, load_raw_data
+from contracts.exports import EXPORT_HEADER, filter_accruals, iter_csv
+from contracts.forecasting import forecast, numpy
+from contracts.fx import RateTable
+from contracts.imports import import_accruals, submit_accruals
+from contracts.models import Contract, Author, Presenter, Accrual, ExchangeRate, PayoutSummary
+from contracts.reports import (
+    total_in_currency,
+    totals_by_contract,
+    totals_by_manager,
+    totals_by_month,
+    totals_by_person,
+    totals_by_thread,
+)
+from contracts.services import mark_accruals_paid, month_start, recalculate_accruals, verify_accruals
+from dataverse.testing import ContractFixturesMixin, IndexAssertionsMixin
+
+
+class ContractAdminChangelistTest(TestCase):
+    """Количество запросов списка контрактов не зависит от числа строк"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        cls.manager = Manager.objects.create(manager="Мария")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_contracts(self, count: int) -> None:
+        for number in range(count):
+            thread = Education_Thread.objects.create(
+                name=f"Поток {number}",
+                type_course="regular",
+                started_at=date(2025, 1, 1),
+                ended_at=date(2025, 3, 1),
+            )
+            author = Author.objects.create(
+                author=Person.objects.create(username=f"author{number}"),
+                revenue=Decimal("1000"),
+                reward_percent=Decimal("10"),
+            )
+            author.thead.add(thread)
+            presenter = Presenter.objects.create(
+                presenter=Person.objects.create(username=f"presenter{number}"),
+                estimate=Decimal("10"),
+                hourly_rate=Decimal("1500"),
+            )
+            presenter.thead.add(thread)
+            contract = Contract.objects.create(
+                started_at=date(2025, 1, 1),
+                ended_at=date(2025, 3, 1),
+                created_by=self.manager,
+                responsible_manager=self.manager,
+            )
+            contract.authors.add(author)
+            contract.presenters.add(presenter)
+
+    def count_changelist_queries(self) -> int:
+        # Число строк в шапке кэшируется, сравниваем запросы без кэша
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("admin:contracts_contract_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_query_count_is_constant(self):
+        self.create_contracts(2)
+        small_page = self.count_changelist_queries()
+        self.create_contracts(20)
+        large_page = self.count_changelist_queries()
+        self.assertEqual(small_page, large_page)
+
+    def test_search_by_contract_number(self):
+        self.create_contracts(1)
+        contract = Contract.objects.get()
+        for term, found in ((str(contract.pk), 1), ("²", 0), ("9" * 30, 0)):
+            response = self.client.get(reverse("admin:contracts_contract_changelist"), {"q": term})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context["cl"].result_count, found)
+
+
+class ContractSummaryTest(ContractFixturesMixin, TestCase):
+    """Сохраненные артикулы и участники обновляются сигналами"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.thread = Education_Thread.objects.create(
+            name="Python", type_course="regular",
+            started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1),
+        )
+
+    def stored(self, field: str) -> str:
+        # Потоки и участников меняли через другие объекты: читаем из базы
+        return Contract.objects.values_list(field, flat=True).get(pk=self.contract.pk)
+
+    def test_summaries_follow_related_changes(self):
+        self.author.thead.add(self.thread)
+        self.assertEqual(self.stored("articul_summary"), "PYT-2025-01-01-RG")
+        self.assertEqual(self.stored("authors_summary"), "ivan (10.0%)")
+
+        self.thread.type_course = "bootcamp"
+        self.thread.save()
+        self.assertEqual(self.stored("articul_summary"), "PYT-2025-01-01-BC")
+
+        self.thread.author_theads.clear()
+        self.assertEqual(self.stored("articul_summary"), "")
+
+    def assertKind(self, kind: str) -> None:
+        # Объект, у которого меняли участников, обновлен вместе с базой
+        self.assertEqual(self.contract.kind, kind)
+        self.assertEqual(Contract.objects.get(pk=self.contract.pk).kind, kind)
+
+    def test_kind_follows_participants(self):
+        presenter = Presenter.objects.create(
+            presenter=Person.objects.create(username="olga"), estimate=Decimal("10"), hourly_rate=Decimal("1500"),
+        )
+        self.assertKind("author")
+        self.contract.presenters.add(presenter)
+        self.assertKind("combined")
+        self.contract.authors.remove(self.author)
+        self.assertKind("presenter")
+        self.contract.presenters.clear()
+        self.assertKind("")
+        self.contract.authors.add(self.author)
+        self.assertKind("author")
+
+    def test_accrual_uses_updated_contract(self):
+        self.assertEqual(self.create_accrual().amount, Decimal("100.00"))
+
+    def test_save_keeps_summaries(self):
+        stale = Contract.objects.get(pk=self.contract.pk)
+        self.author.thead.add(self.thread)
+        stale.comment_manager = "Продлить"
+        stale.save()
+        self.contract.comment_manager = "Продлен"
+        self.contract.save(update_fields=["comment_manager", "articul_summary"])
+        self.assertEqual(
+            Contract.objects.filter(pk=self.contract.pk).values_list("kind", "articul_summary", "comment_manager").get(),
+            ("author", "PYT-2025-01-01-RG", "Продлен"),
+        )
+
+    def test_str_without_queries(self):
+        contract = Contract.objects.get(pk=self.contract.pk)
+        with self.assertNumQueries(0):
+            str(contract)
+
+
+class AccrualAdminKeysetTest(TestCase):
+    """Список начислений листается курсором без пропусков и повторов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        manager = Manager.objects.create(manager="Мария")
+        contract = Contract.objects.create(
+            started_at=date(2025, 1, 1),
+            ended_at=date(2025, 3, 1),
+            created_by=manager,
+            responsible_manager=manager,
+        )
+        ids = [
+            Accrual.objects.create(contract=contract, created_by=manager, accrual_flags="correction").pk
+            for _ in range(7)
+        ]
+        # Старые начисления без даты создания и одинаковые даты у соседних строк
+        Accrual.objects.filter(pk__in=ids[:2]).update(created_at=None)
+        Accrual.objects.filter(pk__in=ids[3:5]).update(created_at=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        # NULL идет первым, как в обратном проходе индекса PostgreSQL
+        cls.expected = [ids[1], ids[0], ids[6], ids[5], ids[2], ids[4], ids[3]]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    @mock.patch.object(AccrualAdmin, "list_per_page", 3)
+    def test_pages_follow_keyset_order(self):
+        changelist_url = reverse("admin:contracts_accrual_changelist")
+        url, seen = changelist_url, []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            changelist = response.context["cl"]
+            seen.extend(obj.pk for obj in changelist.result_list)
+            next_url = changelist.get_next_page_url()
+            url = next_url and changelist_url + next_url
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(changelist.result_count, 7)
+
+
+class AccrualIndexTest(IndexAssertionsMixin, TestCase):
+    """Фильтры админки начислений используют индексы (по плану EXPLAIN)"""
+
+    def test_status_and_payed_filter(self):
+        self.assertUsesIndex(
+            Accrual.objects.filter(accrual_status="pending", payed=False),
+            "accrual_status_payed_idx",
+        )
+
+    def test_contract_accruals_by_date(self):
+        self.assertUsesIndex(
+            Accrual.objects.filter(contract=1).order_by("created_at"),
+            "accrual_contract_created_idx",
+        )
+
+    def test_created_at_range(self):
+        self.assertUsesIndex(
+            Accrual.objects.filter(created_at__gte=datetime(2025, 1, 1, tzinfo=timezone.utc)),
+            "accrual_created_idx",
+        )
+
+    def test_unpaid_by_date(self):
+        self.assertUsesIndex(
+            Accrual.objects.filter(payed=False, created_at__gte=datetime(2025, 1, 1, tzinfo=timezone.utc)),
+            "accrual_unpaid_created_idx",
+        )
+
+
+class CalculationTest(SimpleTestCase):
+    """Расчет начислений без базы данных"""
+
+    author = AuthorTerms("ivan", Decimal("10.0"))
+    presenter = PresenterTerms("olga", Decimal("1000.0"))
+
+    def test_combined_contract(self):
+        raw_data, amount = evaluate(
+            (self.author,), (self.presenter,), Actuals(revenue=Decimal("5000"), hours=Decimal("3"))
+        )
+        self.assertEqual(amount, Decimal("3500.00"))
+        self.assertEqual(
+            formula_text(amount, raw_data),
+            "По авторскому: \n- ivan: 10.0% * 5000 rub = 500.00"
+            "\nПо ведущему: \n- olga: 3 ч. × 1000.0 rub/ч. = 3000.00"
+            "\nИтого: 3500.00 rub",
+        )
+
+    def test_missing_actuals(self):
+        # Нет фактических показателей — суммы нет, но это не ошибка расчета
+        with self.assertNoLogs("contracts.calculation", level="ERROR"):
+            self.assertIsNone(evaluate((self.author,), (), Actuals())[1])
+            self.assertIsNone(evaluate((), (self.presenter,), Actuals())[1])
+            self.assertIsNone(calculate({"authors": [{"reward_percent": "10"}], "total_revenue": None}))
+            self.assertEqual(evaluate((self.author,), (self.presenter,), Actuals())[1], Decimal("0.00"))
+
+    def test_invalid_data_is_logged(self):
+        with self.assertLogs("contracts.calculation", level="ERROR"):
+            self.assertIsNone(calculate({"authors": [{}], "total_revenue": "100"}))
+
+    def test_no_participants(self):
+        self.assertEqual(evaluate((), (), Actuals(revenue=Decimal("1"))), ({}, None))
+
+    def test_single_foreign_currency(self):
+        author = AuthorTerms("ivan", Decimal("10.0"), "usd")
+        presenter = PresenterTerms("olga", Decimal("20.0"), "usd")
+        raw_data, amount = evaluate((author,), (presenter,), Actuals(revenue=Decimal("100"), hours=Decimal("2")))
+        self.assertEqual((amount, raw_data["currency"]), (Decimal("50.00"), "usd"))
+        self.assertNotIn("rates", raw_data)
+
+    def test_mixed_currencies(self):
+        presenter = PresenterTerms("olga", Decimal("10.0"), "usd")
+        actuals = Actuals(revenue=Decimal("5000"), hours=Decimal("3"))
+        raw_data, amount = evaluate((self.author,), (presenter,), actuals, rate=lambda currency: Decimal("90"))
+        self.assertEqual((amount, raw_data["currency"]), (Decimal("3200.00"), "rub"))
+        self.assertEqual(calculate(load_raw_data(dump_raw_data(raw_data))), amount)
+        self.assertIn("3 ч. × 10.0 usd/ч. = 30.00 (× 90 = 2700.00 rub)", formula_text(amount, raw_data))
+        self.assertIsNone(evaluate((self.author,), (presenter,), actuals)[1])
+
+
+class FormulaStorageTest(ContractFixturesMixin, TestCase):
+    """raw_data сохраняется в JSONField и читается обратно без потери точности"""
+
+    reward_percent = Decimal("12.5")
+
+    def test_raw_data_round_trip(self):
+        accrual = self.create_accrual("1000.10")
+        expected = accrual.get_raw_data()
+
+        accrual = Accrual.objects.get(pk=accrual.pk)
+        stored = accrual.calculation_formula["raw_data"]
+        self.assertEqual(stored["total_revenue"], "1000.10")
+        self.assertEqual(load_raw_data(stored), expected)
+        self.assertEqual(load_raw_data(dump_raw_data(expected)), expected)
+        self.assertTrue(accrual.audit_calculation())
+        self.assertEqual(accrual.amount, Decimal("125.01"))
+
+
+class ReportsTest(ContractFixturesMixin, TestCase):
+    """Отчеты по начислениям: каждое начисление учитывается в группе один раз"""
+
+    def setUp(self):
+        self.python = Education_Thread.objects.create(
+            name="Python", type_course="regular", started_at=date(2025, 1, 1), ended_at=date(2025, 3, 31),
+        )
+        self.go = Education_Thread.objects.create(
+            name="Go", type_course="regular", started_at=date(2025, 1, 1), ended_at=date(2025, 3, 31),
+        )
+        # Два автора на одном потоке и ведущий на другом
+        petr = Author.objects.create(
+            author=Person.objects.create(username="petr"), revenue=Decimal("9000"), reward_percent=Decimal("10"),
+        )
+        self.contract.authors.add(petr)
+        for author in (self.author, petr):
+            author.thead.add(self.python)
+        presenter = Presenter.objects.create(
+            presenter=Person.objects.create(username="olga"), estimate=Decimal("10"), hourly_rate=Decimal("1500"),
+        )
+        presenter.thead.add(self.go, self.python)
+        self.contract.presenters.add(presenter)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.accrual = self.create_accrual(hours_worked=Decimal("2"))
+
+    def test_totals_by_thread_count_accrual_once(self):
+        amount = self.accrual.amount
+        self.assertEqual(
+            totals_by_thread(),
+            [
+                {"thread": self.python.pk, "currency": "rub", "total": amount, "count": 1},
+                {"thread": self.go.pk, "currency": "rub", "total": amount, "count": 1},
+            ],
+        )
+
+    def test_totals_by_contract_manager_and_month(self):
+        amount = self.accrual.amount
+        self.assertEqual(
+            [(row["contract"], row["total"], row["count"]) for row in totals_by_contract()],
+            [(self.contract.pk, amount, 1)],
+        )
+        self.assertEqual(
+            [(row["manager"], row["total"]) for row in totals_by_manager()], [(self.manager.pk, amount)]
+        )
+        self.assertEqual([row["count"] for row in totals_by_month()], [1])
+        # У каждого из трех преподавателей — все начисление целиком
+        self.assertEqual(sorted(row["total"] for row in totals_by_person()), [amount] * 3)
+
+
+class ExchangeRateTest(TestCase):
+    """Курсы на дату начисления: поиск с кэшем и пересчет итогов"""
+
+    def setUp(self):
+        cache.clear()
+        ExchangeRate.objects.create(date=date(2025, 1, 10), currency="usd", rate=Decimal("100"))
+        ExchangeRate.objects.create(date=date(2025, 2, 1), currency="usd", rate=Decimal("90"))
+
+    def test_rate_on_date_is_cached(self):
+        rates = RateTable()
+        # На выходные и праздники берется последний известный курс
+        self.assertEqual(rates.rate("usd", date(2025, 1, 31)), Decimal("100"))
+        with self.assertNumQueries(0):
+            self.assertEqual(RateTable().rate("usd", date(2025, 1, 31)), Decimal("100"))
+        self.assertIsNone(rates.rate("usd", date(2025, 1, 1)))
+        self.assertEqual(rates.rate("rub", date(2025, 1, 1)), Decimal(1))
+
+    def test_changes_invalidate_cache(self):
+        self.assertEqual(RateTable().rate("usd", date(2025, 2, 2)), Decimal("90"))
+        ExchangeRate.objects.create(date=date(2025, 2, 2), currency="usd", rate=Decimal("95"))
+        self.assertEqual(RateTable().rate("usd", date(2025, 2, 2)), Decimal("95"))
+
+    def test_load_command_reports_file_lines(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "rates.csv"
+            path.write_text("date,currency,rate\n2025-03-01,usd,91.5\n2025-03-02,eur,100\n", encoding="utf-8")
+            with self.assertRaisesMessage(CommandError, "Строка 3:"):
+                call_command("load_exchange_rates", str(path), stdout=StringIO())
+
+            path = Path(directory) / "rates.json"
+            for content in ('{"date": "2025-03-01"}', "[1, 2]", "[{"):
+                path.write_text(content, encoding="utf-8")
+                with self.assertRaises(CommandError):
+                    call_command("load_exchange_rates", str(path), stdout=StringIO())
+
+            path.write_text('[{"date": "2025-02-01", "currency": "USD", "rate": "92"}]', encoding="utf-8")
+            call_command("load_exchange_rates", str(path), stdout=StringIO())
+        self.assertEqual(ExchangeRate.objects.get(date=date(2025, 2, 1)).rate, Decimal("92"))
+
+    def test_total_in_currency(self):
+        manager = Manager.objects.create(manager="Мария")
+        contract = Contract.objects.create(
+            started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1), created_by=manager,
+        )
+        for created_at, amount, currency in (
+            (datetime(2025, 1, 15, tzinfo=timezone.utc), "10", "usd"),
+            (datetime(2025, 2, 15, tzinfo=timezone.utc), "10", "usd"),
+            (datetime(2025, 2, 15, tzinfo=timezone.utc), "500", "rub"),
+        ):
+            accrual = Accrual.objects.create(contract=contract, created_by=manager, accrual_flags="")
+            Accrual.objects.filter(pk=accrual.pk).update(
+                created_at=created_at, amount=Decimal(amount), currency=currency,
+            )
+        totals = total_in_currency(Accrual.objects.all())
+        self.assertEqual((totals["total"], totals["count"]), (Decimal("2400.00"), 3))
+        self.assertEqual(total_in_currency(Accrual.objects.all(), "usd")["total"], Decimal("25.56"))
+
+
+class ForecastTest(TestCase):
+    """Прогноз распределяет ожидаемые выплаты по дням окна контракта"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        manager = Manager.objects.create(manager="Мария")
+        cls.thread = Education_Thread.objects.create(
+            name="Python", type_course="regular", started_at=date(2025, 1, 1), ended_at=date(2025, 3, 31),
+        )
+        cls.person = Person.objects.create(username="ivan")
+        author = Author.objects.create(author=cls.person, revenue=Decimal("9000"), reward_percent=Decimal("10"))
+        presenter = Presenter.objects.create(
+            presenter=Person.objects.create(username="olga"), estimate=Decimal("10"), hourly_rate=Decimal("1500"),
+        )
+        author.thead.add(cls.thread)
+        # Окно контракта — 90 дней: январь 31, февраль 28, март 31
+        cls.contract = Contract.objects.create(
+            started_at=date(2025, 1, 1), ended_at=date(2025, 3, 31), created_by=manager,
+        )
+        cls.contract.authors.add(author)
+        cls.contract.presenters.add(presenter)
+        accrual = Accrual.objects.create(contract=cls.contract, created_by=manager, accrual_flags="")
+        Accrual.objects.filter(pk=accrual.pk).update(
+            created_at=datetime(2025, 2, 10, tzinfo=timezone.utc), amount=Decimal("1000"), currency="rub",
+        )
+
+    def test_forecast_by_month(self):
+        rows = forecast(group_by="month", start=date(2025, 1, 1), months=4, use_numpy=False)
+        self.assertEqual(
+            [(row.month, row.projected, row.actual) for row in rows],
+            [
+                (date(2025, 1, 1), Decimal("5476.67"), Decimal("0.00")),
+                (date(2025, 2, 1), Decimal("4946.67"), Decimal("1000.00")),
+                (date(2025, 3, 1), Decimal("5476.67"), Decimal("0.00")),
+            ],
+        )
+
+    def test_forecast_by_thread_and_person(self):
+        by_thread = forecast(group_by="thread", start=date(2025, 2, 1), months=1, use_numpy=False)
+        # Поток есть только у автора: 900 * 28 / 90
+        self.assertEqual(
+            [(row.key, row.projected, row.actual) for row in by_thread],
+            [(self.thread.pk, Decimal("280.00"), Decimal("1000.00"))],
+        )
+        by_person = forecast(group_by="person", start=date(2025, 2, 1), months=1, use_numpy=False)
+        self.assertIn((self.person.pk, Decimal("280.00")), [(row.key, row.projected) for row in by_person])
+        # Начисление не привязано к преподавателю: факт не сравнивается
+        self.assertEqual({(row.actual, row.variance) for row in by_person}, {(None, None)})
+
+    def test_thread_actual_counts_accrual_once(self):
+        # Второй участник в том же потоке не удваивает факт по потоку
+        self.contract.presenters.get().thead.add(self.thread)
+        rows = forecast(group_by="thread", start=date(2025, 2, 1), months=1, use_numpy=False)
+        self.assertEqual([(row.key, row.actual) for row in rows], [(self.thread.pk, Decimal("1000.00"))])
+
+    @skipIf(numpy is None, "NumPy не установлен")
+    def test_numpy_matches_decimal(self):
+        for group_by in ("contract", "person", "thread", "month"):
+            self.assertEqual(
+                forecast(group_by=group_by, start=date(2024, 12, 1), months=6, use_numpy=True),
+                forecast(group_by=group_by, start=date(2024, 12, 1), months=6, use_numpy=False),
+            )
+
+    def test_admin_dashboard(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("admin:contracts_contract_forecast"), {"by": "contract", "start": "2025-01", "months": "3"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"Контракт №{self.contract.pk}")
+
+
+class PayoutSummaryTest(ContractFixturesMixin, TestCase):
+    """Сводка выплат обновляется вместе с начислениями и совпадает с полной пересборкой"""
+
+    def create_accrual(self, revenue: str = "1000", **fields) -> Accrual:
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().create_accrual(revenue, **fields)
+
+    def summary(self) -> set:
+        return set(PayoutSummary.objects.values_list(
+            "month", "person", "contract", "currency", "accrual_status", "payed", "total", "count",
+        ))
+
+    def test_incremental_updates_match_rebuild(self):
+        first = self.create_accrual("1000")
+        second = self.create_accrual("500")
+        month = month_start(first.created_at)
+        self.assertEqual(
+            [(row["month"], row["total"], row["count"]) for row in totals_by_month()],
+            [(month, Decimal("150.00"), 2)],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.accrual_status = "verified"
+            second.save()
+            first.delete()
+        submit_accruals([{
+            "idempotency_key": "crm-1", "contract": self.contract.pk,
+            "created_by": self.manager.pk, "real_revenue": "2000",
+        }])
+        self.author.reward_percent = Decimal("20")
+        self.author.save()
+        recalculate_accruals(Accrual.objects.all())
+        self.assertEqual(
+            [(row["person"], row["total"], row["count"]) for row in totals_by_person()],
+            [(self.ivan.pk, Decimal("500.00"), 2)],
+        )
+
+        incremental = self.summary()
+        self.assertEqual(len(incremental), 4)
+        call_command("rebuild_payout_summary", stdout=StringIO())
+        self.assertEqual(self.summary(), incremental)
+
+    def test_refresh_once_per_transaction(self):
+        accrual = self.create_accrual("1000")
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for revenue in ("2000", "3000"):
+                    accrual.real_revenue = Decimal(revenue)
+                    accrual.save()
+                # До фиксации транзакции сводка не пересчитывается
+                self.assertEqual([row["total"] for row in totals_by_month()], [Decimal("100.00")])
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        summary_deletes = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith('DELETE FROM "contracts_payoutsummary"')
+        ]
+        self.assertEqual(len(summary_deletes), 1)
+        self.assertEqual([row["total"] for row in totals_by_month()], [Decimal("300.00")])
+
+    def test_migration_fills_summary(self):
+        self.create_accrual("1000")
+        self.create_accrual("500")
+        expected = self.summary()
+        PayoutSummary.objects.all().delete()
+        migration = import_module("contracts.migrations.0030_fill_payout_summary")
+        migration.fill_payout_summary(apps, None)
+        self.assertEqual(self.summary(), expected)
+
+    def test_participant_changes_update_person_rows(self):
+        self.create_accrual("1000")
+        olga = Person.objects.create(username="olga")
+        presenter = Presenter.objects.create(presenter=olga, estimate=Decimal("10"), hourly_rate=Decimal("1500"))
+        self.contract.presenters.add(presenter)
+        self.assertEqual(
+            set(PayoutSummary.objects.values_list("person", flat=True)), {None, self.ivan.pk, olga.pk}
+        )
+        presenter.delete()
+        self.assertEqual(set(PayoutSummary.objects.values_list("person", flat=True)), {None, self.ivan.pk})
+
+    def test_summary_export(self):
+        self.create_accrual("1000")
+        output = StringIO()
+        call_command("export_accruals", summary=True, payed=False, stdout=output)
+        # Итог по контракту и строка преподавателя
+        self.assertEqual(len(output.getvalue().splitlines()), 3)
+        self.assertIn(",ivan,", output.getvalue())
+
+
+class FinanceDashboardTest(ContractFixturesMixin, TestCase):
+    """Виджеты сводки кэшируются и сбрасываются при изменении начислений"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.accrual = self.create_accrual()
+
+    def test_widgets_are_cached_until_accruals_change(self):
+        data = dashboard_data()
+        self.assertEqual(
+            [(row["currency"], row["total"], row["count"]) for row in data["unpaid"]],
+            [("rub", Decimal("100.00"), 1)],
+        )
+        self.assertEqual(data["pending"], {"accruals": 1, "unpaid": 1})
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard_data(), data)
+
+        self.accrual.payed = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.accrual.save()
+        data = dashboard_data()
+        self.assertEqual(data["unpaid"], [])
+        self.assertEqual(data["months"][0]["paid"], Decimal("100.00"))
+
+    def test_top_persons_ranked_within_currency(self):
+        for username, revenue in (("olga", "50"), ("petr", "20")):
+            author = Author.objects.create(
+                author=Person.objects.create(username=username), revenue=Decimal("9000"),
+                reward_percent=Decimal("10"), currency="usd",
+            )
+            contract = Contract.objects.create(
+                started_at=date(2025, 1, 1), ended_at=date(2025, 12, 31), created_by=self.manager,
+            )
+            contract.authors.add(author)
+            with self.captureOnCommitCallbacks(execute=True):
+                Accrual.objects.create(
+                    contract=contract, created_by=self.manager, accrual_flags="", real_revenue=Decimal(revenue),
+                )
+        # Без рейтинга по валютам остался бы только ivan: 100 rub > 5 usd по числу
+        with mock.patch("contracts.dashboard.TOP_PERSONS", 1):
+            self.assertEqual(
+                [(row["person__username"], row["currency"], row["total"]) for row in dashboard_data()["persons"]],
+                [("ivan", "rub", Decimal("100.00")), ("olga", "usd", Decimal("5.00"))],
+            )
+
+    def test_version_survives_cache_clear(self):
+        version = dashboard_version()
+        invalidate_dashboard()
+        self.assertEqual(dashboard_version(), version + 1)
+        # После очистки кэша версия не возвращается к уже использованным
+        cache.clear()
+        self.assertGreater(dashboard_version(), version + 1)
+
+    def test_admin_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("admin:contracts_accrual_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "ivan")
+
+
+class AccrualStatusUpdateTest(ContractFixturesMixin, TestCase):
+    """Проверка и оплата начислений одним UPDATE без пересчета формул"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        cls.manager.user = cls.user
+        cls.manager.save(update_fields=["user"])
+
+    def setUp(self):
+        self.accruals = [self.create_accrual() for _ in range(3)]
+        # Пересчет изменил бы сумму: так видно, что его не было
+        Accrual.objects.update(real_revenue=Decimal("5000"))
+
+    def test_mark_paid_is_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            updated = mark_accruals_paid(Accrual.objects.all(), self.manager, self.user)
+        self.assertEqual(updated, 3)
+        accrual_updates = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "contracts_accrual"')
+        ]
+        self.assertEqual(len(accrual_updates), 1)
+        self.assertEqual(
+            set(Accrual.objects.values_list("payed", "updated_by", "amount")),
+            {(True, self.manager.pk, Decimal("100.00"))},
+        )
+        self.assertEqual(LogEntry.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(set(PayoutSummary.objects.values_list("payed", flat=True)), {True})
+        # Повтор ничего не меняет
+        self.assertEqual(mark_accruals_paid(Accrual.objects.all(), self.manager, self.user), 0)
+
+    def test_admin_action(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("admin:contracts_accrual_changelist"),
+            {"action": "mark_verified", "_selected_action": [self.accruals[0].pk, self.accruals[1].pk]},
+            follow=True,
+        )
+        self.assertContains(response, "Отмечено проверенными: 2")
+        self.assertEqual(verify_accruals(Accrual.objects.all()), 1)
+        self.assertEqual(Accrual.objects.filter(updated_by=self.manager).count(), 2)
+
+    def test_admin_action_without_manager(self):
+        other = get_user_model().objects.create_superuser("olga", "olga@example.com", "password")
+        Manager.objects.create(manager="olga")
+        self.client.force_login(other)
+        response = self.client.post(
+            reverse("admin:contracts_accrual_changelist"),
+            {"action": "mark_paid", "_selected_action": [self.accruals[0].pk]},
+            follow=True,
+        )
+        self.assertContains(response, "Отмечено оплаченными: 1")
+        self.assertContains(response, "Пользователь olga не привязан к менеджеру")
+        self.assertIsNone(Accrual.objects.get(pk=self.accruals[0].pk).updated_by)
+
+    def test_status_only_save_skips_recalculation(self):
+        accrual = self.accruals[0]
+        accrual.accrual_status = "verified"
+        with mock.patch.object(Accrual, "update_calculation_formula") as recalculate:
+            accrual.save(update_fields=["accrual_status"])
+        recalculate.assert_not_called()
+
+
+class AccrualImportTest(ContractFixturesMixin, TestCase):
+    """Загрузка начислений из файлов пачками с отчетом об ошибках"""
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write(self, name: str, content: str) -> str:
+        path = self.directory / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def import_file(self, path: str, **options) -> tuple[str, str]:
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_accruals", path, created_by=self.manager.pk, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_accruals_reports(self):
+        rows = [
+            (2, {"contract": str(self.contract.pk), "real_revenue": "1000"}),
+            (3, {"contract": "999", "real_revenue": "1000"}),
+            (4, {"contract": str(self.contract.pk), "real_revenue": "1 000"}),
+        ]
+        reports = list(import_accruals(rows, default_created_by=self.manager.pk))
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(
+            {key: reports[0][key] for key in ("batch", "rows", "valid", "created")},
+            {"batch": 1, "rows": 3, "valid": 1, "created": 1},
+        )
+        self.assertEqual([line for line, _ in reports[0]["errors"]], [3, 4])
+        self.assertEqual(list(Accrual.objects.values_list("amount", flat=True)), [Decimal("100.00")])
+        self.assertEqual(totals_by_contract()[0]["total"], Decimal("100.00"))
+
+    def test_jsonl_errors_per_batch(self):
+        path = self.write("accruals.jsonl", "\n".join([
+            f'{{"contract": {self.contract.pk}, "real_revenue": "1000"}}',
+            "[1, 2]",
+            "{broken",
+            f'{{"contract": {self.contract.pk}, "real_revenue": "500"}}',
+            '"text"',
+        ]))
+        stdout, stderr = self.import_file(path, batch_size=2)
+        self.assertIn("Пачка 1: строк 2, корректных 1, загружено 1, ошибок 1", stdout)
+        self.assertIn("Пачка 2: строк 2, корректных 1, загружено 1, ошибок 1", stdout)
+        self.assertIn("Пачка 3: строк 1, корректных 0, загружено 0, ошибок 1", stdout)
+        self.assertIn("строка 2: Строка должна быть JSON-объектом", stderr)
+        self.assertIn("строка 3: Некорректный JSON", stderr)
+        self.assertIn("строка 5: Строка должна быть JSON-объектом", stderr)
+        self.assertEqual(Accrual.objects.count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        path = self.write("accruals.csv", f"contract,real_revenue\n{self.contract.pk},1000\n")
+        stdout, _ = self.import_file(path, dry_run=True)
+        self.assertIn("Проверка завершена: строк 1, загружено 0, ошибок 0", stdout)
+        self.assertFalse(Accrual.objects.exists())
+        self.assertFalse(PayoutSummary.objects.exists())
+
+
+class AccrualExportTest(ContractFixturesMixin, TestCase):
+    """Потоковая CSV-выгрузка начислений: фильтры, заголовок и действие админки"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        cls.accruals = []
+        for revenue, status, payed, flag, month in (
+            ("1000", "verified", True, "correction", 1),
+            ("500", "pending", False, "", 2),
+            ("200", "pending", False, "collapsed", 3),
+        ):
+            accrual = Accrual.objects.create(
+                contract=cls.contract, created_by=cls.manager, real_revenue=Decimal(revenue),
+                accrual_status=status, payed=payed, accrual_flags=flag,
+            )
+            Accrual.objects.filter(pk=accrual.pk).update(created_at=datetime(2025, month, 10, 12, tzinfo=timezone.utc))
+            cls.accruals.append(accrual.pk)
+
+    def exported(self, **filters) -> list[int]:
+        return list(filter_accruals(Accrual.objects.all(), **filters).order_by("pk").values_list("pk", flat=True))
+
+    def parse(self, lines) -> list[list[str]]:
+        return list(csv.reader("".join(lines).splitlines()))
+
+    def test_filters(self):
+        first, second, third = self.accruals
+        self.assertEqual(self.exported(payed=False), [second, third])
+        self.assertEqual(self.exported(statuses=["verified"]), [first])
+        self.assertEqual(self.exported(flags=["collapsed", "correction"]), [first, third])
+        self.assertEqual(self.exported(date_from=date(2025, 2, 1), date_to=date(2025, 2, 28)), [second])
+
+    def test_header_bom_and_rows(self):
+        lines = list(iter_csv(Accrual.objects.all(), chunk_size=1))
+        self.assertTrue(lines[0].startswith("\ufeff"))
+        header, *rows = self.parse(lines)
+        self.assertEqual(header, ["\ufeff" + EXPORT_HEADER[0], *EXPORT_HEADER[1:]])
+        self.assertEqual([int(row[0]) for row in rows], self.accruals)
+        self.assertEqual([row[EXPORT_HEADER.index("Сумма")] for row in rows], ["100.00", "50.00", "20.00"])
+        self.assertTrue(all(row[-1] for row in rows))
+
+    def test_rows_are_streamed(self):
+        # Запрос выполняется только после заголовка, при чтении первой строки
+        with self.assertNumQueries(0):
+            lines = iter_csv(Accrual.objects.all())
+            next(lines)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(lines)), 3)
+
+    def test_command_filters(self):
+        output = StringIO()
+        call_command("export_accruals", payed=False, status=["pending"], flag=["collapsed"], stdout=output)
+        rows = self.parse([output.getvalue()])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [self.accruals[2]])
+
+    def test_admin_export_action(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("admin:contracts_accrual_changelist"),
+            {"action": "export_csv", "_selected_action": self.accruals[:2]},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertRegex(response["Content-Disposition"], r'^attachment; filename="accruals_\d{4}-\d{2}-\d{2}\.csv"$')
+        rows = self.parse(chunk.decode() for chunk in response.streaming_content)
+        self.assertEqual([int(row[0]) for row in rows[1:]], self.accruals[:2])
+
+
+class RecalculateAccrualsTest(ContractFixturesMixin, TestCase):
+    """Пакетный пересчет формул начислений после изменения ставок"""
+
+    def setUp(self):
+        self.python, self.go = (
+            Education_Thread.objects.create(
+                name=name, type_course="regular", started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1),
+            )
+            for name in ("Python", "Go")
+        )
+        self.author.thead.add(self.python)
+        # Второй контракт: автор olga (20%) на другом потоке
+        olga = Author.objects.create(
+            author=Person.objects.create(username="olga"), revenue=Decimal("9000"), reward_percent=Decimal("20"),
+        )
+        olga.thead.add(self.go)
+        contract = Contract.objects.create(
+            started_at=date(2025, 1, 1), ended_at=date(2025, 12, 31), created_by=self.manager,
+        )
+        contract.authors.add(olga)
+        self.contracts = [self.contract, contract]
+        self.first, self.second, self.old = (
+            Accrual.objects.create(
+                contract=contract, created_by=self.manager, accrual_flags="", real_revenue=Decimal("1000"),
+            )
+            for contract in (self.contracts[0], self.contracts[1], self.contracts[0])
+        )
+        Accrual.objects.filter(pk=self.old.pk).update(created_at=datetime(2024, 1, 10, 12, tzinfo=timezone.utc))
+        self.formulas = dict(Accrual.objects.values_list("pk", "calculation_formula"))
+        # Новые ставки без сохранения начислений: суммы устарели
+        Author.objects.update(reward_percent=Decimal("50"))
+
+    def amounts(self) -> dict:
+        return dict(Accrual.objects.values_list("pk", "amount"))
+
+    def recalculate(self, **options) -> None:
+        call_command("recalculate_accruals", stdout=StringIO(), **options)
+
+    def test_rewrites_amount_and_formula_in_batches(self):
+        with mock.patch.object(Accrual.objects, "bulk_update", wraps=Accrual.objects.bulk_update) as bulk_update:
+            self.assertEqual(recalculate_accruals(Accrual.objects.all(), batch_size=2), 3)
+        self.assertEqual([len(call.args[0]) for call in bulk_update.call_args_list], [2, 1])
+        self.assertEqual(set(self.amounts().values()), {Decimal("500.00")})
+        for accrual in Accrual.objects.all():
+            self.assertNotEqual(accrual.calculation_formula, self.formulas[accrual.pk])
+            self.assertIn("500.00", accrual.calculation_formula["formula"])
+        # Сводка выплат обновлена по пересчитанным суммам
+        self.assertEqual(sum(row["total"] for row in totals_by_contract()), Decimal("1500.00"))
+
+    def test_command_since(self):
+        self.recalculate(since=date(2025, 1, 1))
+        self.assertEqual(
+            self.amounts(),
+            {self.first.pk: Decimal("500.00"), self.second.pk: Decimal("500.00"), self.old.pk: Decimal("100.00")},
+        )
+
+    def test_command_contract(self):
+        self.recalculate(contract=[self.contracts[1].pk])
+        self.assertEqual(
+            self.amounts(),
+            {self.first.pk: Decimal("100.00"), self.second.pk: Decimal("500.00"), self.old.pk: Decimal("100.00")},
+        )
+
+    def test_command_thread(self):
+        self.recalculate(thread=[self.python.pk], batch_size=1)
+        self.assertEqual(
+            self.amounts(),
+            {self.first.pk: Decimal("500.00"), self.second.pk: Decimal("200.00"), self.old.pk: Decimal("500.00")},
+        )
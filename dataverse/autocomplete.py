@@ -0,0 +1,101 @@
+import hashlib
+from django.conf import settings
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db.models import Aggregate, CharField
+from django.http import JsonResponse
+from contracts.fx import initial_version
+
+VERSION_KEY = "autocomplete:version"
+# Аннотация с готовой подписью; без нее подпись строится через __str__
+LABEL_ANNOTATION = "autocomplete_label"
+
+
+def autocomplete_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_autocomplete() -> None:
+    """Сброс всех закэшированных подсказок (после изменения моделей из подписей)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, initial_version(), timeout=None)
+
+
+class GroupConcat(Aggregate):
+    """Строки группы через запятую (GROUP_CONCAT в SQLite, STRING_AGG в PostgreSQL)"""
+    function = "GROUP_CONCAT"
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="%(function)s(%(expressions)s, ', ')", **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="%(function)s(%(expressions)s SEPARATOR ', ')", **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, function="STRING_AGG", template="%(function)s(%(expressions)s::text, ', ')",
+            **extra_context
+        )
+
+
+class CachedAutocompleteJsonView(AutocompleteJsonView):
+    """Автодополнение админки с кратковременным кэшем ответа по поисковой строке"""
+
+    def get(self, request, *args, **kwargs):
+        (
+            self.term,
+            self.model_admin,
+            self.source_field,
+            to_field_name,
+        ) = self.process_request(request)
+
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            self.object_list = self.get_queryset()
+            context = self.get_context_data()
+            data = {
+                "results": [
+                    self.serialize_result(obj, to_field_name)
+                    for obj in context["object_list"]
+                ],
+                "pagination": {"more": context["page_obj"].has_next()},
+            }
+            cache.set(key, data, settings.AUTOCOMPLETE_CACHE_TIMEOUT)
+        return JsonResponse(data)
+
+    def get_queryset(self):
+        """Подписи одним запросом, если админка модели умеет их аннотировать
+        (annotate_autocomplete_labels); prefetch для __str__ тогда не нужен"""
+        queryset = super().get_queryset()
+        annotate = getattr(self.model_admin, "annotate_autocomplete_labels", None)
+        if annotate is None:
+            return queryset
+        return annotate(queryset.prefetch_related(None))
+
+    def serialize_result(self, obj, to_field_name):
+        if not hasattr(obj, LABEL_ANNOTATION):
+            return super().serialize_result(obj, to_field_name)
+        return {"id": str(getattr(obj, to_field_name)), "text": getattr(obj, LABEL_ANNOTATION)}
+
+    def get_cache_key(self, request) -> str:
+        params = "|".join((
+            request.GET["app_label"],
+            request.GET["model_name"],
+            request.GET["field_name"],
+            request.GET.get(self.page_kwarg, "1"),
+            self.term,
+        ))
+        digest = hashlib.md5(params.encode(), usedforsecurity=False).hexdigest()
+        return f"autocomplete:{autocomplete_version()}:{digest}"
@@ -0,0 +1,178 @@
+import base64
+import hashlib
+import json
+from django.conf import settings
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+CURSOR_VAR = "after"
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор без COUNT(*) на каждый запрос.
+
+    Для списка без фильтров на PostgreSQL берется оценка планировщика
+    (pg_class.reltuples), иначе точный COUNT кэшируется на
+    ADMIN_COUNT_CACHE_TIMEOUT секунд по тексту SQL.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        estimate = self.planner_estimate(queryset)
+        if estimate is not None:
+            return estimate
+        sql, params = queryset.query.sql_with_params()
+        raw = f"{queryset.db}|{sql}|{params!r}"
+        digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+        return cache.get_or_set(
+            f"admin-count:{digest}", queryset.count, settings.ADMIN_COUNT_CACHE_TIMEOUT
+        )
+
+    @staticmethod
+    def planner_estimate(queryset) -> int | None:
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql" or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1 — таблица еще не анализировалась, на маленьких таблицах оценка неточна
+        if not row or row[0] < settings.ADMIN_COUNT_ESTIMATE_THRESHOLD:
+            return None
+        return row[0]
+
+
+def encode_cursor(values) -> str:
+    # isoformat без округления до миллисекунд, как в DjangoJSONEncoder: иначе строки
+    # с одинаковой до миллисекунды датой выпадут из выдачи
+    values = [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+    data = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fields) -> list | None:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if len(values) != len(fields):
+            return None
+        return [
+            None if value is None else field.to_python(value)
+            for field, value in zip(fields, values)
+        ]
+    except Exception:
+        return None
+
+
+class KeysetChangeList(ChangeList):
+    """Список админки с переходом по курсору (keyset) вместо OFFSET.
+
+    Пока пользователь не выбрал другую сортировку, страницы строятся запросом
+    «строки после последней показанной» в порядке keyset_ordering, поэтому
+    дальние страницы открываются так же быстро, как первая.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.next_cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    @property
+    def keyset(self) -> bool:
+        return ORDER_VAR not in self.params and not self.show_all
+
+    def get_keyset_fields(self):
+        fields = []
+        for name in self.model_admin.keyset_ordering:
+            field_name = name.lstrip("-")
+            field = self.opts.pk if field_name == "pk" else self.opts.get_field(field_name)
+            fields.append((field, name.startswith("-")))
+        return fields
+
+    def get_results(self, request):
+        if not self.keyset:
+            self.params.pop(CURSOR_VAR, None)
+            return super().get_results(request)
+
+        keyset_fields = self.get_keyset_fields()
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        # NULL считается наибольшим значением, как в индексах PostgreSQL
+        queryset = self.queryset.order_by(*(
+            F(field.attname).desc(nulls_first=True) if descending
+            else F(field.attname).asc(nulls_last=True)
+            for field, descending in keyset_fields
+        ))
+        if self.cursor:
+            values = decode_cursor(self.cursor, [field for field, _ in keyset_fields])
+            if values is not None:
+                queryset = queryset.filter(seek_condition(keyset_fields, values))
+        rows = list(queryset[:self.list_per_page + 1])
+        if len(rows) > self.list_per_page:
+            rows = rows[:self.list_per_page]
+            last = rows[-1]
+            self.next_cursor = encode_cursor([
+                field.value_from_object(last) for field, _ in keyset_fields
+            ])
+
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+        self.paginator = paginator
+
+    def get_first_page_url(self) -> str:
+        return self.get_query_string(remove=[CURSOR_VAR])
+
+    def get_next_page_url(self) -> str | None:
+        if self.next_cursor is None:
+            return None
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+
+def seek_condition(keyset_fields, values) -> Q:
+    """Условие «строка идет после курсора»; NULL больше любого значения"""
+    condition = Q(pk__in=[])
+    prefix = Q()
+    for (field, descending), value in zip(keyset_fields, values):
+        name = field.attname
+        if value is None:
+            # По убыванию после NULL идут все заполненные значения, по возрастанию — ничего
+            if descending:
+                condition |= prefix & Q(**{f"{name}__isnull": False})
+            prefix &= Q(**{f"{name}__isnull": True})
+            continue
+        after = Q(**{f"{name}__lt": value}) if descending else Q(**{f"{name}__gt": value})
+        if field.null and not descending:
+            after |= Q(**{f"{name}__isnull": True})
+        condition |= prefix & after
+        prefix &= Q(**{name: value})
+    return condition
+
+
+class KeysetPaginationMixin:
+    """Keyset-пагинация и приблизительный счетчик для больших списков админки"""
+
+    keyset_ordering = ("-pk",)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Optional
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_read_from_replica = ContextVar("read_from_replica", default=False)
+
+
+def replica_alias() -> str:
+    """База для тяжелых чтений: реплика, если она настроена и нет открытой транзакции"""
+    alias = settings.REPLICA_DATABASE_ALIAS
+    if not alias or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        # Внутри транзакции читаем с основной базы, чтобы видеть свои же записи
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+@contextmanager
+def use_replica():
+    """Чтения внутри блока идут на реплику; запись всегда на основную базу"""
+    token = _read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+def replica_view(view):
+    """Декоратор для синхронных и асинхронных представлений, читающих с реплики"""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            with use_replica():
+                return await view(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Маршрутизация чтений на реплику по явному запросу (use_replica/replica_view)"""
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        if _read_from_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # Реплика содержит те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        return db == DEFAULT_DB_ALIAS
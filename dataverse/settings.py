@@ -12,7 +12,7 @@ DEBUG = env.bool('DEBUG', default=False)
 
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', [])
 
-CSRF_TRUSTED_ORIGINS = ["",]
+CSRF_TRUSTED_ORIGINS = env.list('CSRF_TRUSTED_ORIGINS', [])
 
 
 INSTALLED_APPS = [
@@ -25,6 +25,9 @@ INSTALLED_APPS = [
     'contracts',
     'threads',
     'accounts',
+    'search',
+    'api',
+    'profiling',
 ]
 
 MIDDLEWARE = [
@@ -57,13 +60,94 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'dataverse.wsgi.application'
 
+
+def configure_database(database: dict) -> dict:
+    """Параметры соединения в зависимости от СУБД"""
+    if database['ENGINE'] == 'django.db.backends.postgresql':
+        if env.bool('DATABASE_POOL', default=True):
+            # Встроенный пул соединений psycopg несовместим с постоянными соединениями
+            database['CONN_MAX_AGE'] = 0
+            database.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=2),
+                'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+                'timeout': env.int('DATABASE_POOL_TIMEOUT', default=10),
+            }
+        else:
+            database['CONN_MAX_AGE'] = env.int('DATABASE_CONN_MAX_AGE', default=60)
+    elif database['ENGINE'] == 'django.db.backends.sqlite3':
+        # WAL позволяет читать во время записи, busy_timeout — ждать блокировку вместо "database is locked"
+        database.setdefault('OPTIONS', {}).update({
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA busy_timeout={env.int('SQLITE_BUSY_TIMEOUT', default=5000)};"
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        })
+    return database
+
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': configure_database(env.dj_db_url(
+        'DATABASE_URL',
+        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        conn_health_checks=True,
+    )),
 }
 
+# Реплика для отчетов и выгрузок (см. dataverse/routers.py)
+REPLICA_DATABASE_ALIAS = None
+if env.str('REPLICA_DATABASE_URL', default=''):
+    REPLICA_DATABASE_ALIAS = 'replica'
+    DATABASES[REPLICA_DATABASE_ALIAS] = configure_database(env.dj_db_url(
+        'REPLICA_DATABASE_URL',
+        conn_health_checks=True,
+    ))
+    # В тестах реплика указывает на ту же базу, что и default
+    DATABASES[REPLICA_DATABASE_ALIAS]['TEST'] = {'MIRROR': 'default'}
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    # Триграммные lookups для поиска (search/index.py)
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+DATABASE_ROUTERS = ['dataverse.routers.ReplicaRouter']
+
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', default='locmem://'),
+}
+
+# Время жизни подсказок автодополнения в админке, секунды
+AUTOCOMPLETE_CACHE_TIMEOUT = env.int('AUTOCOMPLETE_CACHE_TIMEOUT', default=30)
+
+# Время жизни курсов валют в общем кэше, секунды (сбрасываются при загрузке курсов)
+FX_CACHE_TIMEOUT = env.int('FX_CACHE_TIMEOUT', default=24 * 60 * 60)
+
+# Время жизни виджетов финансовой сводки в админке, секунды
+# (сбрасываются раньше при изменении начислений и контрактов)
+DASHBOARD_CACHE_TIMEOUT = env.int('DASHBOARD_CACHE_TIMEOUT', default=10 * 60)
+
+# Счетчик строк в списках админки (dataverse/pagination.py): время жизни
+# закэшированного COUNT и минимальный размер таблицы для оценки планировщика
+ADMIN_COUNT_CACHE_TIMEOUT = env.int('ADMIN_COUNT_CACHE_TIMEOUT', default=60)
+ADMIN_COUNT_ESTIMATE_THRESHOLD = env.int('ADMIN_COUNT_ESTIMATE_THRESHOLD', default=100000)
+
+# JSON API (/api/): токены внешних систем и размер страницы
+API_TOKENS = env.list('API_TOKENS', [])
+API_PAGE_SIZE = env.int('API_PAGE_SIZE', default=50)
+API_MAX_PAGE_SIZE = env.int('API_MAX_PAGE_SIZE', default=500)
+API_MAX_BATCH_SIZE = env.int('API_MAX_BATCH_SIZE', default=1000)
+
+# Выборочное профилирование запросов к базе (profiling/middleware.py):
+# доля профилируемых запросов от 0 до 1, 0 — выключено
+QUERY_PROFILING_SAMPLE_RATE = env.float('QUERY_PROFILING_SAMPLE_RATE', default=0.0)
+QUERY_PROFILING_LOG = env.str('QUERY_PROFILING_LOG', default=str(BASE_DIR / 'logs' / 'query_profile.jsonl'))
+QUERY_PROFILING_MAX_BYTES = env.int('QUERY_PROFILING_MAX_BYTES', default=10 * 1024 * 1024)
+QUERY_PROFILING_BACKUPS = env.int('QUERY_PROFILING_BACKUPS', default=5)
+
+if QUERY_PROFILING_SAMPLE_RATE:
+    # Первым в списке, чтобы время ответа включало все остальные middleware
+    MIDDLEWARE.insert(0, 'profiling.middleware.QueryProfilingMiddleware')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -0,0 +1,42 @@
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from accounts.models import Manager, Person
+from contracts.models import Accrual, Author, Contract
+
+
+class IndexAssertionsMixin:
+    """Проверка, что запрос использует индекс (по плану EXPLAIN)"""
+
+    def assertUsesIndex(self, queryset, index_name: str) -> None:
+        if connection.vendor == "postgresql":
+            # На пустых таблицах планировщик предпочитает последовательное чтение
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        self.assertIn(index_name, queryset.explain())
+
+
+class ContractFixturesMixin:
+    """Менеджер, автор ivan (оборот 9000, reward_percent) и его контракт на 2025 год"""
+
+    reward_percent = Decimal("10")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.manager = Manager.objects.create(manager="Мария")
+        cls.ivan = Person.objects.create(username="ivan")
+        cls.author = Author.objects.create(
+            author=cls.ivan, revenue=Decimal("9000"), reward_percent=cls.reward_percent,
+        )
+        cls.contract = Contract.objects.create(
+            started_at=date(2025, 1, 1), ended_at=date(2025, 12, 31),
+            created_by=cls.manager, responsible_manager=cls.manager,
+        )
+        cls.contract.authors.add(cls.author)
+
+    def create_accrual(self, revenue: str = "1000", **fields) -> Accrual:
+        fields.setdefault("accrual_flags", "")
+        return Accrual.objects.create(
+            contract=self.contract, created_by=self.manager, real_revenue=Decimal(revenue), **fields,
+        )
@@ -0,0 +1,112 @@
+from datetime import date
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import Person
+from contracts.models import Accrual, Author
+from threads.models import Education_Thread
+from dataverse.autocomplete import autocomplete_version, invalidate_autocomplete
+from dataverse.routers import ReplicaRouter, replica_view, use_replica
+
+
+@override_settings(REPLICA_DATABASE_ALIAS="replica")
+class ReplicaRouterTest(SimpleTestCase):
+    """Чтения уходят на реплику только по явному запросу"""
+
+    router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Accrual))
+
+    def test_use_replica_block(self):
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Accrual), "replica")
+            self.assertEqual(self.router.db_for_write(Accrual), DEFAULT_DB_ALIAS)
+        self.assertIsNone(self.router.db_for_read(Accrual))
+
+    def test_view_decorators(self):
+        @replica_view
+        def view():
+            return self.router.db_for_read(Accrual)
+
+        @replica_view
+        async def async_view():
+            return self.router.db_for_read(Accrual)
+
+        self.assertEqual(view(), "replica")
+        self.assertEqual(async_to_sync(async_view)(), "replica")
+
+    @override_settings(REPLICA_DATABASE_ALIAS=None)
+    def test_without_replica(self):
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Accrual), DEFAULT_DB_ALIAS)
+
+
+@override_settings(REPLICA_DATABASE_ALIAS="replica")
+class ReplicaRouterTransactionTest(TestCase):
+
+    def test_reads_inside_transaction_use_primary(self):
+        with use_replica():
+            self.assertEqual(ReplicaRouter().db_for_read(Accrual), DEFAULT_DB_ALIAS)
+
+
+class CachedAutocompleteTest(TestCase):
+    """Подсказки автодополнения кэшируются и сбрасываются при сохранении"""
+
+    params = {"app_label": "contracts", "model_name": "author", "field_name": "thead", "term": "pyt"}
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        self.thread = Education_Thread.objects.create(
+            name="Python", type_course="regular",
+            started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1),
+        )
+
+    def get_labels(self, params=None) -> list[str]:
+        response = self.client.get(reverse("admin:autocomplete"), params or self.params)
+        self.assertEqual(response.status_code, 200)
+        return [result["text"] for result in response.json()["results"]]
+
+    def test_cached_until_save(self):
+        self.assertEqual(self.get_labels(), ["Python - PYT-2025-01-01-RG"])
+        Education_Thread.objects.filter(pk=self.thread.pk).update(name="Python 3")
+        self.assertEqual(self.get_labels(), ["Python - PYT-2025-01-01-RG"])
+
+        self.thread.name = "Python 3"
+        self.thread.save()
+        self.assertEqual(self.get_labels(), ["Python 3 - PYT-2025-01-01-RG"])
+
+    def test_version_survives_cache_clear(self):
+        version = autocomplete_version()
+        invalidate_autocomplete()
+        cache.clear()
+        self.assertGreater(autocomplete_version(), version + 1)
+
+    def test_participant_labels_in_one_query(self):
+        params = {"app_label": "contracts", "model_name": "contract", "field_name": "authors", "term": "ivan"}
+        go = Education_Thread.objects.create(
+            name="Go", type_course="regular", started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1),
+        )
+        authors = []
+        for threads in ([self.thread, go], [], [go]):
+            author = Author.objects.create(
+                author=Person.objects.create(username=f"ivan{len(authors)}"),
+                revenue=Decimal("9000"), reward_percent=Decimal("10"),
+            )
+            author.thead.set(threads)
+            authors.append(author)
+
+        with CaptureQueriesContext(connection) as queries:
+            labels = self.get_labels(params)
+        self.assertCountEqual(labels, [str(author) for author in authors])
+        self.assertFalse([
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith('SELECT ("contracts_author_thead"')
+        ])
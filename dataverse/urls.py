@@ -1,6 +1,13 @@
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
+from dataverse.autocomplete import CachedAutocompleteJsonView
 
 urlpatterns = [
+    # Перехватывает стандартный admin:autocomplete (тот же адрес), добавляя кэш
+    path(
+        'admin/autocomplete/',
+        admin.site.admin_view(CachedAutocompleteJsonView.as_view(admin_site=admin.site)),
+    ),
     path('admin/', admin.site.urls),
+    path('api/', include('api.urls')),
 ]
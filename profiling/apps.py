@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+class ProfilingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'profiling'
+    verbose_name = "Профилирование запросов"
+
+    def ready(self):
+        if settings.QUERY_PROFILING_SAMPLE_RATE:
+            from profiling.middleware import install_query_recorder
+            connection_created.connect(install_query_recorder)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from profiling.report import SORT_KEYS, read_records, summarize
+
+
+class Command(BaseCommand):
+    help = "Топ медленных представлений по журналу профилировщика запросов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", default=str(settings.QUERY_PROFILING_LOG), help="Файл журнала")
+        parser.add_argument("--top", type=int, default=10, help="Сколько представлений показать")
+        parser.add_argument(
+            "--sort",
+            choices=SORT_KEYS,
+            default="wall",
+            help="Сортировка: среднее время ответа, время в базе, число запросов или число обращений"
+        )
+        parser.add_argument("--since", help="Учитывать записи начиная с даты/времени (ISO, например 2025-06-01)")
+
+    def handle(self, *args, **options):
+        if options["top"] <= 0:
+            raise CommandError("--top должен быть больше нуля")
+        rows = summarize(read_records(options["log"], options["since"]), options["sort"], options["top"])
+        if not rows:
+            self.stdout.write("Записей профилировщика нет")
+            return
+
+        self.stdout.write(
+            f"{'Представление':<50} {'Обращ.':>7} {'Ср. мс':>9} {'p95 мс':>9} "
+            f"{'БД мс':>9} {'Запр.':>7} {'Макс.':>6}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{str(row['view'])[:50]:<50} {row['requests']:>7} {row['wall']:>9.1f} "
+                f"{row['wall_p95']:>9.1f} {row['db']:>9.1f} {row['queries']:>7.1f} {row['max_queries']:>6}"
+            )
+            if row["duplicate_count"] > 1:
+                self.stdout.write(f"    повтор x{row['duplicate_count']}: {row['duplicate_sql'][:120]}")
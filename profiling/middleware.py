@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+logger = logging.getLogger("profiling.queries")
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("query_profile", default=None)
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+DUPLICATES_IN_RECORD = 5
+
+
+def fingerprint(sql: str) -> str:
+    """Шаблон запроса без параметров; списки IN разной длины считаются одним запросом"""
+    return IN_LIST.sub("IN (...)", sql)
+
+
+class RequestProfile:
+    """Запросы к базе, выполненные в рамках одного запроса к сайту"""
+
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = Counter()
+        self.db_time = 0.0
+
+    def record(self, sql: str, duration: float) -> None:
+        self.queries[fingerprint(sql)] += 1
+        self.db_time += duration
+
+
+def record_query(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    """Обертка выполнения запросов ставится один раз на каждое соединение.
+
+    Она работает и в потоках sync_to_async асинхронных представлений:
+    профиль запроса передается через ContextVar.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def configure_logger() -> None:
+    if logger.handlers:
+        return
+    path = Path(settings.QUERY_PROFILING_LOG)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.QUERY_PROFILING_MAX_BYTES,
+        backupCount=settings.QUERY_PROFILING_BACKUPS,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class QueryProfilingMiddleware:
+    """Выборочное профилирование запросов к базе по представлениям.
+
+    Для доли запросов QUERY_PROFILING_SAMPLE_RATE в JSONL-файл с ротацией
+    пишутся число запросов к базе, время в базе, повторяющиеся запросы
+    и общее время ответа. Остальные запросы не профилируются.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.QUERY_PROFILING_SAMPLE_RATE
+        configure_logger()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        self.write(request, response, profile, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        self.write(request, response, profile, time.perf_counter() - started)
+        return response
+
+    def write(self, request, response, profile: RequestProfile, wall_time: float) -> None:
+        match = request.resolver_match
+        duplicates = [
+            {
+                "fingerprint": hashlib.md5(sql.encode(), usedforsecurity=False).hexdigest()[:12],
+                "count": count,
+                "sql": sql[:300],
+            }
+            for sql, count in profile.queries.most_common(DUPLICATES_IN_RECORD)
+            if count > 1
+        ]
+        logger.info(json.dumps({
+            "ts": timezone.now().isoformat(),
+            "view": (match.view_name or match._func_path) if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "wall_ms": round(wall_time * 1000, 2),
+            "db_ms": round(profile.db_time * 1000, 2),
+            "queries": sum(profile.queries.values()),
+            "duplicates": duplicates,
+        }, ensure_ascii=False))
@@ -0,0 +1,61 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+SORT_KEYS = ("wall", "db", "queries", "requests")
+
+
+def read_records(path: str, since: Optional[str] = None) -> Iterator[dict]:
+    """Записи профилировщика из файла и его ротированных копий (.1, .2, ...)"""
+    base = Path(path)
+    files = sorted(
+        base.parent.glob(base.name + ".*"),
+        key=lambda file: int(file.suffix[1:]) if file.suffix[1:].isdigit() else 0,
+        reverse=True,
+    )
+    for file in [*files, base]:
+        if not file.exists():
+            continue
+        with open(file, encoding="utf-8") as source:
+            for line in source:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since is None or record.get("ts", "") >= since:
+                    yield record
+
+
+def percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def summarize(records: Iterable[dict], sort: str = "wall", top: int = 10) -> list[dict]:
+    """Сводка по представлениям, отсортированная по среднему времени/запросам"""
+    groups = defaultdict(list)
+    for record in records:
+        groups[record.get("view") or record.get("path")].append(record)
+
+    rows = []
+    for view, items in groups.items():
+        duplicates = defaultdict(int)
+        for item in items:
+            for duplicate in item.get("duplicates", []):
+                duplicates[duplicate["sql"]] = max(duplicates[duplicate["sql"]], duplicate["count"])
+        worst_duplicate = max(duplicates.items(), key=lambda pair: pair[1], default=(None, 0))
+        wall = [item["wall_ms"] for item in items]
+        rows.append({
+            "view": view,
+            "requests": len(items),
+            "wall": sum(wall) / len(items),
+            "wall_p95": percentile(wall, 0.95),
+            "db": sum(item["db_ms"] for item in items) / len(items),
+            "queries": sum(item["queries"] for item in items) / len(items),
+            "max_queries": max(item["queries"] for item in items),
+            "duplicate_sql": worst_duplicate[0],
+            "duplicate_count": worst_duplicate[1],
+        })
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return rows[:top]
@@ -0,0 +1,59 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, modify_settings, override_settings
+from django.urls import reverse
+from profiling.middleware import fingerprint, install_query_recorder, logger, record_query
+from profiling.report import read_records, summarize
+
+
+class QueryProfilingTest(TestCase):
+    """Профилировщик пишет по запросу строку JSONL, отчет собирает топ представлений"""
+
+    def setUp(self):
+        self.log = Path(tempfile.mkdtemp()) / "profile.jsonl"
+        install_query_recorder(None, connection)
+        self.client.force_login(get_user_model().objects.create_superuser("admin", "admin@example.com", "password"))
+
+    def tearDown(self):
+        connection.execute_wrappers.remove(record_query)
+        for handler in logger.handlers[:]:
+            handler.close()
+            logger.removeHandler(handler)
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s)'),
+        )
+
+    def test_sampled_requests_are_logged(self):
+        with self.settings(QUERY_PROFILING_SAMPLE_RATE=1.0, QUERY_PROFILING_LOG=str(self.log)), \
+                modify_settings(MIDDLEWARE={"prepend": "profiling.middleware.QueryProfilingMiddleware"}):
+            for _ in range(3):
+                self.client.get(reverse("admin:contracts_contract_changelist"))
+            self.client.get(reverse("admin:index"))
+
+        records = list(read_records(str(self.log)))
+        self.assertEqual(len(records), 4)
+        changelist = records[0]
+        self.assertEqual(changelist["view"], "admin:contracts_contract_changelist")
+        self.assertEqual(changelist["status"], 200)
+        self.assertGreater(changelist["queries"], 0)
+
+        top = summarize(records, sort="requests", top=1)
+        self.assertEqual(top[0]["view"], "admin:contracts_contract_changelist")
+        self.assertEqual(top[0]["requests"], 3)
+
+        output = StringIO()
+        call_command("profiling_report", log=str(self.log), stdout=output)
+        self.assertIn("admin:index", output.getvalue())
+
+    @override_settings(QUERY_PROFILING_SAMPLE_RATE=0.0)
+    def test_disabled_by_default(self):
+        with modify_settings(MIDDLEWARE={"prepend": "profiling.middleware.QueryProfilingMiddleware"}):
+            self.client.get(reverse("admin:index"))
+        self.assertFalse(self.log.exists())
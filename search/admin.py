@@ -0,0 +1,32 @@
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.db.models import Q
+from search.index import matching
+
+
+class IndexedSearchMixin:
+    """Поиск в админке и автодополнении через поисковые индексы.
+
+    indexed_search_relations — пары (путь к связи, модель с индексом),
+    например ("author", Person). Если индекс неприменим (короткая строка,
+    другая СУБД), используется стандартный поиск по search_fields.
+    """
+    indexed_search_relations = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or not self.indexed_search_relations:
+            return super().get_search_results(request, queryset, search_term)
+
+        condition = self.get_extra_search_condition(term)
+        use_distinct = False
+        for path, model in self.indexed_search_relations:
+            matches = matching(model, term, using=queryset.db)
+            if matches is None:
+                return super().get_search_results(request, queryset, search_term)
+            condition |= Q(**{f"{path}__in": matches.values("pk")})
+            use_distinct = use_distinct or lookup_spawns_duplicates(self.opts, path)
+        return queryset.filter(condition), use_distinct
+
+    def get_extra_search_condition(self, term: str) -> Q:
+        """Дополнительные условия поиска (например, по номеру)"""
+        return Q()
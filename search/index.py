@@ -0,0 +1,218 @@
+"""Поисковые индексы по преподавателям и образовательным потокам.
+
+PostgreSQL: расширение pg_trgm и GIN-индексы по триграммам (ускоряют
+icontains и дают нечеткий поиск trigram_word_similar).
+SQLite: теневые таблицы FTS5 с токенизатором trigram, которые
+поддерживаются триггерами на исходных таблицах.
+
+Индексы создаются миграцией search/0001_search_indexes. Если СУБД их не
+поддерживает (SQLite без токенизатора trigram, PostgreSQL без прав на
+pg_trgm), миграция их пропускает, а поиск идет по search_fields.
+SQLite выполняет часть ALTER TABLE пересозданием таблицы, и триггеры при
+этом удаляются: пока они не восстановлены (командой rebuild_search_index
+или вызовом create_search_indexes в такой миграции), индекс не используется.
+"""
+import logging
+from typing import Optional
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+from accounts.models import Person
+from threads.models import Education_Thread
+
+logger = logging.getLogger(__name__)
+
+# Имя индекса -> модель и поля, по которым ищем
+SEARCH_INDEXES = {
+    "person": (Person, ("username", "contact_email")),
+    "thread": (Education_Thread, ("name", "articul")),
+}
+# Токенизатор trigram в SQLite ищет подстроки от трех символов
+SQLITE_MIN_TERM_LENGTH = 3
+
+# Индексы, наличие которых уже проверено: (алиас базы, имя индекса)
+available_indexes = set()
+
+
+def fts_table(name: str) -> str:
+    return f"search_{name}_fts"
+
+
+def index_tables() -> dict[str, tuple[str, str, tuple[str, ...]]]:
+    """Имя индекса -> таблица, колонка первичного ключа и колонки текущих моделей"""
+    return {
+        name: (
+            model._meta.db_table,
+            model._meta.pk.column,
+            tuple(model._meta.get_field(field).column for field in fields),
+        )
+        for name, (model, fields) in SEARCH_INDEXES.items()
+    }
+
+
+def sqlite_statements(name: str, table: str, pk: str, columns) -> list[str]:
+    fts = fts_table(name)
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.{pk}, {old_values});"
+    )
+    insert_new = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.{pk}, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_list}, content='{table}', content_rowid='{pk}', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def sqlite_drop_statements(name: str) -> list[str]:
+    fts = fts_table(name)
+    return [
+        *(f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ("ai", "ad", "au")),
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+def postgresql_statements(name: str, table: str, columns) -> list[str]:
+    statements = []
+    for column in columns:
+        statements += [
+            # icontains в Django: UPPER(col::text) LIKE UPPER(%term%)
+            f"CREATE INDEX IF NOT EXISTS search_{name}_{column}_upper_trgm "
+            f"ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)",
+            f"CREATE INDEX IF NOT EXISTS search_{name}_{column}_trgm "
+            f"ON {table} USING gin ({column} gin_trgm_ops)",
+        ]
+    return statements
+
+
+def postgresql_drop_statements(name: str, columns) -> list[str]:
+    return [
+        f"DROP INDEX IF EXISTS search_{name}_{column}_{suffix}"
+        for column in columns
+        for suffix in ("upper_trgm", "trgm")
+    ]
+
+
+def search_supported(connection) -> bool:
+    """Поддерживает ли СУБД поисковые индексы (проверка без изменения схемы)"""
+    if connection.vendor == "sqlite":
+        probe = "CREATE VIRTUAL TABLE temp.search_probe USING fts5(value, tokenize='trigram')"
+    elif connection.vendor == "postgresql":
+        probe = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+    else:
+        return False
+    try:
+        # Точка сохранения: ошибка не прерывает транзакцию миграции
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(probe)
+            if connection.vendor == "sqlite":
+                cursor.execute("DROP TABLE temp.search_probe")
+    except DatabaseError as e:
+        logger.warning(f"Поисковые индексы не поддерживаются: {e}")
+        return False
+    return True
+
+
+def sqlite_index_missing(cursor, name: str) -> bool:
+    fts = fts_table(name)
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+        [fts, f"{fts}_ai", f"{fts}_ad", f"{fts}_au"],
+    )
+    return cursor.fetchone()[0] < 4
+
+
+def create_search_indexes(connection, tables: dict, rebuild: bool = False) -> list[str]:
+    """Создание недостающих индексов для таблиц {имя: (таблица, pk, колонки)}.
+
+    Возвращает имена созданных или перестроенных индексов; пустой список —
+    СУБД индексы не поддерживает.
+    """
+    if not search_supported(connection):
+        return []
+    built = []
+    with connection.cursor() as cursor:
+        for name, (table, pk, columns) in tables.items():
+            if connection.vendor == "postgresql":
+                statements = postgresql_statements(name, table, columns)
+            elif rebuild or sqlite_index_missing(cursor, name):
+                statements = sqlite_statements(name, table, pk, columns)
+            else:
+                continue
+            for statement in statements:
+                cursor.execute(statement)
+            available_indexes.add((connection.alias, name))
+            built.append(name)
+    return built
+
+
+def drop_search_indexes(connection, tables: dict) -> None:
+    """Удаление индексов (откат миграции)"""
+    with connection.cursor() as cursor:
+        for name, (_, _, columns) in tables.items():
+            if connection.vendor == "postgresql":
+                statements = postgresql_drop_statements(name, columns)
+            elif connection.vendor == "sqlite":
+                statements = sqlite_drop_statements(name)
+            else:
+                statements = []
+            for statement in statements:
+                cursor.execute(statement)
+            available_indexes.discard((connection.alias, name))
+
+
+def build_search_index(using: str = DEFAULT_DB_ALIAS, rebuild: bool = False) -> list[str]:
+    """Создание (или перестроение) индексов текущих моделей; возвращает их имена"""
+    return create_search_indexes(connections[using], index_tables(), rebuild=rebuild)
+
+
+def index_available(name: str, using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Индекс создан и поддерживается; положительный результат запоминается"""
+    if (using, name) in available_indexes:
+        return True
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            available = cursor.fetchone() is not None
+        elif connection.vendor == "sqlite":
+            available = not sqlite_index_missing(cursor, name)
+        else:
+            available = False
+    if available:
+        available_indexes.add((using, name))
+    return available
+
+
+def index_name_for(model) -> Optional[str]:
+    for name, (indexed_model, _) in SEARCH_INDEXES.items():
+        if indexed_model is model:
+            return name
+    return None
+
+
+def matching(model, term: str, using: str = DEFAULT_DB_ALIAS) -> Optional[QuerySet]:
+    """Объекты модели, найденные по индексу, или None, если индекс неприменим"""
+    name = index_name_for(model)
+    term = term.strip()
+    if name is None or not term:
+        return None
+    vendor = connections[using].vendor
+    _, fields = SEARCH_INDEXES[name]
+    if vendor == "postgresql" and index_available(name, using):
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__icontains": term}) | Q(**{f"{field}__trigram_word_similar": term})
+        return model.objects.using(using).filter(condition)
+    if vendor == "sqlite" and len(term) >= SQLITE_MIN_TERM_LENGTH and index_available(name, using):
+        fts = fts_table(name)
+        phrase = '"{}"'.format(term.replace('"', '""'))
+        return model.objects.using(using).filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [phrase])
+        )
+    return None
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from search.index import build_search_index
+
+
+class Command(BaseCommand):
+    help = "Создание и перестроение поисковых индексов (pg_trgm / SQLite FTS5)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Алиас базы данных")
+
+    def handle(self, *args, **options):
+        built = build_search_index(options["database"], rebuild=True)
+        if built:
+            self.stdout.write(self.style.SUCCESS(f"Перестроены индексы: {', '.join(built)}"))
+        else:
+            self.stdout.write("Для этой СУБД поисковые индексы не поддерживаются")
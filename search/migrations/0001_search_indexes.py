@@ -0,0 +1,29 @@
+from django.db import migrations
+from search.index import create_search_indexes, drop_search_indexes
+
+# Таблицы и колонки на момент миграции (не зависят от будущих изменений моделей)
+SEARCH_TABLES = {
+    "person": ("accounts_person", "id", ("username", "contact_email")),
+    "thread": ("threads_education_thread", "id", ("name", "articul")),
+}
+
+
+def create_indexes(apps, schema_editor):
+    """pg_trgm или FTS5 в зависимости от СУБД; без поддержки — пропуск"""
+    create_search_indexes(schema_editor.connection, SEARCH_TABLES)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_search_indexes(schema_editor.connection, SEARCH_TABLES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_manager_options_alter_person_options_and_more'),
+        ('threads', '0005_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
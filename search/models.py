@@ -0,0 +1,2 @@
+# Моделей нет: поисковые таблицы и индексы создаются миграциями приложения
+# (search/migrations) по описанию из search/index.py.
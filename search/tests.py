@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from accounts.models import Person
+from contracts.models import Author
+from search.index import build_search_index, drop_search_indexes, index_tables, matching
+from threads.models import Education_Thread
+
+
+class SearchIndexTest(TestCase):
+    """Индекс обновляется вместе с исходными таблицами"""
+
+    def setUp(self):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            self.skipTest("Поисковые индексы не поддерживаются")
+        self.person = Person.objects.create(username="Иван Петров", contact_email="ivan@example.com")
+
+    def found(self, model, term):
+        return list(matching(model, term).values_list("pk", flat=True))
+
+    def test_person_index_follows_changes(self):
+        self.assertEqual(self.found(Person, "петр"), [self.person.pk])
+        self.assertEqual(self.found(Person, "example.com"), [self.person.pk])
+
+        self.person.username = "Иван Сидоров"
+        self.person.save()
+        self.assertEqual(self.found(Person, "петр"), [])
+        self.assertEqual(self.found(Person, "сидор"), [self.person.pk])
+
+        self.person.delete()
+        self.assertEqual(self.found(Person, "сидор"), [])
+
+    def test_thread_articul(self):
+        thread = Education_Thread.objects.create(
+            name="Python", type_course="regular",
+            started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1),
+        )
+        self.assertEqual(self.found(Education_Thread, "2025-01-01-RG"), [thread.pk])
+
+    def test_missing_index_falls_back(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Без триггеров FTS5 индекс неприменим только в SQLite")
+        drop_search_indexes(connection, index_tables())
+        self.assertIsNone(matching(Person, "петр"))
+
+        self.assertEqual(build_search_index(), ["person", "thread"])
+        self.assertEqual(self.found(Person, "петр"), [self.person.pk])
+
+
+class AdminSearchTest(TestCase):
+    """Поиск в админке по связанным преподавателям"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        Author.objects.create(
+            author=Person.objects.create(username="Иван Петров"),
+            revenue=Decimal("1000"),
+            reward_percent=Decimal("10"),
+        )
+
+    def search_authors(self, term):
+        response = self.client.get(reverse("admin:contracts_author_changelist"), {"q": term})
+        self.assertEqual(response.status_code, 200)
+        return response.context["cl"].result_count
+
+    def test_author_search_by_username(self):
+        self.assertEqual(self.search_authors("петров"), 1)
+        self.assertEqual(self.search_authors("Ив"), 1)
+        self.assertEqual(self.search_authors("сидоров"), 0)
+
+    def test_thread_search_by_type_course(self):
+        Education_Thread.objects.create(
+            name="Go", type_course="bootcamp", started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1),
+        )
+        response = self.client.get(reverse("admin:threads_education_thread_changelist"), {"q": "bootcamp"})
+        self.assertEqual(response.context["cl"].result_count, 1)
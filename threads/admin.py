@@ -1,17 +1,46 @@
 from django.contrib import admin
+from django.db.models import Q
+from search.admin import IndexedSearchMixin
 from threads.models import Education_Thread
 
 
+class ThreadStatusFilter(admin.SimpleListFilter):
+    title = "Статус потока"
+    parameter_name = "status"
+
+    def lookups(self, request, model_admin):
+        return [
+            ("active", "Идет"),
+            ("upcoming", "Запланирован"),
+            ("finished", "Завершен"),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() in ("active", "upcoming", "finished"):
+            return getattr(queryset, self.value())()
+        return queryset
+
+
 @admin.register(Education_Thread)
-class ThreadAdmin(admin.ModelAdmin):
+class ThreadAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         "name", "articul", "type_course", "is_active",
         "started_at", "ended_at",
     )
+    list_filter = (ThreadStatusFilter, "type_course")
     readonly_fields = ("articul",)
     search_fields = ["name", "type_course", "articul"]
+    indexed_search_relations = (("pk", Education_Thread),)
+
+    def get_extra_search_condition(self, term):
+        # Тип курса не входит в поисковый индекс потоков
+        return Q(type_course__icontains=term)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_status()
 
     def is_active(self, obj):
-        return obj.is_active
+        return obj.status == "active"
     is_active.boolean = True
     is_active.short_description = "Статус потока"
+    is_active.admin_order_field = "status"
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0004_alter_education_thread_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='education_thread',
+            index=models.Index(fields=['articul'], name='thread_articul_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='education_thread',
+            index=models.Index(fields=['started_at', 'ended_at'], name='thread_dates_idx'),
+        ),
+    ]
@@ -1,5 +1,35 @@
+from typing import Optional
 from django.db import models
+from django.db.models import DEFERRED
 from django.utils import timezone
+from threads.signals import articul_changed as articul_changed_signal
+
+# Поля, из которых строится артикул потока
+ARTICUL_INPUTS = ("name", "type_course", "started_at")
+
+
+class Education_ThreadQuerySet(models.QuerySet):
+    """Отбор потоков по датам на стороне базы"""
+
+    def active(self) -> "Education_ThreadQuerySet":
+        today = timezone.localdate()
+        return self.filter(started_at__lte=today, ended_at__gte=today)
+
+    def upcoming(self) -> "Education_ThreadQuerySet":
+        return self.filter(started_at__gt=timezone.localdate())
+
+    def finished(self) -> "Education_ThreadQuerySet":
+        return self.filter(ended_at__lt=timezone.localdate())
+
+    def with_status(self) -> "Education_ThreadQuerySet":
+        """Аннотация status: upcoming/active/finished"""
+        today = timezone.localdate()
+        return self.annotate(status=models.Case(
+            models.When(started_at__gt=today, then=models.Value("upcoming")),
+            models.When(ended_at__lt=today, then=models.Value("finished")),
+            default=models.Value("active"),
+            output_field=models.CharField(),
+        ))
 
 
 class Education_Thread(models.Model):
@@ -19,9 +49,15 @@ class Education_Thread(models.Model):
     )
     articul = models.CharField(verbose_name="Артикул потока", max_length=20, blank=True)
 
+    objects = Education_ThreadQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Образовательный поток"
         verbose_name_plural = "Образовательные потоки"
+        indexes = [
+            models.Index(fields=["articul"], name="thread_articul_idx"),
+            models.Index(fields=["started_at", "ended_at"], name="thread_dates_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} - {self.articul}"
@@ -38,11 +74,51 @@ class Education_Thread(models.Model):
         type_part = type_map.get(self.type_course, "XX")
         return f"{name_part}-{self.started_at}-{type_part}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_articul_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs) -> None:
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_articul_state()
+
+    def remember_articul_state(self) -> None:
+        """Запоминаем артикул и его исходные данные в том виде, как они сохранены в базе"""
+        self._saved_articul_inputs = self.get_articul_inputs()
+        self._saved_articul = self.__dict__.get("articul")
+
+    def get_articul_inputs(self) -> Optional[tuple]:
+        # Отложенные (deferred) поля не загружены — сравнивать не с чем
+        values = tuple(self.__dict__.get(field, DEFERRED) for field in ARTICUL_INPUTS)
+        return None if DEFERRED in values else values
+
     def save(self, *args, **kwargs) -> None:
-        # При изменение названия потока, даты, курса, перезаписывается артикул
-        if self.name and self.type_course:
+        # Артикул перегенерируется только при изменении названия потока, даты, типа курса
+        inputs_changed = (
+            self._state.adding
+            or getattr(self, "_saved_articul_inputs", None) is None
+            or self.get_articul_inputs() != self._saved_articul_inputs
+        )
+        if self.name and self.type_course and inputs_changed:
             self.articul = self.generate_articul()
+
+        old_articul = getattr(self, "_saved_articul", None)
+        articul_changed = not self._state.adding and self.articul != old_articul
+        update_fields = kwargs.get("update_fields")
+        if articul_changed and update_fields is not None and "articul" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "articul"]
+
         super().save(*args, **kwargs)
+        self.remember_articul_state()
+        if articul_changed:
+            articul_changed_signal.send(
+                sender=self.__class__,
+                instance=self,
+                old_articul=old_articul,
+                new_articul=self.articul,
+            )
 
     @property
     def is_active(self) -> bool:
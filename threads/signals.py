@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Артикул сохраненного потока изменился.
+# Аргументы: instance, old_articul, new_articul
+articul_changed = Signal()
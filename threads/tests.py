@@ -1 +1,92 @@
+from datetime import date, timedelta
+from django.test import TestCase
+from django.utils import timezone
+from dataverse.testing import IndexAssertionsMixin
+from threads.models import Education_Thread
+from threads.signals import articul_changed
 
+
+class ThreadIndexTest(IndexAssertionsMixin, TestCase):
+    """Поиск и фильтры потоков используют индексы (по плану EXPLAIN)"""
+
+    def test_articul_lookup(self):
+        self.assertUsesIndex(
+            Education_Thread.objects.filter(articul="PYT-2025-01-01-RG"),
+            "thread_articul_idx",
+        )
+
+    def test_date_range(self):
+        today = date(2025, 2, 1)
+        self.assertUsesIndex(
+            Education_Thread.objects.filter(started_at__lte=today, ended_at__gte=today),
+            "thread_dates_idx",
+        )
+
+
+class ThreadStatusTest(TestCase):
+    """Статус потока вычисляется в базе"""
+
+    def setUp(self):
+        today = timezone.localdate()
+        for name, started_at, ended_at in (
+            ("finished", today - timedelta(days=30), today - timedelta(days=1)),
+            ("active", today - timedelta(days=1), today + timedelta(days=1)),
+            ("upcoming", today + timedelta(days=1), today + timedelta(days=30)),
+        ):
+            Education_Thread.objects.create(name=name, started_at=started_at, ended_at=ended_at)
+
+    def test_status_querysets(self):
+        for status in ("active", "upcoming", "finished"):
+            threads = getattr(Education_Thread.objects, status)()
+            self.assertEqual(list(threads.values_list("name", flat=True)), [status])
+
+    def test_status_annotation(self):
+        for thread in Education_Thread.objects.with_status():
+            self.assertEqual(thread.status, thread.name)
+            self.assertEqual(thread.is_active, thread.status == "active")
+
+
+class ArticulChangeTest(TestCase):
+    """Артикул перегенерируется и сигнал отправляется только при изменении входных данных"""
+
+    def setUp(self):
+        self.thread = Education_Thread.objects.create(
+            name="Python", type_course="regular",
+            started_at=date(2025, 1, 1), ended_at=date(2025, 3, 1),
+        )
+        self.changes = []
+        articul_changed.connect(self.on_change, sender=Education_Thread)
+        self.addCleanup(articul_changed.disconnect, self.on_change, sender=Education_Thread)
+
+    def on_change(self, sender, instance, old_articul, new_articul, **kwargs):
+        self.changes.append((old_articul, new_articul))
+
+    def test_unrelated_change_keeps_articul(self):
+        thread = Education_Thread.objects.get(pk=self.thread.pk)
+        thread.ended_at = date(2025, 4, 1)
+        thread.save()
+        self.assertEqual(self.changes, [])
+
+    def test_full_save_writes_new_articul(self):
+        thread = Education_Thread.objects.get(pk=self.thread.pk)
+        thread.name = "Go"
+        thread.save()
+        self.assertEqual(self.changes, [("PYT-2025-01-01-RG", "GO-2025-01-01-RG")])
+        self.assertEqual(Education_Thread.objects.get(pk=thread.pk).articul, "GO-2025-01-01-RG")
+
+    def test_copy_and_resave_deleted_row(self):
+        thread = Education_Thread.objects.get(pk=self.thread.pk)
+        thread.pk = None
+        thread.save()
+        self.assertEqual(Education_Thread.objects.count(), 2)
+        Education_Thread.objects.filter(pk=thread.pk).delete()
+        thread.save()
+        self.assertTrue(Education_Thread.objects.filter(pk=thread.pk).exists())
+
+    def test_input_change_emits_signal(self):
+        thread = Education_Thread.objects.get(pk=self.thread.pk)
+        thread.type_course = "bootcamp"
+        thread.save(update_fields=["type_course"])
+        self.assertEqual(self.changes, [("PYT-2025-01-01-RG", "PYT-2025-01-01-BC")])
+        thread.refresh_from_db()
+        self.assertEqual(thread.articul, "PYT-2025-01-01-BC")